@@ -0,0 +1,7 @@
+"""
+Benchmarks for phrenology, run against a local stand-in HTTP server.
+
+Usage:
+    python -m benchmarks run --output results.json
+    python -m benchmarks compare baseline.json results.json
+"""
@@ -0,0 +1,117 @@
+import argparse
+import json
+import sys
+
+from .server import FAILURES, HEADER_SETS, StandInServer
+from .suite import SCENARIOS, compare, environment, run_isolated, run_scenario
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Phrenology benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run the benchmarks against a local stand-in server")
+    run.add_argument("-o", "--output", default="-", help="File to write the JSON results to (default: stdout)")
+    run.add_argument(
+        "--scenario",
+        dest="scenarios",
+        action="append",
+        choices=list(SCENARIOS),
+        help="Scenario to run, may be repeated (default: all)",
+    )
+    _add_load_arguments(run)
+    run.add_argument("--header-set", default="secure", choices=list(HEADER_SETS), help="Headers the server answers with")
+    run.add_argument("--latency", type=float, default=0.0, help="Seconds the server waits before answering")
+    run.add_argument("--failure-rate", type=float, default=0.0, help="Share of targets that fail, between 0 and 1")
+    run.add_argument("--failure", default="reset", choices=FAILURES, help="How failing targets fail")
+
+    scenario = commands.add_parser("scenario", help="Run one scenario against a running server (used by run)")
+    scenario.add_argument("name", choices=list(SCENARIOS))
+    scenario.add_argument("--base-url", required=True)
+    _add_load_arguments(scenario)
+
+    check = commands.add_parser("compare", help="Compare results against a baseline and flag regressions")
+    check.add_argument("baseline", help="Baseline results file")
+    check.add_argument("current", help="Results file to check")
+    check.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Relative change allowed before a metric counts as a regression (default: 0.1)",
+    )
+
+    args = parser.parse_args()
+    if args.command == "run":
+        return _run(args)
+    if args.command == "scenario":
+        print(json.dumps(run_scenario(args.name, args.base_url, args.requests, args.workers, args.timeout)))
+        return 0
+    return _compare(args)
+
+
+def _add_load_arguments(parser):
+    parser.add_argument("-n", "--requests", type=int, default=2000, help="Targets scanned per scenario (default: 2000)")
+    parser.add_argument("-w", "--workers", type=int, default=8, help="Workers for concurrent scenarios (default: 8)")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Connect and read timeout in seconds (default: 2)")
+
+
+def _run(args):
+    results = {
+        "environment": environment(),
+        "config": {
+            "requests": args.requests,
+            "workers": args.workers,
+            "timeout": args.timeout,
+            "header_set": args.header_set,
+            "latency": args.latency,
+            "failure_rate": args.failure_rate,
+            "failure": args.failure,
+        },
+        "scenarios": {},
+    }
+    server = StandInServer(args.header_set, args.latency, args.failure_rate, args.failure, stall_seconds=args.timeout * 2)
+    with server:
+        for name in args.scenarios or SCENARIOS:
+            print(f"[*] Running {name}...", file=sys.stderr)
+            summary = run_isolated(name, server.url, args.requests, args.workers, args.timeout)
+            results["scenarios"][name] = summary
+            print(
+                f"    {summary['scans_per_sec']} scans/sec, p50 {summary['p50_ms']} ms, "
+                f"p99 {summary['p99_ms']} ms, peak RSS {summary['peak_rss_kb']} KiB, {summary['errors']} errors",
+                file=sys.stderr,
+            )
+
+    document = json.dumps(results, indent=2)
+    if args.output == "-":
+        print(document)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(document + "\n")
+    return 0
+
+
+def _compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    if baseline.get("config") != current.get("config"):
+        print("[!] The results were produced with different settings; the comparison may be meaningless", file=sys.stderr)
+    rows = compare(baseline, current, args.tolerance)
+    for row in rows:
+        flag = "REGRESSION" if row["regression"] else "ok"
+        print(
+            f"{row['scenario']:<18} {row['metric']:<14} {row['baseline']:>12} -> {row['current']:>12} "
+            f"({row['change']:+.1%}) {flag}"
+        )
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"[!] {len(regressions)} regression(s) beyond {args.tolerance:.0%}", file=sys.stderr)
+        return 1
+    print(f"[*] No regressions beyond {args.tolerance:.0%}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
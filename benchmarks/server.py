@@ -0,0 +1,159 @@
+"""
+A local threaded HTTP server standing in for real targets during benchmarks.
+"""
+
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Response header sets the server can answer with.
+HEADER_SETS = {
+    "secure": {
+        "X-Frame-Options": "deny",
+        "X-Content-Type-Options": "nosniff",
+        "Strict-Transport-Security": "max-age=63072000; includeSubDomains",
+        "Content-Security-Policy": "default-src 'self'; object-src 'none'; frame-ancestors 'none'",
+        "Referrer-Policy": "no-referrer",
+        "Permissions-Policy": "camera=(), geolocation=(), microphone=()",
+        "Cross-Origin-Opener-Policy": "same-origin",
+        "Cross-Origin-Embedder-Policy": "require-corp",
+        "Cross-Origin-Resource-Policy": "same-origin",
+        "Cache-Control": "no-store, max-age=0",
+    },
+    "bare": {},
+    "leaky": {
+        "Server": "Apache/2.4.1 (Unix)",
+        "X-Powered-By": "PHP/5.6.40",
+        "X-AspNet-Version": "4.0.30319",
+        "X-XSS-Protection": "1; mode=block",
+        "Pragma": "no-cache",
+        "Expires": "0",
+    },
+    "lowercase": {
+        "x-frame-options": "deny",
+        "x-content-type-options": "nosniff",
+        "strict-transport-security": "max-age=63072000",
+        "server": "nginx",
+    },
+    "large": {f"X-Custom-{i}": "v" * 64 for i in range(60)},
+}
+
+# Ways a request can fail.
+FAILURES = ("reset", "status", "stall")
+
+
+class StandInServer:
+    """
+    A threaded HTTP/1.1 server answering every path with a configurable header set.
+
+    Requests can be slowed down by a fixed latency, and a deterministic share of
+    paths can fail: "reset" drops the connection without answering, "status"
+    answers 500 and "stall" waits `stall_seconds` before answering so client
+    timeouts kick in. Whether a path fails depends only on the path, so repeated
+    runs over the same targets fail the same way.
+
+    Attributes:
+        url (str): Base URL of the running server.
+    """
+
+    def __init__(self, header_set="secure", latency=0.0, failure_rate=0.0, failure="reset", stall_seconds=30.0):
+        """
+        Initializes the server without starting it.
+
+        Args:
+            header_set (str): Name of the response headers, a key of HEADER_SETS.
+            latency (float): Seconds to wait before answering each request.
+            failure_rate (float): Share of paths that fail, between 0 and 1.
+            failure (str): How failing paths fail, one of FAILURES.
+            stall_seconds (float): Seconds a "stall" failure waits before answering.
+
+        Raises:
+            ValueError: If the header set or the failure mode is unknown.
+        """
+        if header_set not in HEADER_SETS:
+            raise ValueError(f"Invalid header set: {header_set}. Use one of {', '.join(HEADER_SETS)}.")
+        if failure not in FAILURES:
+            raise ValueError(f"Invalid failure mode: {failure}. Use one of {', '.join(FAILURES)}.")
+        self.headers = HEADER_SETS[header_set]
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure = failure
+        self.stall_seconds = stall_seconds
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fails(self, path):
+        """
+        Decides whether a path fails.
+
+        Args:
+            path (str): The request path, including any query string.
+
+        Returns:
+            bool: True if requests for the path fail.
+        """
+        return zlib.crc32(path.encode()) % 10000 < self.failure_rate * 10000
+
+    def start(self):
+        """Starts serving on a free local port from a background thread."""
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the server and closes its socket."""
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _handler(server):
+    """Builds a request handler class bound to one StandInServer."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            self._answer(send_body=False)
+
+        def do_GET(self):
+            self._answer(send_body=True)
+
+        def _answer(self, send_body):
+            if server.latency:
+                time.sleep(server.latency)
+            status = 200
+            if server.fails(self.path):
+                if server.failure == "reset":
+                    self.close_connection = True
+                    return
+                if server.failure == "stall":
+                    time.sleep(server.stall_seconds)
+                else:
+                    status = 500
+            body = b"ok\n"
+            self.send_response(status)
+            for name, value in server.headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if send_body:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
@@ -0,0 +1,272 @@
+"""
+Benchmark scenarios and the comparison of their results against a baseline.
+"""
+
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from phrenology import Main
+from phrenology.common import render
+from phrenology.component.header import HeaderService
+from phrenology.component.session import SessionPool
+from phrenology.component.timeout import TimeoutPolicy, percentile
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CLI = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "phrenology.py")
+
+# Metrics compared against a baseline, and whether a larger value is better.
+METRICS = {
+    "scans_per_sec": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "peak_rss_kb": False,
+}
+
+
+def targets(base_url, count):
+    """Returns `count` distinct target URLs on the stand-in server."""
+    return [f"{base_url}/target/{index}" for index in range(count)]
+
+
+def bench_header_service(base_url, count, workers, timeout):
+    """Drives HeaderService directly, one request after the other over a shared session."""
+    pool = SessionPool()
+    config = {"method": "HEAD", "allow_redirects": False, "verify": False}
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for url in targets(base_url, count):
+        service = HeaderService(dict(config), session=pool.session, resolver=pool.resolver)
+        service.url = url
+        service.timeout = (timeout, timeout)
+        request_started = time.perf_counter()
+        try:
+            service.run_request()
+        except RuntimeError:
+            errors += 1
+        latencies.append(time.perf_counter() - request_started)
+    elapsed = time.perf_counter() - started
+    pool.close()
+    return _summary(count, elapsed, latencies, errors)
+
+
+def bench_main_engage(base_url, count, workers, timeout):
+    """Drives Main.engage(), fetching and rendering one target after the other."""
+    main = _main(timeout)
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for url in targets(base_url, count):
+        request_started = time.perf_counter()
+        try:
+            main.engage(url, None, False, False, False, False, False)
+        except (ValueError, RuntimeError):
+            errors += 1
+        latencies.append(time.perf_counter() - request_started)
+    elapsed = time.perf_counter() - started
+    main.close()
+    return _summary(count, elapsed, latencies, errors)
+
+
+def bench_main_engage_all(base_url, count, workers, timeout):
+    """Drives Main.engage_all() with a pool of `workers` threads."""
+    main = _main(timeout, workers)
+    latencies, errors = [], []
+    fetch = main.fetch
+
+    def _timed_fetch(url, cookie=None, get=False):
+        request_started = time.perf_counter()
+        try:
+            return fetch(url, cookie, get)
+        finally:
+            latencies.append(time.perf_counter() - request_started)
+
+    main.fetch = _timed_fetch
+    started = time.perf_counter()
+    main.engage_all(
+        targets(base_url, count),
+        None,
+        False,
+        False,
+        False,
+        False,
+        False,
+        workers=workers,
+        on_error=lambda url, e: errors.append(url),
+    )
+    elapsed = time.perf_counter() - started
+    main.close()
+    return _summary(count, elapsed, latencies, len(errors))
+
+
+def bench_cli_bulk(base_url, count, workers, timeout):
+    """Runs the CLI bulk path (-f) in a subprocess, the way users do."""
+    return _run_cli(base_url, count, workers, timeout)
+
+
+def bench_cli_bulk_processes(base_url, count, workers, timeout):
+    """Runs the CLI bulk path with --engine processes, one process per CPU and -w threads in each."""
+    return _run_cli(base_url, count, workers, timeout, "--engine", "processes")
+
+
+def _run_cli(base_url, count, workers, timeout, *options):
+    """Runs the CLI over `count` targets in a subprocess and summarizes the run."""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("\n".join(targets(base_url, count)) + "\n")
+    try:
+        started = time.perf_counter()
+        result = subprocess.run(
+            [
+                sys.executable, CLI, "-f", f.name, "-s", "-n", "-O", os.devnull, "-w", str(workers),
+                "--connect-timeout", str(timeout), "--read-timeout", str(timeout), *options,
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True,
+            check=False,
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        os.unlink(f.name)
+    errors = sum(1 for line in result.stderr.splitlines() if line.startswith("Error:"))
+    summary = _summary(count, elapsed, [], errors)
+    summary["peak_rss_kb"] = _peak_rss(resource.RUSAGE_CHILDREN) if resource else None
+    return summary
+
+
+SCENARIOS = {
+    "header_service": bench_header_service,
+    "main_engage": bench_main_engage,
+    "main_engage_all": bench_main_engage_all,
+    "cli_bulk": bench_cli_bulk,
+    "cli_bulk_processes": bench_cli_bulk_processes,
+}
+
+
+def run_scenario(name, base_url, count, workers, timeout):
+    """
+    Runs one scenario in the current process.
+
+    Args:
+        name (str): The scenario, a key of SCENARIOS.
+        base_url (str): Base URL of the stand-in server.
+        count (int): Number of targets to scan.
+        workers (int): Number of concurrent workers, for scenarios that use them.
+        timeout (float): Connect and read timeout in seconds.
+
+    Returns:
+        dict: The measured metrics.
+    """
+    summary = SCENARIOS[name](base_url, count, workers, timeout)
+    if "peak_rss_kb" not in summary:
+        summary["peak_rss_kb"] = _peak_rss(resource.RUSAGE_SELF) if resource else None
+    return summary
+
+
+def run_isolated(name, base_url, count, workers, timeout):
+    """
+    Runs one scenario in a fresh interpreter so peak memory is measured on its own.
+
+    Returns:
+        dict: The measured metrics.
+
+    Raises:
+        RuntimeError: If the scenario process fails.
+    """
+    result = subprocess.run(
+        [
+            sys.executable, "-m", "benchmarks", "scenario", name, "--base-url", base_url,
+            "--requests", str(count), "--workers", str(workers), "--timeout", str(timeout),
+        ],
+        capture_output=True,
+        text=True,
+        check=False,
+        cwd=os.path.dirname(CLI),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Benchmark scenario {name} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def environment():
+    """Describes the machine the benchmarks ran on."""
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def compare(baseline, current, tolerance=0.1):
+    """
+    Compares benchmark results against a baseline.
+
+    Args:
+        baseline (dict): Results loaded from the baseline file.
+        current (dict): Results loaded from the file being checked.
+        tolerance (float): Relative change allowed before a metric counts as a regression.
+
+    Returns:
+        list: One dict per metric present in both files, with the scenario, metric,
+              both values, the relative change and whether it is a regression.
+    """
+    rows = []
+    for scenario, before in baseline.get("scenarios", {}).items():
+        after = current.get("scenarios", {}).get(scenario)
+        if after is None:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            rows.append(
+                {
+                    "scenario": scenario,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": change,
+                    "regression": worse > tolerance,
+                }
+            )
+    return rows
+
+
+def _main(timeout, workers=1):
+    """Builds a Main instance that renders to a discarded JSON Lines stream."""
+    output = render.NdjsonTemplate.open(os.devnull)
+    return Main(
+        output,
+        {"method": "HEAD", "allow_redirects": False, "verify": False},
+        SessionPool(pool_maxsize=max(10, workers)),
+        timeouts=TimeoutPolicy(connect=timeout, read=timeout),
+    )
+
+
+def _summary(count, elapsed, latencies, errors):
+    """Turns raw measurements into the reported metrics."""
+    return {
+        "scans": count,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "scans_per_sec": round(count / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+    }
+
+
+def _peak_rss(who):
+    """Returns the peak resident set size in KiB."""
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
@@ -1,12 +1,139 @@
 #!/bin/env python3
 import argparse
+import contextlib
+import functools
+import gzip
+import os
+import signal
 import sys
-from phrenology import Main
+import threading
 from phrenology.common import render
+from phrenology.common.checkpoint import Checkpoint
+from phrenology.common.merge import merge
+from phrenology.common.targets import interleave, read_targets, shard
+from phrenology.component.resolver import Resolver
+from phrenology.component.scheduler import HostScheduler
+from phrenology.component.timeout import Deadline, TimeoutPolicy
+from phrenology.component.timing import TimingStats
+
+
+def parse_shard(value):
+    """
+    Parses a --shard value of the form K/N.
+
+    Args:
+        value (str): The shard, numbered from 1 to N.
+
+    Returns:
+        tuple: The zero-based shard index and the number of shards.
+
+    Raises:
+        ValueError: If the value is not of the form K/N with 1 <= K <= N.
+    """
+    index, _, count = value.partition("/")
+    if not (index.isdigit() and count.isdigit() and 1 <= int(index) <= int(count)):
+        raise ValueError(f"Invalid shard '{value}': expected K/N with 1 <= K <= N, e.g. 2/4")
+    return int(index) - 1, int(count)
+
+
+def merge_main(argv):
+    parser = argparse.ArgumentParser(
+        prog="phrenology.py merge",
+        description="Combine the -j/--json or -n/--ndjson results of several shards into one report",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="+",
+        help="Result files to merge, JSON or JSON Lines, optionally gzip compressed",
+    )
+    parser.add_argument(
+        "-j",
+        "--json",
+        dest="json",
+        action="store_true",
+        help="Write a single JSON object instead of JSON Lines",
+        required=False,
+    )
+    parser.add_argument(
+        "-O",
+        "--output",
+        dest="output",
+        type=str,
+        default="-",
+        help="File to write the merged results to, gzip compressed if it ends in .gz (default: stdout)",
+        required=False,
+    )
+    args = parser.parse_args(argv)
+
+    if args.output == "-":
+        stream = contextlib.nullcontext(sys.stdout)
+    elif args.output.endswith(".gz"):
+        stream = gzip.open(args.output, "wt", encoding="utf-8")
+    else:
+        stream = open(args.output, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+    try:
+        with stream as f:
+            written = merge(args.inputs, f, json_document=args.json)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(f"[*] Merged {written} results from {len(args.inputs)} files", file=sys.stderr)
+
+
+def build_main(args, output, metrics=None):
+    """
+    Builds the Main instance a run uses from the parsed command line.
+
+    It is a module-level function so that --engine processes can pass it to its
+    worker processes, which build their own Main from the same arguments.
+
+    Args:
+        args (argparse.Namespace): The parsed command line arguments.
+        output (OutputAbstract): The template results are rendered to.
+        metrics (Metrics, optional): Registry the run's metrics are recorded in.
+
+    Returns:
+        Main: The configured instance.
+    """
+    # Imported only once the arguments are valid, so -h and usage errors never load requests.
+    from phrenology import Main  # pylint: disable=import-outside-toplevel
+    from phrenology.component.session import SessionPool  # pylint: disable=import-outside-toplevel
+
+    polite = bool(args.per_host or args.per_ip or args.host_delay)
+    return Main(
+        output,
+        {
+            "method": "HEAD",
+            "allow_redirects": False,
+            "verify": not args.disable_ssl_verify,
+        },
+        SessionPool(
+            pool_connections=args.pool_hosts,
+            pool_maxsize=args.pool_size or max(10, args.workers),
+            keep_alive=args.keep_alive,
+            resolver=Resolver(ttl=args.dns_ttl, negative_ttl=args.dns_negative_ttl),
+        ),
+        HostScheduler(args.per_host, args.per_ip, args.host_delay) if polite else None,
+        TimeoutPolicy(
+            connect=args.connect_timeout,
+            read=args.read_timeout,
+            total=args.target_timeout,
+            adaptive=args.adaptive_timeouts,
+        ),
+        Deadline(args.deadline),
+        TimingStats() if args.timing else None,
+        metrics,
+    )
 
 
 def main():
-    parser = argparse.ArgumentParser(description="Phrenology CLI")
+    if sys.argv[1:2] == ["merge"]:
+        merge_main(sys.argv[2:])
+        return
+    parser = argparse.ArgumentParser(
+        description="Phrenology CLI",
+        epilog="Run 'phrenology.py merge -h' to combine the results of sharded scans.",
+    )
     parser.add_argument(
         "-u", "--url", dest="url", type=str, help="URL to check headers", required=False
     )
@@ -18,6 +145,15 @@ def main():
         help="Custom cookie string to send (e.g. 'session=abc123; token=xyz')",
         required=False,
     )
+    parser.add_argument(
+        "-a",
+        "--analyze",
+        dest="analyze",
+        action="store_true",
+        help="Grade the security header values against the OWASP recommended values and score the "
+        "Content-Security-Policy",
+        required=False,
+    )
     parser.add_argument(
         "-c",
         "--cache",
@@ -47,7 +183,7 @@ def main():
         "--file",
         dest="file",
         type=str,
-        help="path to file containing a list of domains",
+        help="path to file containing a list of domains, gzip compressed or '-' for stdin",
         required=False,
     )
     parser.add_argument(
@@ -74,6 +210,40 @@ def main():
         help="Output results as a json object",
         required=False,
     )
+    parser.add_argument(
+        "-n",
+        "--ndjson",
+        dest="ndjson",
+        action="store_true",
+        help="Stream results as JSON Lines, one object per URL as soon as it finishes",
+        required=False,
+    )
+    parser.add_argument(
+        "-O",
+        "--output",
+        dest="output",
+        type=str,
+        default="-",
+        help="With -n/--ndjson or --since, file to write results to, gzip compressed if it ends in .gz (default: stdout)",
+        required=False,
+    )
+    parser.add_argument(
+        "--since",
+        dest="since",
+        type=str,
+        default=None,
+        help="Compare every target with the -j/--json or -n/--ndjson results of an earlier scan and only write what "
+        "changed, as JSON Lines: added, removed or changed headers, new targets and new failures",
+        required=False,
+    )
+    parser.add_argument(
+        "--sqlite",
+        dest="sqlite",
+        type=str,
+        default=None,
+        help="Record results in a SQLite database, created if needed, to keep a queryable history of scans",
+        required=False,
+    )
     parser.add_argument(
         "-o",
         "--owasp",
@@ -90,53 +260,550 @@ def main():
         help="Suppress the banner (useful when called by another tool)",
         required=False,
     )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        dest="workers",
+        type=int,
+        default=1,
+        help="Number of targets from -f/--file to scan concurrently, threads or in-flight requests depending on --engine (default: 1)",
+        required=False,
+    )
+    parser.add_argument(
+        "--engine",
+        dest="engine",
+        choices=["threads", "async", "processes"],
+        default="threads",
+        help="Scan engine used for -f/--file: a thread pool, a single asyncio event loop, or a pool of "
+        "processes each running -w threads (default: threads)",
+        required=False,
+    )
+    parser.add_argument(
+        "--processes",
+        dest="processes",
+        type=int,
+        default=None,
+        help="Number of worker processes for --engine processes (default: the number of CPUs)",
+        required=False,
+    )
+    parser.add_argument(
+        "--pool-size",
+        dest="pool_size",
+        type=int,
+        default=None,
+        help="Maximum number of pooled connections kept per host (default: the larger of 10 and -w)",
+        required=False,
+    )
+    parser.add_argument(
+        "--pool-hosts",
+        dest="pool_hosts",
+        type=int,
+        default=100,
+        help="Number of hosts to keep connection pools for (default: 100)",
+        required=False,
+    )
+    parser.add_argument(
+        "--no-keep-alive",
+        dest="keep_alive",
+        action="store_false",
+        help="Close every connection after its request instead of reusing it",
+        required=False,
+    )
+    parser.add_argument(
+        "--dns-ttl",
+        dest="dns_ttl",
+        type=float,
+        default=300,
+        help="Seconds to cache a successful DNS lookup, 0 to disable (default: 300)",
+        required=False,
+    )
+    parser.add_argument(
+        "--dns-negative-ttl",
+        dest="dns_negative_ttl",
+        type=float,
+        default=60,
+        help="Seconds to cache a failed DNS lookup, 0 to disable (default: 60)",
+        required=False,
+    )
+    parser.add_argument(
+        "--per-host",
+        dest="per_host",
+        type=int,
+        default=0,
+        help="Maximum concurrent requests to one hostname, 0 for no limit (threads engine only)",
+        required=False,
+    )
+    parser.add_argument(
+        "--per-ip",
+        dest="per_ip",
+        type=int,
+        default=0,
+        help="Maximum concurrent requests to one resolved IP address, 0 for no limit (threads engine only)",
+        required=False,
+    )
+    parser.add_argument(
+        "--host-delay",
+        dest="host_delay",
+        type=float,
+        default=0,
+        help="Minimum seconds between two requests to the same hostname (threads engine only)",
+        required=False,
+    )
+    parser.add_argument(
+        "--interleave",
+        dest="interleave",
+        type=int,
+        default=None,
+        help="Reorder -f/--file targets across hosts within a window of this many targets, 0 to disable "
+        "(default: 1024 when --per-host, --per-ip or --host-delay is set, otherwise 0)",
+        required=False,
+    )
+    parser.add_argument(
+        "--shard",
+        dest="shard",
+        type=str,
+        default=None,
+        help="Only scan shard K of N of the -f/--file targets, split by host so every node gets a disjoint "
+        "slice (e.g. 2/4); combine the results with 'merge'",
+        required=False,
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        dest="connect_timeout",
+        type=float,
+        default=10,
+        help="Seconds to wait for a connection to be established (default: 10)",
+        required=False,
+    )
+    parser.add_argument(
+        "--read-timeout",
+        dest="read_timeout",
+        type=float,
+        default=20,
+        help="Seconds to wait for the server to send data (default: 20)",
+        required=False,
+    )
+    parser.add_argument(
+        "--target-timeout",
+        dest="target_timeout",
+        type=float,
+        default=None,
+        help="Total seconds allowed for a single target",
+        required=False,
+    )
+    parser.add_argument(
+        "--deadline",
+        dest="deadline",
+        type=float,
+        default=None,
+        help="Total seconds allowed for the whole run; targets not started by then are skipped",
+        required=False,
+    )
+    parser.add_argument(
+        "--adaptive-timeouts",
+        dest="adaptive_timeouts",
+        action="store_true",
+        help="Lower the timeouts to a multiple of the observed p99 latency once enough targets have answered",
+        required=False,
+    )
+    parser.add_argument(
+        "--stats",
+        dest="stats",
+        action="store_true",
+        help="Print run statistics such as connection reuse and DNS cache hits to stderr when the run ends",
+        required=False,
+    )
+    parser.add_argument(
+        "--timing",
+        dest="timing",
+        action="store_true",
+        help="Record how long DNS, connect, TLS, time to first byte, analysis and rendering took for each "
+        "target, include it in the output and print per-phase percentiles to stderr when the run ends",
+        required=False,
+    )
+    parser.add_argument(
+        "--metrics-file",
+        dest="metrics_file",
+        type=str,
+        default=None,
+        help="Write Prometheus metrics to this file while the run goes on, e.g. for the node_exporter "
+        "textfile collector",
+        required=False,
+    )
+    parser.add_argument(
+        "--metrics-port",
+        dest="metrics_port",
+        type=int,
+        default=None,
+        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics while the run goes on",
+        required=False,
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        dest="metrics_interval",
+        type=float,
+        default=15,
+        help="Seconds between two writes of --metrics-file (default: 15)",
+        required=False,
+    )
+    parser.add_argument(
+        "--profile",
+        dest="profile",
+        type=str,
+        default=None,
+        help="Profile the run with cProfile, write the statistics to this file and print the hottest functions",
+        required=False,
+    )
+    parser.add_argument(
+        "--profile-top",
+        dest="profile_top",
+        type=int,
+        default=25,
+        help="Number of functions listed in the --profile summary, 0 for none (default: 25)",
+        required=False,
+    )
+    parser.add_argument(
+        "--checkpoint",
+        dest="checkpoint",
+        type=str,
+        default=None,
+        help="Journal completed -f/--file targets to this file and resume from it when it already exists",
+        required=False,
+    )
+    parser.add_argument(
+        "--serve-stdio",
+        dest="serve_stdio",
+        action="store_true",
+        help="Stay running and answer one target URL or JSON job per line on stdin with one JSON result "
+        "per line on stdout (threads engine only)",
+        required=False,
+    )
+    parser.add_argument(
+        "--monitor",
+        dest="monitor",
+        action="store_true",
+        help="Keep checking the -f/--file targets, each when it is due, and write what changed since its previous "
+        "check as JSON Lines until interrupted or --deadline (threads engine only)",
+        required=False,
+    )
+    parser.add_argument(
+        "--interval",
+        dest="interval",
+        type=float,
+        default=3600,
+        help="With --monitor, seconds between the first checks of a target (default: 3600)",
+        required=False,
+    )
+    parser.add_argument(
+        "--min-interval",
+        dest="min_interval",
+        type=float,
+        default=None,
+        help="With --monitor, shortest interval of a target that keeps changing (default: --interval / 8)",
+        required=False,
+    )
+    parser.add_argument(
+        "--max-interval",
+        dest="max_interval",
+        type=float,
+        default=None,
+        help="With --monitor, longest interval of a target that never changes (default: --interval * 8)",
+        required=False,
+    )
+    parser.add_argument(
+        "--unordered",
+        dest="unordered",
+        action="store_true",
+        help="With -w/--workers, print each result as soon as it finishes instead of in file order",
+        required=False,
+    )
 
     args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("-w/--workers must be at least 1")
+    polite = bool(args.per_host or args.per_ip or args.host_delay)
+    if args.interleave is None:
+        args.interleave = 1024 if polite else 0
+    if args.engine == "processes":
+        if args.processes is not None and args.processes < 1:
+            parser.error("--processes must be at least 1")
+        if args.timing or args.stats or args.metrics_file or args.metrics_port is not None:
+            parser.error("--engine processes cannot be combined with --timing, --stats or --metrics-*")
+    if args.checkpoint and not args.file:
+        parser.error("--checkpoint requires -f/--file")
+    if args.shard:
+        if not args.file:
+            parser.error("--shard requires -f/--file")
+        try:
+            args.shard = parse_shard(args.shard)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.monitor:
+        if not args.file:
+            parser.error("--monitor requires -f/--file")
+        if args.engine != "threads" or args.checkpoint or args.json or args.sqlite:
+            parser.error("--monitor cannot be combined with --engine async/processes, --checkpoint, -j/--json or --sqlite")
+        from phrenology.monitor import Schedule  # pylint: disable=import-outside-toplevel
+
+        try:
+            schedule = Schedule(args.interval, args.min_interval, args.max_interval)
+        except ValueError as e:
+            parser.error(str(e))
+        args.ndjson = True
+    if args.serve_stdio:
+        if args.url or args.file:
+            parser.error("--serve-stdio cannot be combined with -u/--url or -f/--file")
+        if args.sqlite or args.since:
+            parser.error("--serve-stdio cannot be combined with --sqlite or --since")
+        args.ndjson = True
+
+    if args.sqlite and (args.json or args.ndjson or args.since):
+        parser.error("--sqlite cannot be combined with -j/--json, -n/--ndjson or --since")
+    baseline = None
+    if args.since:
+        if args.json:
+            parser.error("--since cannot be combined with -j/--json")
+        from phrenology.common.diff import Baseline  # pylint: disable=import-outside-toplevel
 
-    if args.json:
+        try:
+            baseline = Baseline.load(args.since)
+        except (OSError, ValueError) as e:
+            parser.error(f"--since: {e}")
+        args.ndjson = True
+
+    if args.sqlite:
+        # sqlite3 and the result store are only loaded when results are written to SQLite.
+        import sqlite3  # pylint: disable=import-outside-toplevel
+
+        try:
+            output = render.SqliteTemplate(args.sqlite)
+        except (ValueError, sqlite3.Error) as e:
+            parser.error(f"--sqlite: {e}")
+    elif args.since or args.monitor:
+        output = render.DiffTemplate.open(args.output, baseline, follow=args.monitor)
+    elif args.ndjson:
+        output = render.NdjsonTemplate.open(args.output)
+    elif args.json:
         output = render.JsonTemplate()
     else:
         output = render.Template()
 
     if not args.silent:
         output.render_output("banner")
-    main_obj = Main(
-        output,
-        {
-            "method": "HEAD",
-            "allow_redirects": False,
-            "verify": not args.disable_ssl_verify,
-        },
-    )
 
-    def _engage(target_url):
+    metrics = None
+    exporters = []
+    if args.metrics_file or args.metrics_port is not None:
+        # Metrics are imported here so runs without an exporter never load them.
+        from phrenology.common.metrics import (  # pylint: disable=import-outside-toplevel
+            HttpExporter,
+            Metrics,
+            TextfileExporter,
+        )
+
+        metrics = Metrics()
+        if args.metrics_file:
+            exporters.append(TextfileExporter(metrics, args.metrics_file, args.metrics_interval).start())
+        if args.metrics_port is not None:
+            exporters.append(HttpExporter(metrics, args.metrics_port).start())
+
+    main_obj = build_main(args, output, metrics)
+
+    def _report_error(target_url, e):
+        print(f"Error: {e}", file=sys.stderr)
+        if args.ndjson or args.sqlite:
+            output.render_output("error", "Error", target_url, None, {"message": str(e)})
+            output.render_output("complete", None, target_url)
+
+    def _engage(target_urls, workers=1, on_complete=None):
+        if args.engine == "processes" and args.file:
+            from phrenology import processes  # pylint: disable=import-outside-toplevel
+
+            processes.scan(
+                main_obj,
+                functools.partial(build_main, args),
+                target_urls,
+                {
+                    "cookie": args.cookie,
+                    "cache": args.cache,
+                    "deprecated": args.deprecated,
+                    "information": args.information,
+                    "get": args.get,
+                    "json": args.json,
+                    "owasp_guidance": args.owasp,
+                    "analyze": args.analyze,
+                },
+                processes=args.processes,
+                workers=workers,
+                ordered=not args.unordered,
+                on_error=_report_error,
+                on_complete=on_complete,
+            )
+            return
+        if args.engine == "async":
+            import asyncio  # pylint: disable=import-outside-toplevel
+
+            asyncio.run(
+                main_obj.engage_all_async(
+                    target_urls,
+                    args.cookie,
+                    args.cache,
+                    args.deprecated,
+                    args.information,
+                    args.get,
+                    args.json,
+                    args.owasp,
+                    concurrency=workers,
+                    ordered=not args.unordered,
+                    on_error=_report_error,
+                    on_complete=on_complete,
+                    analyze=args.analyze,
+                )
+            )
+            return
+        main_obj.engage_all(
+            target_urls,
+            args.cookie,
+            args.cache,
+            args.deprecated,
+            args.information,
+            args.get,
+            args.json,
+            args.owasp,
+            workers=workers,
+            ordered=not args.unordered,
+            on_error=_report_error,
+            on_complete=on_complete,
+            analyze=args.analyze,
+        )
+
+    def _monitor(target_urls):
+        from phrenology.monitor import monitor  # pylint: disable=import-outside-toplevel
+
+        stop = threading.Event()
+        signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+        options = {
+            "cookie": args.cookie,
+            "cache": args.cache,
+            "deprecated": args.deprecated,
+            "information": args.information,
+            "get": args.get,
+            "json": args.json,
+            "owasp_guidance": args.owasp,
+            "analyze": args.analyze,
+        }
         try:
-            main_obj.engage(
-                target_url,
-                args.cookie,
-                args.cache,
-                args.deprecated,
-                args.information,
-                args.get,
-                args.json,
-                args.owasp,
+            monitor(main_obj, output, target_urls, options, schedule, args.workers, stop, _report_error)
+        except KeyboardInterrupt:
+            pass
+
+    profiler = contextlib.nullcontext()
+    if args.profile:
+        # cProfile and pstats are only loaded when a profile is requested.
+        from phrenology.common.profiling import Profiler  # pylint: disable=import-outside-toplevel
+
+        profiler = Profiler(args.profile, top=args.profile_top)
+    try:
+        with profiler:
+            try:
+                if args.file:
+                    checkpoint = None
+                    if args.checkpoint:
+                        source = args.file if args.file == "-" else os.path.abspath(args.file)
+                        if args.shard:
+                            # A journal only describes the slice it was written for.
+                            source = f"{source} shard {args.shard[0] + 1}/{args.shard[1]}"
+                        try:
+                            checkpoint = Checkpoint(args.checkpoint, source)
+                        except ValueError as e:
+                            parser.error(str(e))
+                    targets = read_targets(args.file, checkpoint.resume_offset if checkpoint else 0)
+                    if args.shard:
+                        targets = shard(targets, *args.shard)
+                    if checkpoint:
+                        targets = checkpoint.track(targets)
+                    if args.interleave:
+                        targets = interleave(targets, args.interleave)
+                    if args.monitor:
+                        _monitor(targets)
+                    else:
+                        try:
+                            _engage(targets, args.workers, checkpoint.record if checkpoint else None)
+                        finally:
+                            if checkpoint:
+                                checkpoint.close()
+                elif args.url:
+                    _engage([args.url])
+                elif args.serve_stdio:
+                    from phrenology.stdio import serve  # pylint: disable=import-outside-toplevel
+
+                    defaults = {
+                        "cookie": args.cookie,
+                        "get": args.get,
+                        "cache": args.cache,
+                        "deprecated": args.deprecated,
+                        "information": args.information,
+                        "owasp": args.owasp,
+                        "analyze": args.analyze,
+                    }
+                    serve(main_obj, sys.stdin, output, defaults, workers=args.workers)
+                else:
+                    # Handle error: No URL or file provided
+                    print("Error: Either -u/--url or -f/--file argument is required.")
+
+            finally:
+                if args.json or args.ndjson or args.sqlite:
+                    output.dump()
+
+        if args.monitor:
+            print(f"[*] {output.changed} of {output.changed + output.unchanged} checks found changes", file=sys.stderr)
+        elif args.since:
+            print(
+                f"[*] {output.changed} of {output.changed + output.unchanged} targets changed since {args.since}",
+                file=sys.stderr,
             )
-        except (ValueError, RuntimeError) as e:
-            print(f"Error: {e}", file=sys.stderr)
-
-    if args.file:
-        with open(args.file, "r") as f:
-            urls = f.read().splitlines()
-        for url in urls:
-            _engage(url)
-    elif args.url:
-        _engage(args.url)
-    else:
-        # Handle error: No URL or file provided
-        print("Error: Either -u/--url or -f/--file argument is required.")
 
-    if args.json:
-        output.dump()
+        if main_obj.deadline_reached:
+            print("Error: Run deadline reached; remaining targets were not scanned.", file=sys.stderr)
+
+        if args.stats:
+            stats = main_obj.stats()
+            connections = stats["connections"]
+            print(
+                f"[*] Connection reuse: {connections['reused']} of {connections['requests']} requests "
+                f"reused a pooled connection ({connections['connections']} opened)",
+                file=sys.stderr,
+            )
+            dns = stats["dns"]
+            print(
+                f"[*] DNS cache: {dns['hits']} hits, {dns['misses']} misses, {dns['entries']} cached hostnames",
+                file=sys.stderr,
+            )
+            csp, grading = stats["csp"], stats["grading"]
+            if grading["hits"] or grading["misses"]:
+                print(
+                    f"[*] Value grading cache: {grading['hits']} hits, {grading['misses']} misses, "
+                    f"{grading['entries']} cached values",
+                    file=sys.stderr,
+                )
+            if csp["hits"] or csp["misses"]:
+                print(
+                    f"[*] CSP analysis cache: {csp['hits']} hits, {csp['misses']} misses, {csp['entries']} cached policies",
+                    file=sys.stderr,
+                )
+        summary = main_obj.stats()["timing"] if args.timing else None
+        if summary:
+            print("[*] Phase timings in ms (p50 / p90 / p99):", file=sys.stderr)
+            for phase, values in summary.items():
+                print(
+                    f"    {phase:<9} {values['p50']:>10g} / {values['p90']:>10g} / {values['p99']:>10g}"
+                    f"  ({values['count']} samples)",
+                    file=sys.stderr,
+                )
+    finally:
+        for exporter in exporters:
+            exporter.close()
+        main_obj.close()
 
 
 if __name__ == "__main__":
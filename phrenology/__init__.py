@@ -28,11 +28,22 @@
 **************************************************************
 """
 
-# Importing submodules or specific objects in this section
-from . import common
-from . import component
-from . import registry
-from .main import Main
+# Submodules and objects are imported on first access, so importing the package
+# (or one of its light modules) does not pull in requests, urllib3 or asyncio
+import importlib
+
+_LAZY_ATTRIBUTES = {"common": None, "component": None, "registry": None, "Main": "main"}
+
+
+def __getattr__(name):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module_name = _LAZY_ATTRIBUTES[name]
+    if module_name is None:
+        return importlib.import_module(f".{name}", __name__)
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
 
 """
 **************************************************************
@@ -25,8 +25,14 @@
 """
 
 # Importing classes to include in the Output namespace
+import importlib
+
 from .output import OutputAbstract
-from .output_template import Template, JsonTemplate
+from .output_template import Template, JsonTemplate, NdjsonTemplate
+
+# Templates whose modules are only imported when first used, so runs that never
+# write to SQLite or compare scans do not load sqlite3.
+_LAZY_TEMPLATES = {"SqliteTemplate": "store", "DiffTemplate": "diff"}
 
 
 """
@@ -41,13 +47,19 @@ from .output_template import Template, JsonTemplate
 
 # Creating a namespace for Output classes
 class _Namespace:
-    pass
+    def __getattr__(self, name):
+        if name not in _LAZY_TEMPLATES:
+            raise AttributeError(f"render has no attribute {name!r}")
+        value = getattr(importlib.import_module(f".{_LAZY_TEMPLATES[name]}", __name__), name)
+        setattr(self, name, value)
+        return value
 
 
 render = _Namespace()
 render.Abstract = OutputAbstract
 render.Template = Template
 render.JsonTemplate = JsonTemplate
+render.NdjsonTemplate = NdjsonTemplate
 
 """
 **************************************************************
@@ -114,6 +126,6 @@ __all__ = ["output", "render"]
 
 # **************************************************************
 # Clean up the module namespace
-del _Namespace, OutputAbstract, Template, JsonTemplate
+del _Namespace, OutputAbstract, Template, JsonTemplate, NdjsonTemplate
 
 # pylint: enable=wrong-import-position
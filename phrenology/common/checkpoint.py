@@ -0,0 +1,131 @@
+"""
+On-disk journal that lets an interrupted bulk scan resume where it stopped.
+"""
+
+import os
+import threading
+from collections import deque
+
+JOURNAL_HEADER = "# phrenology checkpoint v1"
+
+
+class Checkpoint:
+    """
+    An append-only journal of the targets a bulk scan has completed.
+
+    Every completed target appends its line offset to the journal. Periodically,
+    and when the journal is closed, a resume mark is appended as well: the offset
+    of the first line that has not completed yet. A restarted run seeks straight
+    to the last mark and only has to skip the few targets after it that were
+    already journaled, so it never rereads the finished part of the input.
+
+    Records are written and flushed one line at a time under a lock, so the journal
+    stays consistent when several workers complete targets at once, and a torn last
+    line left by a crash is ignored on load.
+
+    Attributes:
+        resume_offset (int): Offset the input should be read from to resume the scan.
+    """
+
+    # Write a resume mark after this many completions.
+    mark_interval = 1000
+
+    def __init__(self, path, source):
+        """
+        Opens the journal, loading any progress it already holds.
+
+        Args:
+            path (str): Path to the journal file. It is created if it does not exist.
+            source (str): The target input the journal belongs to.
+
+        Raises:
+            ValueError: If the journal was written for a different input.
+        """
+        self.path = path
+        self.source = source
+        self.resume_offset = 0
+        self._done = set()
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._since_mark = 0
+        self._read_end = 0
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            self._load()
+        self._file = open(path, "a", encoding="utf-8")  # pylint: disable=consider-using-with
+        if not exists:
+            self._write(f"{JOURNAL_HEADER} {source}")
+
+    def _load(self):
+        """Reads the resume mark and the offsets completed after it."""
+        with open(self.path, "r", encoding="utf-8") as f:
+            header = f.readline().rstrip("\n")
+            if header != f"{JOURNAL_HEADER} {self.source}":
+                raise ValueError(
+                    f"Invalid checkpoint: {self.path} was not written for {self.source}"
+                )
+            for line in f:
+                if not line.endswith("\n"):
+                    break
+                record = line.strip()
+                if record.startswith("@") and record[1:].isdigit():
+                    self.resume_offset = int(record[1:])
+                    self._done = {offset for offset in self._done if offset >= self.resume_offset}
+                elif record.isdigit():
+                    self._done.add(int(record))
+
+    def track(self, targets):
+        """
+        Skips targets that are already complete and remembers the rest as pending.
+
+        Args:
+            targets (iterable): Targets carrying an `offset` attribute, in input order,
+                                read from resume_offset onwards.
+
+        Yields:
+            The targets that still have to be scanned.
+        """
+        for target in targets:
+            with self._lock:
+                self._read_end = target.offset
+                if target.offset in self._done:
+                    self._done.discard(target.offset)
+                    continue
+                self._pending.append(target.offset)
+            yield target
+
+    def record(self, target):
+        """
+        Journals a completed target.
+
+        Args:
+            target: The completed target, carrying an `offset` attribute.
+        """
+        with self._lock:
+            self._done.add(target.offset)
+            self._write(str(target.offset))
+            self._since_mark += 1
+            if self._since_mark >= self.mark_interval:
+                self._mark()
+
+    def _mark(self):
+        """Appends the offset of the first target that has not completed. Needs the lock."""
+        while self._pending and self._pending[0] in self._done:
+            self._done.discard(self._pending.popleft())
+        mark = self._pending[0] if self._pending else self._read_end
+        if mark > self.resume_offset:
+            self.resume_offset = mark
+            self._write(f"@{mark}")
+        self._since_mark = 0
+
+    def _write(self, record):
+        """Appends one record and flushes it to the operating system."""
+        self._file.write(record + "\n")
+        self._file.flush()
+
+    def close(self):
+        """Writes a final resume mark and closes the journal."""
+        with self._lock:
+            self._mark()
+            self._file.close()
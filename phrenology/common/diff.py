@@ -0,0 +1,227 @@
+"""
+Comparison of scan results against the results of an earlier scan.
+"""
+
+import json
+
+from .merge import read_results
+from .output_template import NdjsonTemplate
+
+# Headers whose value changes on every response; only their appearance or removal is reported.
+VOLATILE_HEADERS = frozenset(("date", "age", "expires", "last-modified", "etag", "set-cookie", "content-length"))
+
+
+def classified_headers(result):
+    """
+    Collects the classified headers of one result, as written with -j/--json or -n/--ndjson.
+
+    Args:
+        result (dict): The result of one URL.
+
+    Returns:
+        dict: The title of every category block of the result, e.g. "Cacheing headers", mapped
+              to the lowercase name of each header found in it and its value.
+    """
+    return {
+        title: {name.lower(): str(value) for name, value in block.get("expected", {}).items()}
+        for title, block in result.items()
+        if isinstance(block, dict) and "counts" in block
+    }
+
+
+def merged_headers(blocks, titles=None):
+    """
+    Merges the headers of the category blocks of one result.
+
+    Args:
+        blocks (dict): The category blocks, as returned by classified_headers().
+        titles (set, optional): The titles of the blocks to merge. Defaults to every block.
+
+    Returns:
+        dict: Lowercase header names mapped to their values.
+    """
+    headers = {}
+    for title, found in blocks.items():
+        if titles is None or title in titles:
+            headers.update(found)
+    return headers
+
+
+class Baseline:
+    """
+    An index of the classified headers of an earlier scan, keyed by URL.
+
+    Only the classified headers, by category, and the error of each target are
+    kept, and equal values are stored once, so a baseline of a large fleet stays small and every lookup is
+    a single dict access.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._values = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Indexes the results of a file written with -j/--json or -n/--ndjson.
+
+        Args:
+            path (str): Path to the result file, optionally gzip compressed.
+
+        Returns:
+            Baseline: The index of every result in the file.
+
+        Raises:
+            ValueError: If the file does not hold valid results.
+        """
+        baseline = cls()
+        for url, result in read_results(path):
+            baseline.add(url, classified_headers(result), result.get("error"))
+        return baseline
+
+    def add(self, url, blocks, error=None):
+        """
+        Records the headers and error of one target, replacing any earlier entry.
+
+        Args:
+            url (str): The scanned URL.
+            blocks (dict): The category blocks of the target, as returned by classified_headers().
+            error (str, optional): Why the target failed, for failed targets.
+        """
+        values = self._values
+        self._entries[url] = (
+            {
+                values.setdefault(title, title): {name: values.setdefault(value, value) for name, value in found.items()}
+                for title, found in blocks.items()
+            },
+            error,
+        )
+
+    def get(self, url):
+        """
+        Looks up the entry of one target.
+
+        Args:
+            url (str): The scanned URL.
+
+        Returns:
+            tuple: The category blocks and error of the target, or None if it was not scanned.
+        """
+        return self._entries.get(url)
+
+
+def diff(previous, headers, error=None):
+    """
+    Compares the current result of a target with its baseline entry.
+
+    Args:
+        previous (tuple): The (headers, error) entry of the target, or None if it is new.
+        headers (dict): Lowercase header names mapped to their current values.
+        error (str, optional): Why the target failed now, for failed targets.
+
+    Returns:
+        dict: The changes, with a "change" of "new", "changed", "failed" or "recovered"
+              and the "added", "removed" and "changed" headers, or None when nothing changed.
+    """
+    if error is not None:
+        if previous is not None and previous[1] is not None:
+            return None
+        return {"change": "failed", "error": error}
+    if previous is None:
+        return {"change": "new", "added": headers}
+    before, previous_error = previous
+    if previous_error is not None:
+        return {"change": "recovered", "added": headers}
+
+    added = {name: value for name, value in headers.items() if name not in before}
+    removed = {name: value for name, value in before.items() if name not in headers}
+    changed = {
+        name: {"from": before[name], "to": value}
+        for name, value in headers.items()
+        if name in before and before[name] != value and name not in VOLATILE_HEADERS
+    }
+    if not (added or removed or changed):
+        return None
+    record = {"change": "changed"}
+    for key, found in (("added", added), ("removed", removed), ("changed", changed)):
+        if found:
+            record[key] = found
+    return record
+
+
+class DiffTemplate(NdjsonTemplate):
+    """
+    Streams only what changed since an earlier scan, as JSON Lines.
+
+    Each URL is compared with its baseline entry as soon as Main has finished
+    with it, and a record is written only for added, removed or changed headers,
+    new targets and new failures. Unchanged targets produce no output. Only the
+    header categories found in both results are compared, so scanning with other
+    category flags than the baseline does not report their headers as changes.
+
+    Attributes:
+        changed (int): Number of targets a record was written for.
+        unchanged (int): Number of targets that matched the baseline.
+        last_change (dict): The changes of the last completed target, or None if it matched.
+        follow (bool): When True every result replaces its baseline entry, so each target
+                       is compared with its previous check rather than with the earlier scan.
+    """
+
+    def __init__(self, stream=None, baseline=None, follow=False):
+        """
+        Args:
+            stream (file, optional): The stream records are written to. Defaults to stdout.
+            baseline (Baseline, optional): The results of the earlier scan. Defaults to an
+                                           empty baseline, which reports every target as new.
+            follow (bool, optional): Update the baseline with every result. Defaults to False.
+        """
+        super().__init__(stream)
+        self.baseline = baseline if baseline is not None else Baseline()
+        self.follow = follow
+        self.changed = 0
+        self.unchanged = 0
+        self.last_change = None
+
+    @classmethod
+    def open(cls, path, baseline=None, follow=False):
+        """
+        Creates a template writing to a file, gzip compressed when the path ends in '.gz'.
+
+        Args:
+            path (str): The output path, or '-' for stdout.
+            baseline (Baseline, optional): The results of the earlier scan.
+            follow (bool, optional): Update the baseline with every result. Defaults to False.
+
+        Returns:
+            DiffTemplate: The template owning the opened file.
+        """
+        template = super().open(path)
+        if baseline is not None:
+            template.baseline = baseline
+        template.follow = follow
+        return template
+
+    def _render_complete(self, name, url, result, data):
+        record = self.results.pop(url, {})
+        blocks, error = classified_headers(record), record.get("error")
+        previous = self.baseline.get(url)
+        shared = None
+        if previous is not None:
+            # A category scanned only once, e.g. when --cache was added since the baseline,
+            # is left out rather than reported as headers added or removed.
+            if previous[0] and blocks:
+                shared = previous[0].keys() & blocks.keys()
+            previous = (merged_headers(previous[0], shared), previous[1])
+        change = diff(previous, merged_headers(blocks, shared), error)
+        self.last_change = change
+        if self.follow:
+            self.baseline.add(url, blocks, error)
+        if change is None:
+            self.unchanged += 1
+            return
+        self.changed += 1
+        self.stream.write(json.dumps(dict({"url": url}, **change)) + "\n")
+        self.flush()
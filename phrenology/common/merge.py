@@ -0,0 +1,221 @@
+"""
+Streaming merge of the JSON and JSON Lines results written by several scans.
+"""
+
+import gzip
+import json
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Characters read from a JSON document at a time.
+CHUNK_SIZE = 64 * 1024
+
+WHITESPACE = " \t\r\n"
+
+
+def open_results(path):
+    """
+    Opens a result file for reading as text, decompressing it if it is gzip compressed.
+
+    Args:
+        path (str): Path to a JSON or JSON Lines result file.
+
+    Returns:
+        file: The opened text stream.
+    """
+    with open(path, "rb") as f:
+        compressed = f.read(2) == GZIP_MAGIC
+    if compressed:
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")  # pylint: disable=consider-using-with
+
+
+def read_results(path):
+    """
+    Lazily yields the results stored in a file written with -j/--json or -n/--ndjson.
+
+    JSON Lines files are read one line at a time, and JSON documents are parsed one
+    URL at a time, so only a single result is held in memory whatever the file size.
+
+    Args:
+        path (str): Path to the result file, optionally gzip compressed.
+
+    Yields:
+        tuple: The URL and its result, without the "url" key. An empty file yields nothing.
+
+    Raises:
+        ValueError: If the file is neither a JSON document nor JSON Lines of results.
+    """
+    with open_results(path) as stream:
+        first = stream.readline()
+        if not first:
+            return
+        try:
+            record = json.loads(first)
+        except json.JSONDecodeError:
+            record = None
+        if isinstance(record, dict) and isinstance(record.get("url"), str):
+            yield _split_record(record, path)
+            for line in stream:
+                if line.strip():
+                    yield _split_record(_parse_line(line, path), path)
+            return
+        yield from iter_document(_Prefixed(first, stream), path)
+
+
+def _parse_line(line, path):
+    """Parses one JSON Lines record."""
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid results in {path}: {e}")
+
+
+def _split_record(record, path):
+    """Splits a JSON Lines record into its URL and the rest of the result."""
+    if not isinstance(record, dict) or not isinstance(record.get("url"), str):
+        raise ValueError(f"Invalid results in {path}: every line needs a 'url' string.")
+    url = record.pop("url")
+    return url, record
+
+
+class _Prefixed:
+    """A text stream with a line that was already read from it pushed back."""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size):
+        if self.prefix:
+            data, self.prefix = self.prefix, ""
+            return data
+        return self.stream.read(size)
+
+
+def iter_document(stream, path="<stream>", chunk_size=CHUNK_SIZE):
+    """
+    Lazily yields the members of a JSON object read from a stream.
+
+    The stream is read in chunks and each value is decoded as soon as it is
+    complete, so a document far larger than memory can be walked member by member.
+
+    Args:
+        stream: An object whose read(size) returns text.
+        path (str): Name of the input, used in error messages.
+        chunk_size (int): Number of characters read at a time.
+
+    Yields:
+        tuple: The key and decoded value of each member, in document order.
+
+    Raises:
+        ValueError: If the document is not a well-formed JSON object.
+    """
+    reader = _DocumentReader(stream, path, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        reader.expect("}")
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise ValueError(f"Invalid results in {path}: expected a URL key.")
+        reader.expect(":")
+        yield key, reader.value()
+        if reader.expect(",}") == "}":
+            return
+
+
+class _DocumentReader:
+    """Incremental tokenizer over a chunked text stream."""
+
+    def __init__(self, stream, path, chunk_size):
+        self.stream = stream
+        self.path = path
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _more(self):
+        """Reads the next chunk, dropping what was already consumed. Returns False at the end."""
+        chunk = "" if self.eof else self.stream.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """Skips whitespace and returns the next character without consuming it."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in WHITESPACE:
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self._more():
+                raise ValueError(f"Invalid results in {self.path}: unexpected end of file.")
+
+    def expect(self, characters):
+        """Consumes the next character, which must be one of `characters`, and returns it."""
+        character = self.peek()
+        if character not in characters:
+            raise ValueError(
+                f"Invalid results in {self.path}: expected {' or '.join(characters)!s} "
+                f"but found {character!r}."
+            )
+        self.position += 1
+        return character
+
+    def value(self):
+        """Decodes the next JSON value, reading more chunks until it is complete."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError as e:
+                if self._more():
+                    continue
+                raise ValueError(f"Invalid results in {self.path}: {e}")
+            # A number ending exactly at the end of the buffer may continue in the next chunk.
+            if end == len(self.buffer) and self._more():
+                continue
+            self.position = end
+            return value
+
+
+def merge(paths, stream, json_document=False):
+    """
+    Writes the results of several files to one output, one result at a time.
+
+    Args:
+        paths (list): The result files to merge, in the order they are written.
+        stream: The text stream the merged results are written to.
+        json_document (bool): Write a single JSON document like -j/--json instead of
+                              JSON Lines like -n/--ndjson.
+
+    Returns:
+        int: The number of results written.
+
+    Raises:
+        ValueError: If one of the files does not hold valid results.
+    """
+    written = 0
+    if json_document:
+        stream.write("{")
+    for path in paths:
+        for url, result in read_results(path):
+            if json_document:
+                # Dump the member on its own and strip the braces, so it is indented like JsonTemplate.dump().
+                member = json.dumps({url: result}, indent=2)[1:-2]
+                stream.write(("," if written else "") + member)
+            else:
+                record = {"url": url}
+                record.update(result)
+                stream.write(json.dumps(record) + "\n")
+            written += 1
+    if json_document:
+        stream.write("\n}\n" if written else "}\n")
+    return written
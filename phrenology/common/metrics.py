@@ -0,0 +1,297 @@
+"""
+Run metrics in the Prometheus text exposition format.
+"""
+
+import math
+import os
+import tempfile
+import threading
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Every metric phrenology exports, with its type and help text.
+DEFINITIONS = {
+    "phrenology_targets_completed_total": ("counter", "Targets whose headers were retrieved and reported."),
+    "phrenology_targets_failed_total": ("counter", "Targets that failed, by kind: dns, connect, tls, timeout, invalid_url or other."),
+    "phrenology_requests_in_flight": ("gauge", "Requests currently waiting for a response."),
+    "phrenology_request_duration_seconds": ("histogram", "Time taken to fetch the headers of a target."),
+    "phrenology_phase_duration_seconds": ("histogram", "Time spent in each phase of a scan, when timing is enabled."),
+    "phrenology_bytes_received_total": ("counter", "Approximate bytes received from targets."),
+    "phrenology_requests_sent_total": ("counter", "Requests sent through the connection pool."),
+    "phrenology_connections_opened_total": ("counter", "New connections opened by the connection pool."),
+    "phrenology_connection_reuse_ratio": ("gauge", "Share of requests sent over an already open connection."),
+    "phrenology_dns_cache_hits_total": ("counter", "DNS lookups answered from the cache."),
+    "phrenology_dns_cache_misses_total": ("counter", "DNS lookups sent to the system resolver."),
+    "phrenology_dns_cache_hit_ratio": ("gauge", "Share of DNS lookups answered from the cache."),
+}
+
+
+class Metrics:
+    """
+    A thread-safe registry of counters, gauges and histograms.
+
+    Values are kept per metric name and label set. Collectors registered with
+    register() are called just before the metrics are rendered, so values that
+    live elsewhere, such as connection pool statistics, are always current.
+    """
+
+    def __init__(self, definitions=None, buckets=DEFAULT_BUCKETS):
+        """
+        Initializes an empty registry.
+
+        Args:
+            definitions (dict, optional): Metric names mapped to their type and help text.
+                                          Defaults to DEFINITIONS.
+            buckets (tuple): Upper bounds of the histogram buckets, in increasing order.
+        """
+        self.definitions = definitions if definitions is not None else DEFINITIONS
+        self.buckets = tuple(buckets)
+        self._values = {}
+        self._histograms = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1, **labels):
+        """
+        Increases a counter or gauge.
+
+        Args:
+            name (str): The metric name.
+            amount (int or float): The increase; negative values decrease a gauge.
+            **labels: The label values of the series.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, name, amount=1, **labels):
+        """Decreases a gauge."""
+        self.inc(name, -amount, **labels)
+
+    def set(self, name, value, **labels):
+        """
+        Sets a counter or gauge to a value.
+
+        Args:
+            name (str): The metric name.
+            value (int or float): The new value.
+            **labels: The label values of the series.
+        """
+        with self._lock:
+            self._values[(name, _label_key(labels))] = value
+
+    def observe(self, name, value, **labels):
+        """
+        Records one observation in a histogram.
+
+        Args:
+            name (str): The metric name.
+            value (float): The observed value.
+            **labels: The label values of the series.
+        """
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[index] += 1
+                    break
+            else:
+                histogram[len(self.buckets)] += 1
+            histogram[-1] += value
+
+    def value(self, name, **labels):
+        """
+        Returns the current value of a counter or gauge.
+
+        Returns:
+            int or float: The value, or 0 if the series was never set.
+        """
+        with self._lock:
+            return self._values.get((name, _label_key(labels)), 0)
+
+    def register(self, collector):
+        """
+        Adds a collector that refreshes metrics before they are rendered.
+
+        Args:
+            collector (callable): Called with this registry as its only argument.
+        """
+        self._collectors.append(collector)
+
+    def render(self):
+        """
+        Renders every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: The exposition text.
+        """
+        for collector in self._collectors:
+            collector(self)
+        with self._lock:
+            values = dict(self._values)
+            histograms = {key: list(counts) for key, counts in self._histograms.items()}
+
+        series = {}
+        for (name, labels), value in values.items():
+            series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        for (name, labels), counts in histograms.items():
+            lines = series.setdefault(name, [])
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if bound == math.inf else _format_value(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(counts[-1])}")
+            lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+
+        output = []
+        for name in sorted(series):
+            kind, description = self.definitions.get(name, ("untyped", ""))
+            output.append(f"# HELP {name} {description}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(series[name])
+        return "\n".join(output) + "\n"
+
+
+class TextfileExporter:
+    """
+    Periodically writes metrics to a file for the node_exporter textfile collector.
+
+    The file is replaced atomically, so the collector never reads a partial file.
+    """
+
+    def __init__(self, metrics, path, interval=15):
+        """
+        Initializes the exporter without starting it.
+
+        Args:
+            metrics (Metrics): The metrics to export.
+            path (str): The file to write, usually ending in '.prom'.
+            interval (int or float): Seconds between two writes.
+        """
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Writes the metrics now and then every `interval` seconds from a background thread."""
+        self.write()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def _loop(self):
+        while not self._stopped.wait(self.interval):
+            self.write()
+
+    def write(self):
+        """Writes the current metrics to the file."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix=".phrenology-", suffix=".prom.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.metrics.render())
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def close(self):
+        """Stops the background thread and writes the final metrics."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.write()
+
+
+class HttpExporter:
+    """
+    Serves metrics over HTTP on /metrics for Prometheus to scrape.
+    """
+
+    def __init__(self, metrics, port, host="127.0.0.1"):
+        """
+        Initializes the exporter without starting it.
+
+        Args:
+            metrics (Metrics): The metrics to export.
+            port (int): The port to listen on, 0 for any free port.
+            host (str): The address to listen on. Defaults to the loopback interface.
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        """Starts serving from a background thread."""
+        # http.server is imported here so runs that only write a textfile never load it.
+        from http.server import ThreadingHTTPServer  # pylint: disable=import-outside-toplevel
+
+        self._server = ThreadingHTTPServer((self.host, self.port), _metrics_handler(self.metrics))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def close(self):
+        """Stops serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def _metrics_handler(metrics):
+    """Builds a request handler class serving one registry."""
+    from http.server import BaseHTTPRequestHandler  # pylint: disable=import-outside-toplevel
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+            pass
+
+    return Handler
+
+
+def _label_key(labels):
+    """Returns a hashable, ordered form of a label set."""
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels):
+    """Renders a label set as {key="value",...}, escaping values as the format requires."""
+    if not labels:
+        return ""
+    escaped = (f'{key}="{_escape(value)}"' for key, value in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _escape(value):
+    """Escapes a label value."""
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    """Renders a sample value."""
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        return repr(value) if not value.is_integer() else str(int(value))
+    return str(value)
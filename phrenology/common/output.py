@@ -21,3 +21,9 @@ class OutputAbstract(ABC):
     @abstractmethod
     def _render_error(self, data):
         pass
+
+    def _render_meta(self, name=None, url=None, result=None, data=None):
+        """Renders details about the scan itself, such as bytes received. Does nothing by default."""
+
+    def _render_complete(self, name=None, url=None, result=None, data=None):
+        """Called once every block for a URL has been rendered. Does nothing by default."""
@@ -1,4 +1,7 @@
+import gzip
 import json
+import sys
+import time
 
 from .output import OutputAbstract
 
@@ -168,6 +171,41 @@ class Template(OutputAbstract):
         for key, value in data.items():
             print(f"\t{key}: {value}")
 
+    def _render_analysis(self, name, url, result, data):
+        """
+        Renders the analysis of a header value.
+
+        Args:
+            name (str): The analysed header.
+            data (dict): The rating and findings of the value, plus the score and grade of a
+                         Content-Security-Policy.
+        """
+        alerts = {"high": "error", "medium": "warning", "low": "info"}
+        rating_alert = {"good": "success", "weak": "warning", "bad": "error"}[data["rating"]]
+        line = f"[*] Value of {colorize(name, 'info')} is {colorize(data['rating'], rating_alert)}"
+        if "score" in data:
+            line += f", score {data['score']}/100, grade {data['grade']}"
+        print(line)
+        for finding in data["findings"]:
+            severity = finding["severity"]
+            directive = f"{finding['directive']}: " if finding.get("directive") else ""
+            print(f"[{colorize('!', alerts[severity])}] {severity.capitalize()}: {directive}{finding['issue']}")
+        if data["findings"]:
+            print(f"    OWASP Recommended: {colorize(data['recommended'], 'info')}")
+
+    def _render_meta(self, name, url, result, data):
+        """
+        Renders details about the scan itself.
+
+        Args:
+            data (dict): The scan details, such as bytes_received and timing_ms.
+        """
+        if data.get("bytes_received") is not None:
+            print(f"[{colorize('*', 'info')}] Received {data['bytes_received']} bytes from {colorize(url, 'info')}")
+        if data.get("timing_ms"):
+            phases = ", ".join(f"{phase} {ms:g} ms" for phase, ms in data["timing_ms"].items())
+            print(f"[{colorize('*', 'info')}] Timing of {colorize(url, 'info')}: {phases}")
+
     def _render_error(self, name, url, result, data):
         """
         Renders the error output.
@@ -230,6 +268,16 @@ class JsonTemplate(OutputAbstract):
             self.results[url][name] = {}
         self.results[url][name]["details"] = data
 
+    def _render_analysis(self, name, url, result, data):
+        if url not in self.results:
+            self.results[url] = {}
+        self.results[url].setdefault("analysis", {})[name] = data
+
+    def _render_meta(self, name, url, result, data):
+        if url not in self.results:
+            self.results[url] = {}
+        self.results[url].setdefault("meta", {}).update(data)
+
     def _render_error(self, name, url, result, data):
         if url not in self.results:
             self.results[url] = {}
@@ -238,3 +286,74 @@ class JsonTemplate(OutputAbstract):
     def dump(self):
         """Prints the collected results as JSON."""
         print(json.dumps(self.results, indent=2))
+
+
+class NdjsonTemplate(JsonTemplate):
+    """
+    Streams header analysis results as JSON Lines.
+
+    Each URL is written as one self-contained JSON object as soon as Main has
+    finished with it and is then dropped from memory, so output can be tailed
+    live and a crash only loses the targets still in flight.
+
+    Every record is flushed as it is written, except on gzip files: each flush
+    there ends a compressed block, so they are flushed every
+    `gzip_flush_interval` seconds and when the template is dumped.
+
+    Attributes:
+        flush_interval (float): Least number of seconds between two flushes of the stream.
+    """
+
+    gzip_flush_interval = 1.0
+
+    def __init__(self, stream=None):
+        super().__init__()
+        self.stream = stream if stream is not None else sys.stdout
+        self.flush_interval = 0.0
+        self._flushed = 0.0
+        self._owns_stream = False
+
+    @classmethod
+    def open(cls, path):
+        """
+        Creates a template writing to a file, gzip compressed when the path ends in '.gz'.
+
+        Args:
+            path (str): The output path, or '-' for stdout.
+
+        Returns:
+            NdjsonTemplate: The template owning the opened file.
+        """
+        if path == "-":
+            return cls()
+        if path.endswith(".gz"):
+            stream = gzip.open(path, "wt", encoding="utf-8")
+        else:
+            stream = open(path, "w", encoding="utf-8")  # pylint: disable=consider-using-with
+        template = cls(stream)
+        template._owns_stream = True
+        if path.endswith(".gz"):
+            template.flush_interval = cls.gzip_flush_interval
+        return template
+
+    def _render_complete(self, name, url, result, data):
+        record = {"url": url}
+        record.update(self.results.pop(url, {}))
+        self.stream.write(json.dumps(record) + "\n")
+        self.flush()
+
+    def flush(self):
+        """Flushes the stream, unless it was flushed less than flush_interval seconds ago."""
+        now = time.monotonic()
+        if now - self._flushed >= self.flush_interval:
+            self.stream.flush()
+            self._flushed = now
+
+    def dump(self):
+        """Writes any URL that was never completed, then flushes and closes the stream."""
+        for url in list(self.results):
+            self._render_complete(None, url, None, None)
+        if self._owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
@@ -0,0 +1,111 @@
+"""
+Profiling of whole runs, including the worker threads.
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+
+
+class Profiler:
+    """
+    Profiles a block of code with cProfile, including the threads it starts.
+
+    Before Python 3.12 a profile only sees the thread that enabled it, so every
+    thread started while the profiler is active gets its own profile, and all of
+    them are merged when profiling stops. From Python 3.12 one profile already
+    covers every thread.
+
+    The merged statistics are written to `path` in the pstats format, which
+    `python -m pstats`, snakeviz and similar tools can read.
+
+    Attributes:
+        path (str): File the statistics are written to.
+        top (int): Number of functions listed in the summary.
+        sort (str): pstats sort key for the summary.
+    """
+
+    def __init__(self, path, top=25, sort="cumulative", stream=None):
+        """
+        Initializes a stopped profiler.
+
+        Args:
+            path (str): File the statistics are written to.
+            top (int): Number of functions listed in the summary, 0 for none.
+            sort (str): pstats sort key for the summary.
+            stream (file, optional): Where the summary is printed. Defaults to stderr.
+        """
+        self.path = path
+        self.top = top
+        self.sort = sort
+        self.stream = stream
+        self._profiles = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Starts profiling the calling thread and any thread started from now on."""
+        profile = cProfile.Profile()
+        self._profiles.append(profile)
+        if sys.version_info < (3, 12):
+            threading.setprofile(self._profile_thread)
+        profile.enable()
+
+    def _profile_thread(self, frame, event, arg):
+        """Replaces itself with a new profile on the first event of a new thread."""
+        sys.setprofile(None)
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def stop(self):
+        """
+        Stops profiling, writes the statistics and prints the summary.
+
+        Returns:
+            pstats.Stats: The merged statistics.
+        """
+        threading.setprofile(None)
+        for profile in self._profiles:
+            profile.disable()
+        stats = self.stats()
+        stats.dump_stats(self.path)
+        if self.top:
+            self.print_summary(stats)
+        return stats
+
+    def stats(self):
+        """
+        Merges the profiles of every thread.
+
+        Returns:
+            pstats.Stats: The merged statistics.
+        """
+        with self._lock:
+            profiles = [profile for profile in self._profiles if _has_data(profile)]
+        stats = pstats.Stats(profiles[0], stream=io.StringIO())
+        for profile in profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def print_summary(self, stats):
+        """Prints the `top` hottest functions to the summary stream."""
+        stream = self.stream if self.stream is not None else sys.stderr
+        print(f"[*] Profile written to {self.path}; top {self.top} functions by {self.sort} time:", file=stream)
+        stats.stream = stream
+        stats.sort_stats(self.sort).print_stats(self.top)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _has_data(profile):
+    """Returns True if a profile recorded anything."""
+    profile.create_stats()
+    return bool(profile.stats)
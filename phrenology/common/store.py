@@ -0,0 +1,249 @@
+"""
+SQLite store for scan results, kept across runs so history can be queried.
+"""
+
+import sqlite3
+import time
+from collections import OrderedDict
+
+from .output_template import JsonTemplate
+from .targets import host_of, normalize_url
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    id INTEGER PRIMARY KEY,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS targets (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    host_id INTEGER NOT NULL REFERENCES hosts (id)
+);
+CREATE TABLE IF NOT EXISTS header_names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS header_values (
+    id INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    scan_id INTEGER NOT NULL REFERENCES scans (id),
+    target_id INTEGER NOT NULL REFERENCES targets (id),
+    scanned_at REAL NOT NULL,
+    error TEXT,
+    bytes_received INTEGER
+);
+CREATE TABLE IF NOT EXISTS result_headers (
+    result_id INTEGER NOT NULL REFERENCES results (id),
+    name_id INTEGER NOT NULL REFERENCES header_names (id),
+    value_id INTEGER NOT NULL REFERENCES header_values (id),
+    rating TEXT,
+    PRIMARY KEY (result_id, name_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS targets_host ON targets (host_id);
+CREATE INDEX IF NOT EXISTS results_scanned_at ON results (scanned_at);
+CREATE INDEX IF NOT EXISTS results_target ON results (target_id, scanned_at);
+CREATE INDEX IF NOT EXISTS result_headers_name ON result_headers (name_id, result_id);
+"""
+
+# Starts from the results carrying the header, through result_headers_name, and looks
+# up the latest result of each of their targets through results_target, so the cost
+# grows with the targets that served the header rather than with the whole history.
+LOST_HEADER_QUERY = """
+SELECT DISTINCT hosts.name
+FROM (
+    SELECT DISTINCT earlier.target_id
+    FROM result_headers
+    JOIN results AS earlier ON earlier.id = result_headers.result_id
+    WHERE result_headers.name_id = :name_id AND earlier.scanned_at >= :since
+) AS served
+JOIN results AS latest ON latest.id = (
+    SELECT id FROM results WHERE target_id = served.target_id ORDER BY scanned_at DESC, id DESC LIMIT 1
+)
+JOIN targets ON targets.id = served.target_id
+JOIN hosts ON hosts.id = targets.host_id
+WHERE latest.error IS NULL
+  AND NOT EXISTS (
+    SELECT 1 FROM result_headers WHERE result_id = latest.id AND name_id = :name_id
+  )
+ORDER BY hosts.name
+"""
+
+
+class ResultStore:
+    """
+    A normalized SQLite database of scan results.
+
+    Header names and values are stored once in their own tables and referenced by
+    id, so a fleet serving the same few values stays small. Results are written in
+    batched transactions, committed every `batch_size` results and on close, and
+    indexes on host, scan time and header name keep history queries fast.
+
+    Attributes:
+        scan_id (int): The id of the scan this store records results for.
+    """
+
+    def __init__(self, path, batch_size=1000, cache_size=65536):
+        """
+        Opens or creates the database and starts a new scan.
+
+        Args:
+            path (str): Path to the database file, created if it does not exist.
+            batch_size (int): Number of results written per transaction.
+            cache_size (int): Number of hosts, targets and header values whose ids are kept in memory.
+
+        Raises:
+            ValueError: If the database was created by an incompatible version.
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, SCHEMA_VERSION):
+            self.connection.close()
+            raise ValueError(f"Invalid result store: {path} has schema version {version}, expected {SCHEMA_VERSION}")
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute("PRAGMA synchronous = NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.scan_id = self.connection.execute("INSERT INTO scans (started_at) VALUES (?)", (time.time(),)).lastrowid
+        self.connection.commit()
+        self._ids = {table: OrderedDict() for table in ("hosts", "targets", "header_names", "header_values")}
+        self._cache_size = cache_size
+        self._pending = 0
+
+    def add(self, url, headers, error=None, bytes_received=None, ratings=None, scanned_at=None):
+        """
+        Records the result of one target, committing when a batch is full.
+
+        Args:
+            url (str): The scanned URL. It is normalized like HeaderService.url, so a target
+                       listed as a bare domain is one target whether it failed or not.
+            headers (dict): Every response header name mapped to its value.
+            error (str, optional): Why the target failed, for failed targets.
+            bytes_received (int, optional): Approximate bytes read from the target.
+            ratings (dict, optional): Header names mapped to the rating of their value.
+            scanned_at (float, optional): Unix time of the scan. Defaults to now.
+        """
+        try:
+            url = normalize_url(url)
+        except ValueError:
+            # Invalid targets only ever fail, so they are always stored as listed.
+            pass
+        host_id = self._id("hosts", "name", host_of(url))
+        target_id = self._id("targets", "url", url, host_id=host_id)
+        result_id = self.connection.execute(
+            "INSERT INTO results (scan_id, target_id, scanned_at, error, bytes_received) VALUES (?, ?, ?, ?, ?)",
+            (self.scan_id, target_id, scanned_at if scanned_at is not None else time.time(), error, bytes_received),
+        ).lastrowid
+        ratings = {name.lower(): rating for name, rating in (ratings or {}).items()}
+        rows = {}
+        for name, value in headers.items():
+            key = name.lower()
+            rows.setdefault(key, (result_id, self._id("header_names", "name", key), self._id("header_values", "value", str(value)), ratings.get(key)))
+        self.connection.executemany(
+            "INSERT INTO result_headers (result_id, name_id, value_id, rating) VALUES (?, ?, ?, ?)", rows.values()
+        )
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+
+    def _id(self, table, column, value, **columns):
+        """Returns the id of a row holding `value`, inserting it if needed."""
+        ids = self._ids[table]
+        row_id = ids.get(value)
+        if row_id is not None:
+            ids.move_to_end(value)
+            return row_id
+        row = self.connection.execute(f"SELECT id FROM {table} WHERE {column} = ?", (value,)).fetchone()
+        if row is None:
+            names = ", ".join((column, *columns))
+            placeholders = ", ".join("?" * (len(columns) + 1))
+            row_id = self.connection.execute(
+                f"INSERT INTO {table} ({names}) VALUES ({placeholders})", (value, *columns.values())
+            ).lastrowid
+        else:
+            row_id = row[0]
+        ids[value] = row_id
+        if len(ids) > self._cache_size:
+            ids.popitem(last=False)
+        return row_id
+
+    def commit(self):
+        """Commits the results written since the last commit."""
+        self.connection.commit()
+        self._pending = 0
+
+    def hosts_that_lost(self, header, since):
+        """
+        Finds the hosts whose latest result lacks a header they served since a point in time.
+
+        Args:
+            header (str): The header name, in any casing.
+            since (float): Unix time from which earlier results are considered.
+
+        Returns:
+            list: The host names, sorted.
+        """
+        row = self.connection.execute("SELECT id FROM header_names WHERE name = ?", (header.lower(),)).fetchone()
+        if row is None:
+            return []
+        return [name for (name,) in self.connection.execute(LOST_HEADER_QUERY, {"name_id": row[0], "since": since})]
+
+    def close(self):
+        """Marks the scan as finished, commits and closes the database."""
+        self.connection.execute("UPDATE scans SET finished_at = ? WHERE id = ?", (time.time(), self.scan_id))
+        self.commit()
+        self.connection.close()
+
+
+class SqliteTemplate(JsonTemplate):
+    """
+    Writes header analysis results to a ResultStore.
+
+    Each URL is collected like JsonTemplate does and written to the store as soon
+    as Main has finished with it, then dropped from memory.
+    """
+
+    def __init__(self, path, batch_size=1000):
+        """
+        Opens the store.
+
+        Args:
+            path (str): Path to the SQLite database.
+            batch_size (int): Number of results written per transaction.
+        """
+        super().__init__()
+        self.store = ResultStore(path, batch_size)
+
+    def _render_complete(self, name, url, result, data):
+        record = self.results.pop(url, {})
+        headers, ratings = {}, {}
+        for key, block in record.items():
+            if key == "analysis":
+                ratings = {header: analysis.get("rating") for header, analysis in block.items()}
+            elif isinstance(block, dict) and "counts" in block:
+                headers.update(block.get("expected", {}))
+                headers.update(block.get("present", {}))
+        self.store.add(
+            url,
+            headers,
+            error=record.get("error"),
+            bytes_received=record.get("meta", {}).get("bytes_received"),
+            ratings=ratings,
+        )
+
+    def dump(self):
+        """Writes any URL that was never completed, then commits and closes the store."""
+        for url in list(self.results):
+            self._render_complete(None, url, None, None)
+        self.store.close()
@@ -0,0 +1,313 @@
+"""
+Lazy target sources for bulk scans.
+"""
+
+import gzip
+import io
+import mmap
+import os
+import sys
+import zlib
+from collections import deque
+from urllib.parse import urlparse
+
+# Regular files at least this large are read through mmap instead of buffered reads.
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+class Target(str):
+    """
+    A target URL that remembers where its line starts in the input.
+
+    It behaves exactly like the string it wraps, so it can be passed anywhere a
+    URL is expected.
+
+    Attributes:
+        offset (int): Byte offset of the target's line in the (decompressed) input, or None.
+    """
+
+    def __new__(cls, value, offset=None):
+        target = super().__new__(cls, value)
+        target.offset = offset
+        return target
+
+
+def read_targets(path, start=0):
+    """
+    Lazily yields the targets listed in a file, one per line.
+
+    Blank lines and lines starting with '#' are skipped, and surrounding whitespace
+    is stripped. Only one line is held in memory at a time, so the memory used does
+    not depend on the size of the list.
+
+    Args:
+        path (str): Path to a plain or gzip compressed file, or '-' to read from stdin.
+        start (int): Byte offset of the first line to read, as recorded in Target.offset.
+
+    Yields:
+        Target: One target per non-empty, non-comment line.
+    """
+    for offset, line in iter_lines(path, start):
+        target = line.decode("utf-8", errors="replace").strip()
+        if target and not target.startswith("#"):
+            yield Target(target, offset)
+
+
+def host_of(target):
+    """
+    Returns the lowercase hostname of a target, which may omit its scheme.
+
+    Args:
+        target (str): A URL or bare hostname as found in a target list.
+
+    Returns:
+        str: The hostname, or the whole target when no hostname can be parsed.
+    """
+    value = target if "://" in target else f"https://{target}"
+    try:
+        hostname = urlparse(value).hostname
+    except ValueError:
+        hostname = None
+    return hostname or target.lower()
+
+
+def normalize_url(value):
+    """
+    Returns a target as the URL it is scanned and reported under.
+
+    This is the normalization HeaderService.url applies: a missing scheme defaults to
+    https and the URL is rebuilt from its scheme, host, path and query, so a bare
+    domain and its https URL are the same target wherever results are keyed.
+
+    Args:
+        value (str): A URL or bare hostname as found in a target list.
+
+    Returns:
+        str: The normalized URL.
+
+    Raises:
+        ValueError: If the URL is invalid or contains unsupported protocols.
+    """
+    # Check for invalid protocols
+    invalid_protocols = ["ftp://", "mailto:", "file://"]
+    for protocol in invalid_protocols:
+        if value.startswith(protocol):
+            raise ValueError(
+                f"Invalid URL input: {protocol.strip(':')} protocol does not return headers."
+            )
+    # Ensure the URL starts with http or https
+    if not value.startswith(("http://", "https://")):
+        value = f"https://{value}"
+    # Extract the scheme and the rest of the URL
+    if "://" in value:
+        scheme, rest = value.split("://", 1)
+    else:
+        scheme, rest = "https", value
+    # Check for presence of '/' or '?'
+    if "/" in rest:
+        netloc, path_query = rest.split("/", 1)
+        path_query = "/" + path_query
+    elif "?" in rest:
+        netloc, path_query = rest.split("?", 1)
+        path_query = "?" + path_query
+    else:
+        netloc, path_query = rest, ""
+    # Further split path and query
+    if "?" in path_query:
+        path, query = path_query.split("?", 1)
+    else:
+        path, query = path_query, ""
+    # Validate the netloc
+    if (
+        not netloc
+        or "." not in netloc
+        or ".." in netloc
+        or netloc.startswith(".")
+        or netloc.endswith(".")
+    ):
+        raise ValueError(
+            "Invalid URL input: your url is malformed please check it and try again."
+        )
+    # Validate the IP address
+    if all(char.isdigit() or char == "." for char in netloc):
+        octets = netloc.split(".")
+        if len(octets) != 4:
+            raise ValueError("Invalid URL input: dude seriously?")
+        for octet in octets:
+            if not (0 <= int(octet) <= 255):
+                raise ValueError("Invalid URL input: dude seriously?")
+    # Final check for invalid characters
+    if " " in value:
+        raise ValueError("Invalid URL format")
+    # Rebuild the URL
+    final_url = f"{scheme}://{netloc}"
+    if path:
+        final_url += path
+    if query:
+        final_url += f"?{query}"
+    return final_url
+
+
+def normalize_target(target):
+    """
+    Normalizes a target like normalize_url(), keeping the offset of a Target.
+
+    Results, errors and completions are all keyed by the normalized URL, so a target
+    compares equal to itself across scans whether it failed or succeeded.
+
+    Args:
+        target (str): A URL or bare hostname, usually a Target read from a list.
+
+    Returns:
+        Target: The normalized target, or `target` unchanged when it is not a valid URL,
+                so fetching it reports the error.
+    """
+    try:
+        url = normalize_url(target)
+    except ValueError:
+        return target
+    return Target(url, getattr(target, "offset", None))
+
+
+def shard_of(target, count, key=host_of):
+    """
+    Returns the shard a target belongs to when a scan is split `count` ways.
+
+    The shard only depends on the target's host, through a hash that is stable
+    across processes and machines, so every node agrees on the split and all
+    targets of one host are scanned by the same node.
+
+    Args:
+        target (str): A URL or bare hostname as found in a target list.
+        count (int): The number of shards.
+        key (callable): Returns the host of a target.
+
+    Returns:
+        int: The shard index, from 0 to count - 1.
+    """
+    return zlib.crc32(key(target).encode("utf-8")) % count
+
+
+def shard(targets, index, count, key=host_of):
+    """
+    Lazily keeps the targets that belong to one shard of a scan split `count` ways.
+
+    Args:
+        targets (iterable): The targets to filter.
+        index (int): The shard to keep, from 0 to count - 1.
+        count (int): The number of shards.
+        key (callable): Returns the host of a target.
+
+    Yields:
+        The targets whose host hashes to `index`, in their original order.
+    """
+    for target in targets:
+        if shard_of(target, count, key) == index:
+            yield target
+
+
+def interleave(targets, window=1024, key=host_of):
+    """
+    Reorders targets so consecutive targets hit different hosts.
+
+    Up to `window` targets are buffered and emitted round-robin across their hosts,
+    which spreads a list sorted by domain over many origins while keeping memory
+    bounded. Targets for the same host keep their relative order.
+
+    Args:
+        targets (iterable): The targets to reorder.
+        window (int): Maximum number of targets buffered at once.
+        key (callable): Returns the host of a target.
+
+    Yields:
+        The same targets, interleaved across hosts.
+    """
+    queues = {}
+    ring = deque()
+    buffered = 0
+    iterator = iter(targets)
+    exhausted = False
+    while True:
+        while not exhausted and buffered < window:
+            try:
+                target = next(iterator)
+            except StopIteration:
+                exhausted = True
+                break
+            host = key(target)
+            if host not in queues:
+                queues[host] = deque()
+                ring.append(host)
+            queues[host].append(target)
+            buffered += 1
+        if not ring:
+            return
+        host = ring.popleft()
+        queue = queues[host]
+        yield queue.popleft()
+        buffered -= 1
+        if queue:
+            ring.append(host)
+        else:
+            del queues[host]
+
+
+def iter_lines(path, start=0):
+    """
+    Lazily yields every raw line of a target source together with its offset.
+
+    Offsets count bytes of the decompressed stream from the start of the input.
+    Files are positioned at `start` directly; stdin cannot seek, so its lines
+    before `start` are read and discarded.
+
+    Args:
+        path (str): Path to a plain or gzip compressed file, or '-' to read from stdin.
+        start (int): Byte offset of the first line to yield.
+
+    Yields:
+        tuple: The byte offset of the line and the line itself, as bytes.
+    """
+    if path == "-":
+        stream = sys.stdin.buffer
+        if not hasattr(stream, "peek"):
+            stream = io.BufferedReader(stream)
+        # Peeking leaves the magic bytes in the buffer, since stdin cannot be rewound.
+        if stream.peek(2)[:2] == GZIP_MAGIC:
+            stream = gzip.GzipFile(fileobj=stream, mode="rb")
+        for offset, line in _iter_stream(stream):
+            if offset >= start:
+                yield offset, line
+        return
+
+    with open(path, "rb") as f:
+        if f.read(2) == GZIP_MAGIC:
+            f.seek(0)
+            with gzip.open(f, "rb") as stream:
+                stream.seek(start)
+                yield from _iter_stream(stream, start)
+            return
+        size = os.fstat(f.fileno()).st_size
+        if size >= MMAP_THRESHOLD:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from _iter_mapped(mapped, size, start)
+        else:
+            f.seek(start)
+            yield from _iter_stream(f, start)
+
+
+def _iter_stream(stream, offset=0):
+    """Yields (offset, line) pairs from a binary stream positioned at `offset`."""
+    for line in stream:
+        yield offset, line
+        offset += len(line)
+
+
+def _iter_mapped(mapped, size, offset=0):
+    """Yields (offset, line) pairs from a memory-mapped file without copying it."""
+    while offset < size:
+        end = mapped.find(b"\n", offset)
+        end = size if end == -1 else end + 1
+        yield offset, mapped[offset:end]
+        offset = end
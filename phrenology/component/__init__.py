@@ -19,13 +19,18 @@
 *                                                            *
 *       from .header import HeaderModel                      *
 *       from .header import HeaderService                    *
+*       from .header import AsyncHeaderService               *
 *                                                            *
 **************************************************************
 """
 
-# Importing classes to include in the Header namespace
-from .header import HeaderModel
-from .header import HeaderService
+# Classes included in the Header namespace. They are imported from .header on
+# first access, so importing the package does not pull in requests and urllib3
+_HEADER_CLASSES = {
+    "Model": "HeaderModel",
+    "Service": "HeaderService",
+    "AsyncService": "AsyncHeaderService",
+}
 
 """
 **************************************************************
@@ -39,12 +44,17 @@ from .header import HeaderService
 
 # Creating a namespace for Header classes
 class _Namespace:
-    pass
+    def __getattr__(self, name):
+        if name not in _HEADER_CLASSES:
+            raise AttributeError(name)
+        from . import header  # pylint: disable=import-outside-toplevel
+
+        value = getattr(header, _HEADER_CLASSES[name])
+        setattr(self, name, value)
+        return value
 
 
 Header = _Namespace()
-Header.Model = HeaderModel
-Header.Service = HeaderService
 
 """
 **************************************************************
@@ -66,6 +76,6 @@ Header.Service = HeaderService
 __all__ = ["Header"]
 
 # Clean up the module namespace
-del _Namespace, HeaderModel, HeaderService
+del _Namespace
 
 # pylint: enable=wrong-import-position
@@ -0,0 +1,258 @@
+"""
+Content-Security-Policy parsing and analysis.
+"""
+
+import threading
+from collections import OrderedDict
+
+# Points taken off the score of a policy for each finding, by severity.
+PENALTIES = {"high": 25, "medium": 10, "low": 5}
+
+# Lowest score of each grade, best grade first.
+GRADES = (("A", 90), ("B", 80), ("C", 65), ("D", 50), ("F", 0))
+
+FETCH_DIRECTIVES = frozenset(
+    (
+        "default-src", "child-src", "connect-src", "font-src", "frame-src", "img-src", "manifest-src",
+        "media-src", "object-src", "script-src", "script-src-elem", "script-src-attr", "style-src",
+        "style-src-elem", "style-src-attr", "worker-src", "fenced-frame-src",
+    )
+)
+
+OTHER_DIRECTIVES = frozenset(
+    (
+        "base-uri", "form-action", "frame-ancestors", "sandbox", "upgrade-insecure-requests",
+        "report-uri", "report-to", "require-trusted-types-for", "trusted-types", "webrtc",
+    )
+)
+
+DEPRECATED_DIRECTIVES = frozenset(
+    ("block-all-mixed-content", "plugin-types", "prefetch-src", "referrer", "reflected-xss", "navigate-to")
+)
+
+# Directives whose sources decide which scripts may run.
+SCRIPT_DIRECTIVES = frozenset(("script-src", "script-src-elem", "script-src-attr"))
+
+
+class CspAnalysis:
+    """
+    The result of analysing one Content-Security-Policy header value.
+
+    Analyses are shared by every response carrying the same policy, so they are
+    immutable; as_dict() builds a fresh copy for rendering.
+
+    Attributes:
+        policies (tuple): One tuple of (directive, sources) pairs per policy in the header.
+        findings (tuple): (severity, directive, issue) triples, most severe first.
+        score (int): 100 minus the penalties of the findings, never below 0.
+        grade (str): A to F, derived from the score.
+    """
+
+    __slots__ = ("policies", "findings", "score", "grade")
+
+    def __init__(self, policies, findings):
+        self.policies = policies
+        self.findings = findings
+        self.score = max(100 - sum(PENALTIES[severity] for severity, _, _ in findings), 0)
+        self.grade = next(grade for grade, lowest in GRADES if self.score >= lowest)
+
+    def as_dict(self):
+        """
+        Returns the analysis as plain data, as rendered by the output templates.
+
+        Returns:
+            dict: The score, grade, findings and the parsed directives of every policy.
+        """
+        return {
+            "score": self.score,
+            "grade": self.grade,
+            "findings": [
+                {"severity": severity, "directive": directive, "issue": issue}
+                for severity, directive, issue in self.findings
+            ],
+            "policies": [
+                {directive: list(sources) for directive, sources in _directives(policy).items()}
+                for policy in self.policies
+            ],
+        }
+
+
+class CspAnalyzer:
+    """
+    A thread-safe Content-Security-Policy analyzer with a bounded LRU cache.
+
+    Many sites serve the exact same policy, often injected by a CDN, so analyses
+    are memoized by header value and a repeated policy costs a single lookup. The
+    cache holds at most `maxsize` values and evicts the least recently used first.
+
+    Attributes:
+        hits (int): Number of analyses answered from the cache.
+        misses (int): Number of policies parsed and analysed.
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        Initializes an empty cache.
+
+        Args:
+            maxsize (int): Maximum number of header values kept in the cache.
+        """
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def analyze(self, value):
+        """
+        Analyses a Content-Security-Policy header value, answering from the cache when possible.
+
+        Args:
+            value (str): The header value. Several policies may be separated by commas,
+                         as happens when a response carries more than one CSP header.
+
+        Returns:
+            CspAnalysis: The analysis of the value.
+        """
+        with self._lock:
+            analysis = self._cache.get(value)
+            if analysis is not None:
+                self._cache.move_to_end(value)
+                self.hits += 1
+                return analysis
+            self.misses += 1
+
+        analysis = analyze_policy(value)
+        with self._lock:
+            self._cache[value] = analysis
+            self._cache.move_to_end(value)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return analysis
+
+    def snapshot(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The number of hits, misses and cached policies.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache)}
+
+
+def parse_policy(value):
+    """
+    Parses a Content-Security-Policy header value into its policies and directives.
+
+    Directive names are lowercased. A directive repeated within a policy is kept,
+    although browsers only honour its first occurrence.
+
+    Args:
+        value (str): The header value.
+
+    Returns:
+        tuple: One tuple of (directive, sources) pairs per non-empty policy, where sources
+               is a tuple of the source expressions in their original order.
+    """
+    policies = []
+    for text in value.split(","):
+        directives = tuple(
+            (tokens[0].lower(), tuple(tokens[1:])) for tokens in (part.split() for part in text.split(";")) if tokens
+        )
+        if directives:
+            policies.append(directives)
+    return tuple(policies)
+
+
+def _directives(policy):
+    """Maps each directive of a policy to its sources, keeping the first occurrence like browsers do."""
+    directives = {}
+    for name, sources in policy:
+        directives.setdefault(name, sources)
+    return directives
+
+
+def analyze_policy(value):
+    """
+    Parses and analyses a Content-Security-Policy header value without caching.
+
+    When the header holds several policies a browser enforces all of them, so a
+    weakness is only reported if every policy has it.
+
+    Args:
+        value (str): The header value.
+
+    Returns:
+        CspAnalysis: The analysis of the value.
+    """
+    policies = parse_policy(value)
+    # An empty header restricts nothing, exactly like a policy without directives.
+    findings = [_check(policy) for policy in policies or ((),)]
+    shared = set.intersection(*({(directive, issue) for _, directive, issue in found} for found in findings))
+    kept = [finding for finding in findings[0] if (finding[1], finding[2]) in shared]
+    kept.sort(key=lambda finding: -PENALTIES[finding[0]])
+    return CspAnalysis(policies, tuple(kept))
+
+
+def _check(policy):
+    """Returns the (severity, directive, issue) findings of a single policy."""
+    directives = _directives(policy)
+    findings = []
+
+    seen = set()
+    for name, _ in policy:
+        if name in seen:
+            findings.append(("low", name, "Repeated directive; browsers ignore every occurrence but the first."))
+            continue
+        seen.add(name)
+        if name in DEPRECATED_DIRECTIVES:
+            findings.append(("low", name, "Deprecated directive."))
+        elif name not in FETCH_DIRECTIVES and name not in OTHER_DIRECTIVES:
+            findings.append(("low", name, "Unknown directive."))
+
+    script_directive = "script-src" if "script-src" in directives else "default-src"
+    script_sources = directives.get(script_directive)
+    if script_sources is None:
+        findings.append(("high", "script-src", "Neither script-src nor default-src is set, so any script may run."))
+    else:
+        findings.extend(_check_scripts(script_directive, script_sources))
+
+    object_directive = "object-src" if "object-src" in directives else "default-src"
+    if directives.get(object_directive, ()) != ("'none'",):
+        findings.append(("medium", "object-src", "object-src is not 'none', so plugins may load content."))
+    if "base-uri" not in directives:
+        findings.append(("medium", "base-uri", "base-uri is not set, so injected <base> tags can redirect relative URLs."))
+    if "frame-ancestors" not in directives:
+        findings.append(("low", "frame-ancestors", "frame-ancestors is not set, so the page may be framed."))
+    if "form-action" not in directives:
+        findings.append(("low", "form-action", "form-action is not set, so forms may post anywhere."))
+
+    for name, sources in directives.items():
+        if name in FETCH_DIRECTIVES and name not in SCRIPT_DIRECTIVES and name != script_directive:
+            if "*" in sources:
+                findings.append(("medium", name, "Wildcard source '*' allows any host."))
+        for source in sources:
+            lowered = source.lower()
+            if lowered.startswith("http://") or (lowered == "http:" and name != script_directive):
+                findings.append(("medium", name, f"Source {source} allows loading over plain HTTP."))
+    return findings
+
+
+def _check_scripts(directive, sources):
+    """Returns the findings about the sources scripts may be loaded from."""
+    lowered = [source.lower() for source in sources]
+    findings = []
+    # A nonce, a hash or 'strict-dynamic' makes CSP Level 2 browsers ignore 'unsafe-inline'.
+    guarded = any(source.startswith(("'nonce-", "'sha256-", "'sha384-", "'sha512-")) for source in lowered)
+    guarded = guarded or "'strict-dynamic'" in lowered
+    if "'unsafe-inline'" in lowered and not guarded:
+        findings.append(("high", directive, "'unsafe-inline' allows inline scripts, defeating XSS protection."))
+    if "'unsafe-eval'" in lowered:
+        findings.append(("medium", directive, "'unsafe-eval' allows eval() and similar string-to-code functions."))
+    if "*" in lowered:
+        findings.append(("high", directive, "Wildcard source '*' allows scripts from any host."))
+    for scheme in ("https:", "http:", "data:", "blob:"):
+        if scheme in lowered:
+            findings.append(("high", directive, f"Scheme source {scheme} allows scripts from any such URL."))
+    return findings
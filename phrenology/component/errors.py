@@ -0,0 +1,42 @@
+"""
+The failures a target can end with, tagged by kind for the failure metrics.
+"""
+
+# Kinds of failure, the values of the error label of phrenology_targets_failed_total.
+FAILURE_KINDS = ("dns", "connect", "tls", "timeout", "invalid_url", "other")
+
+
+class RequestFailed(RuntimeError):
+    """
+    Raised when the request for a target fails.
+
+    It subclasses RuntimeError so callers that already handle request failures
+    keep working; the kind tells what failed without parsing the message.
+
+    Attributes:
+        kind (str): One of FAILURE_KINDS.
+    """
+
+    kind = "other"
+
+    def __init__(self, message, kind=None):
+        super().__init__(message)
+        if kind is not None:
+            self.kind = kind
+
+
+def failure_kind(error):
+    """
+    Returns the kind of failure an exception raised while fetching a target reports.
+
+    Args:
+        error (Exception): The exception that ended the fetch.
+
+    Returns:
+        str: One of FAILURE_KINDS.
+    """
+    if isinstance(error, RequestFailed):
+        return error.kind
+    if isinstance(error, ValueError):
+        return "invalid_url"
+    return "other"
@@ -0,0 +1,377 @@
+"""
+Grading of security header values against the OWASP recommended values.
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+from .csp import CspAnalyzer
+
+# Severities of the findings, worst first.
+SEVERITIES = ("high", "medium", "low")
+
+# Rating of a value by its worst finding.
+RATINGS = {None: "good", "low": "weak", "medium": "weak", "high": "bad"}
+
+# HSTS lifetimes shorter than this are too short to protect returning visitors.
+HSTS_MINIMUM_AGE = 31536000
+
+
+class Grade:
+    """
+    The grade of one header value.
+
+    Grades are shared by every response carrying the same value, so they are
+    immutable; as_dict() builds a fresh copy for rendering.
+
+    Attributes:
+        header (str): The graded header.
+        recommended (str): The OWASP recommended value.
+        findings (tuple): (severity, issue) pairs, most severe first.
+        rating (str): "good" without findings, "weak" when the worst finding is low or
+                      medium, and "bad" when one is high.
+        detail (dict): Further results of the check rendered with the grade, such as the
+                       score and directives of a Content-Security-Policy, or None.
+    """
+
+    __slots__ = ("header", "recommended", "findings", "rating", "detail")
+
+    def __init__(self, header, recommended, findings, detail=None):
+        self.header = header
+        self.recommended = recommended
+        self.findings = tuple(sorted(findings, key=lambda finding: SEVERITIES.index(finding[0])))
+        self.rating = RATINGS[self.findings[0][0] if self.findings else None]
+        self.detail = detail
+
+    def as_dict(self):
+        """
+        Returns the grade as plain data, as rendered by the output templates.
+
+        Returns:
+            dict: The rating, the recommended value and the findings, updated with the detail.
+        """
+        data = {
+            "rating": self.rating,
+            "recommended": self.recommended,
+            "findings": [{"severity": severity, "issue": issue} for severity, issue in self.findings],
+        }
+        if self.detail is not None:
+            data.update(self.detail)
+        return data
+
+
+class Grader:
+    """
+    A thread-safe grader of header values with a bounded LRU cache.
+
+    One check per header is compiled up front from the recommended values, and
+    grades are memoized by (header, value): the values of security headers repeat
+    heavily across a fleet, so most responses are graded with lookups only. The
+    cache holds at most `maxsize` grades and evicts the least recently used first.
+
+    Attributes:
+        csp_analyzer (CspAnalyzer): The analyzer the Content-Security-Policy check runs on.
+        hits (int): Number of grades answered from the cache.
+        misses (int): Number of values run through their check.
+    """
+
+    def __init__(self, recommended=None, maxsize=4096, csp_analyzer=None):
+        """
+        Compiles the checks and initializes an empty cache.
+
+        Args:
+            recommended (dict, optional): Header names mapped to OWASP entries carrying a
+                                          "recommended" value. Defaults to the expected
+                                          security responses of the OWASP dictionary.
+            maxsize (int): Maximum number of grades kept in the cache.
+            csp_analyzer (CspAnalyzer, optional): The analyzer to share with the rest of the
+                                                  run. A new one is created when omitted.
+        """
+        if recommended is None:
+            from .. import registry  # pylint: disable=import-outside-toplevel
+
+            recommended = registry.owasp_header_dictionary.expected_security_responses
+        self.maxsize = maxsize
+        self.csp_analyzer = csp_analyzer if csp_analyzer is not None else CspAnalyzer()
+        validators = dict(VALIDATORS, **{"Content-Security-Policy": _content_security_policy(self.csp_analyzer)})
+        self._checks = {}
+        for name, entry in recommended.items():
+            factory = validators.get(name)
+            if factory is not None:
+                self._checks[name.lower()] = (name, entry["recommended"], factory(entry["recommended"]))
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def grade(self, header, value):
+        """
+        Grades one header value, answering from the cache when possible.
+
+        Args:
+            header (str): The header name, in any casing.
+            value (str): The header value.
+
+        Returns:
+            Grade: The grade of the value, or None when there is no check for the header.
+        """
+        key = (header.lower(), value)
+        compiled = self._checks.get(key[0])
+        if compiled is None:
+            return None
+        with self._lock:
+            grade = self._cache.get(key)
+            if grade is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return grade
+            self.misses += 1
+
+        name, recommended, check = compiled
+        result = check(value)
+        # A check returns its findings, optionally paired with details rendered next to them.
+        findings, detail = result if isinstance(result, tuple) else (result, None)
+        grade = Grade(name, recommended, findings, detail)
+        with self._lock:
+            self._cache[key] = grade
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return grade
+
+    def grade_model(self, headers_model):
+        """
+        Grades every header of a response that has a check.
+
+        Args:
+            headers_model (HeaderModel): The response headers.
+
+        Returns:
+            dict: Graded header names, as named in the registry, mapped to their Grade.
+        """
+        return self.grade_batch([headers_model])[0]
+
+    def grade_batch(self, headers_models):
+        """
+        Grades the headers of many responses, checking each distinct value only once.
+
+        Args:
+            headers_models (list): The HeaderModel of every response.
+
+        Returns:
+            list: One dict per response, as returned by grade_model().
+        """
+        responses = []
+        for headers_model in headers_models:
+            values = {}
+            for name, _, _ in self._checks.values():
+                value = headers_model.read(name)
+                if value is not None:
+                    values[name] = value
+            responses.append(values)
+
+        grades = {}
+        for pair in {pair for values in responses for pair in values.items()}:
+            grades[pair] = self.grade(*pair)
+        return [{name: grades[(name, value)] for name, value in values.items()} for values in responses]
+
+    def snapshot(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The number of hits, misses and cached grades.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache)}
+
+
+def _tokens(value):
+    """Splits a list-valued header into its lowercase, stripped entries."""
+    return [token.strip().lower() for token in re.split(r"[,;]", value) if token.strip()]
+
+
+def _one_of(accepted):
+    """
+    Builds a check for a header taking a single keyword.
+
+    Args:
+        accepted (dict): Valid keywords other than the recommended one, mapped to the
+                         severity of using them.
+
+    Returns:
+        callable: A function compiling the check from the recommended keyword.
+    """
+
+    def factory(recommended):
+        best = recommended.lower()
+
+        def check(value):
+            keyword = value.strip().lower()
+            if keyword == best:
+                return []
+            # Keywords such as ALLOW-FROM take an argument.
+            if keyword.split(" ", 1)[0] in accepted:
+                severity = accepted[keyword.split(" ", 1)[0]]
+                return [(severity, f"'{value.strip()}' is weaker than the recommended '{recommended}'.")]
+            return [("high", f"'{value.strip()}' is not a valid value; browsers ignore it.")]
+
+        return check
+
+    return factory
+
+
+def _strict_transport_security(recommended):
+    """Builds the HSTS check from the recommended max-age and includeSubDomains."""
+    match = re.search(r"max-age=(\d+)", recommended, re.IGNORECASE)
+    minimum_age = int(match.group(1)) if match else HSTS_MINIMUM_AGE
+    subdomains = "includesubdomains" in recommended.lower()
+
+    def check(value):
+        directives = _tokens(value)
+        ages = [directive.split("=", 1)[1].strip('"') for directive in directives if directive.startswith("max-age=")]
+        if not ages or not ages[0].isdigit():
+            return [("high", "max-age is missing or invalid, so browsers ignore the header.")]
+        age = int(ages[0])
+        findings = []
+        if age == 0:
+            findings.append(("high", "max-age=0 tells browsers to forget the HSTS policy."))
+        elif age < HSTS_MINIMUM_AGE:
+            findings.append(("medium", f"max-age={age} is shorter than one year."))
+        elif age < minimum_age:
+            findings.append(("low", f"max-age={age} is shorter than the recommended {minimum_age}."))
+        if subdomains and "includesubdomains" not in directives:
+            findings.append(("medium", "includeSubDomains is missing, so subdomains can still be reached over HTTP."))
+        return findings
+
+    return check
+
+
+def _referrer_policy(recommended):
+    """Builds a check ranking referrer policies by how much they leak."""
+    strong = {"no-referrer", "same-origin", "strict-origin", "strict-origin-when-cross-origin"}
+    leaky = {"origin", "origin-when-cross-origin", "no-referrer-when-downgrade"}
+    best = recommended.lower()
+
+    def check(value):
+        # Browsers use the last policy they understand, so a list can carry fallbacks.
+        known = [policy for policy in _tokens(value) if policy in strong or policy in leaky or policy == "unsafe-url"]
+        if not known:
+            return [("high", f"'{value.strip()}' is not a valid referrer policy; browsers ignore it.")]
+        policy = known[-1]
+        if policy == best:
+            return []
+        if policy in strong:
+            return [("low", f"'{policy}' is weaker than the recommended '{recommended}'.")]
+        if policy in leaky:
+            return [("medium", f"'{policy}' sends the origin or full URL to other sites.")]
+        return [("high", "'unsafe-url' sends the full URL, query string included, to every site.")]
+
+    return check
+
+
+def _permissions_policy(recommended):
+    """Builds a check for the features the recommended policy denies."""
+    denied = {
+        feature.strip().lower() for feature, allowlist in re.findall(r"([\w-]+)=(\([^)]*\))", recommended) if allowlist == "()"
+    }
+
+    def check(value):
+        features = dict(re.findall(r"([\w-]+)=(\*|\([^)]*\))", value.lower()))
+        findings = [("medium", f"{feature} is allowed for every origin.") for feature, allowlist in features.items() if allowlist == "*"]
+        unrestricted = sorted(denied - set(features))
+        if unrestricted:
+            findings.append(("low", f"{len(unrestricted)} recommended features are not restricted: {', '.join(unrestricted)}."))
+        return findings
+
+    return check
+
+
+def _required_tokens(severity, describe):
+    """Builds a check requiring every attribute or keyword of the recommended value."""
+
+    def factory(recommended):
+        required = [token for token in _tokens(recommended) if "=" not in token]
+
+        def check(value):
+            if '"*"' in value:
+                return []
+            present = " ".join(_tokens(value))
+            return [(severity, describe(token)) for token in required if token.strip('"') not in present]
+
+        return check
+
+    return factory
+
+
+def _content_type(recommended):
+    """Builds a check that HTML declares its charset."""
+    def check(value):
+        lowered = value.lower()
+        if lowered.startswith("text/html") and "charset=" not in lowered:
+            return [("low", "No charset is declared, which leaves room for encoding-based XSS.")]
+        return []
+
+    return check
+
+
+def _access_control_allow_origin(recommended):
+    """Builds a check for origins that open the response to every site."""
+    def check(value):
+        origin = value.strip().lower()
+        if origin == "*":
+            return [("medium", "Any origin may read the response; never use * on authenticated endpoints.")]
+        if origin == "null":
+            return [("high", "The 'null' origin can be forged by sandboxed documents.")]
+        return []
+
+    return check
+
+
+def _content_security_policy(analyzer):
+    """
+    Builds the CSP check on an analyzer, so each policy is analysed once per run.
+
+    Args:
+        analyzer (CspAnalyzer): The memoizing analyzer shared with the rest of the run.
+
+    Returns:
+        callable: A function compiling the check from the recommended value.
+    """
+
+    def factory(recommended):
+        def check(value):
+            analysis = analyzer.analyze(value)
+            findings = [
+                (severity, f"{directive}: {issue}" if directive else issue)
+                for severity, directive, issue in analysis.findings
+            ]
+            return findings, analysis.as_dict()
+
+        return check
+
+    return factory
+
+
+# Header names mapped to a function compiling their check from the recommended value. The
+# Content-Security-Policy check is added by each Grader, on its own analyzer.
+VALIDATORS = {
+    "Strict-Transport-Security": _strict_transport_security,
+    "X-Content-Type-Options": _one_of({}),
+    "X-Frame-Options": _one_of({"sameorigin": "low", "allow-from": "medium"}),
+    "Referrer-Policy": _referrer_policy,
+    "Cross-Origin-Opener-Policy": _one_of({"same-origin-allow-popups": "low", "noopener-allow-popups": "low", "unsafe-none": "medium"}),
+    "Cross-Origin-Embedder-Policy": _one_of({"credentialless": "low", "unsafe-none": "medium"}),
+    "Cross-Origin-Resource-Policy": _one_of({"same-site": "low", "cross-origin": "medium"}),
+    "X-Permitted-Cross-Domain-Policies": _one_of(
+        {"master-only": "low", "by-content-type": "medium", "by-ftp-filename": "medium", "all": "high"}
+    ),
+    "X-DNS-Prefetch-Control": _one_of({"on": "low"}),
+    "Permissions-Policy": _permissions_policy,
+    "Content-Type": _content_type,
+    "Set-Cookie": _required_tokens("medium", lambda token: f"Cookies are set without the {token} attribute."),
+    "Cache-Control": _required_tokens("low", lambda token: f"{token} is missing, so sensitive pages may be cached."),
+    "Clear-Site-Data": _required_tokens("low", lambda token: f"{token} is not cleared."),
+    "Access-Control-Allow-Origin": _access_control_allow_origin,
+}
@@ -1,11 +1,27 @@
+import base64
+import contextlib
+import functools
+import io
 import re
 import socket
-from urllib.parse import urlparse
+import ssl
+import sys
+from http.client import parse_headers
+from urllib.parse import urlencode, urljoin, urlparse
 
 import requests
 import urllib3
 
-from requests.exceptions import HTTPError, Timeout, RequestException
+from requests.exceptions import ConnectionError as RequestConnectionError
+from requests.exceptions import HTTPError, InvalidURL, MissingSchema, RequestException, SSLError, Timeout
+
+from ..common.targets import normalize_url
+from ..registry.headers import CATEGORIES, CATEGORY_MASKS, HEADER_BITS
+from . import timing
+from .errors import RequestFailed
+from .resolver import Resolver
+from .session import pinned, watched
+from .timeout import TargetTimeout, Watch
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -18,38 +34,65 @@ class HeaderModel:
     retrieved from an HTTP response. It provides methods to read
     individual headers and query expected headers to determine
     which ones exist, do not exist, and which additional headers
-    are present.
+    are present. Header names are matched case-insensitively, as
+    HTTP requires.
+
+    Models are kept compact so large result sets stay small: header names are
+    interned and shared by every model, each value is stored once, and the
+    registry headers present are recorded as a bitmask. Each model indexes its
+    headers by lowercase name once, and every query resolves its headers against
+    that index once, so the expected, missing and present views are built from
+    the resolved query without searching the response again.
 
     Attributes:
-        _headers (dict): The dictionary of headers.
         expected (dict): Headers that are expected and exist.
         missing (dict): Headers that are expected but do not exist.
         present (dict): Headers that are not expected but exist.
+        bytes_received (int): Approximate bytes read from the server for this response, or None if unknown.
+        timing (PhaseTiming): Time spent in each phase of the scan, or None when timing is disabled.
     """
 
-    def __init__(self, headers_dict):
+    __slots__ = ("_names", "_index", "_values", "_mask", "_selection", "bytes_received", "timing")
+
+    def __init__(self, headers_dict, bytes_received=None):
         """
         Initializes the HeaderModel with a dictionary of headers.
 
         Args:
-            headers_dict (dict): The dictionary of HTTP headers.
-        """
-        self._headers = headers_dict
-        self.expected = {}
-        self.missing = {}
-        self.present = {}
+            headers_dict (dict): The dictionary of HTTP headers. When several names differ
+                                 only by case, the first one is kept.
+            bytes_received (int, optional): Approximate bytes read from the server.
+        """
+        names, values, index = [], [], {}
+        mask = 0
+        for name, value in headers_dict.items():
+            key = sys.intern(name.lower())
+            if key in index:
+                continue
+            index[key] = len(names)
+            names.append(sys.intern(name))
+            values.append(value)
+            mask |= HEADER_BITS.get(key, 0)
+        self._names = tuple(names)
+        self._index = index
+        self._values = tuple(values)
+        self._mask = mask
+        self._selection = ()
+        self.bytes_received = bytes_received
+        self.timing = None
 
     def read(self, item):
         """
         Reads the value of a specified header.
 
         Args:
-            item (str): The header to retrieve.
+            item (str): The header to retrieve, in any casing.
 
         Returns:
             str: The value of the specified header, or None if not found.
         """
-        return self._headers.get(item)
+        position = self._index.get(item.lower())
+        return None if position is None else self._values[position]
 
     def query(self, expected):
         """
@@ -62,28 +105,61 @@ class HeaderModel:
             dict: A dictionary containing the counts of existing, non-existing,
                   and additional headers.
         """
-        self.expected = {}
-        self.missing = {}
-        self.present = {}
+        self._selection = self._resolve(expected)
+        found = sum(1 for _, position in self._selection if position is not None)
+        return self._counts(found)
 
-        for key in expected:
-            if key in self._headers:
-                self.expected[key] = self._headers[key]
-            else:
-                self.missing[key] = None
+    def select(self, category):
+        """
+        Categorizes the headers against one registry category, like query() does.
+
+        The counts come straight from the presence bitmask, without looking at the
+        response headers again.
+
+        Args:
+            category (str): The registry category key, e.g. "expected" or "cache".
+
+        Returns:
+            dict: A dictionary containing the counts of existing, non-existing,
+                  and additional headers.
+        """
+        self._selection = self._resolve(CATEGORIES[category]["items"])
+        return self._counts((self._mask & CATEGORY_MASKS[category]).bit_count())
+
+    @property
+    def expected(self):
+        """Headers of the last query that exist, keyed by their queried name."""
+        return {name: self._values[position] for name, position in self._selection if position is not None}
+
+    @property
+    def missing(self):
+        """Headers of the last query that do not exist."""
+        return {name: None for name, position in self._selection if position is None}
+
+    @property
+    def present(self):
+        """Headers that exist but were not part of the last query, keyed by their response name."""
+        queried = {position for _, position in self._selection}
+        return {
+            name: value
+            for position, (name, value) in enumerate(zip(self._names, self._values))
+            if position not in queried
+        }
 
-        for key in self._headers:
-            if key not in expected:
-                self.present[key] = self._headers[key]
+    def _resolve(self, names):
+        """Pairs every queried header with its position in the response, or None when absent."""
+        index = self._index
+        return tuple((name, index.get(name.lower())) for name in names)
 
-        counts = {
+    def _counts(self, found):
+        """Returns the counts of a query that found `found` of the selected headers."""
+        return {
             "counts": {
-                "expected": len(self.expected),
-                "missing": len(self.missing),
-                "present": len(self.present),
+                "expected": found,
+                "missing": len(self._selection) - found,
+                "present": len(self._names) - found,
             }
         }
-        return counts
 
 
 class HeaderService:
@@ -96,24 +172,49 @@ class HeaderService:
     parameters while abstracting operations that may be needed
     to make things work correctly.
 
+    Responses are always streamed: only the status line and headers are read, and
+    the body is either drained when it is known to be small (so the connection can
+    be reused) or dropped together with the connection.
+
     Attributes:
         _method (str): The HTTP method to use for the request.
         _config (dict): Configuration parameters for the request.
         session (requests.Session): The requests session used to make HTTP requests.
+        resolver (Resolver): The DNS cache used for the pre-flight hostname check.
+        scheduler (HostScheduler): Per-host politeness limits, or None to send immediately.
+        metrics (Metrics): Registry counting in-flight requests and bytes received, or None.
+        watchdog (Watchdog): Shuts down the connections of a target exceeding total_timeout, or None.
+        total_timeout (float): Maximum seconds for the whole target, or None for no limit.
+        drain_limit (int): Largest body, in bytes, that is read to keep the connection reusable.
     """
 
-    def __init__(self, config=None):
+    drain_limit = 16 * 1024
+
+    def __init__(self, config=None, session=None, resolver=None, scheduler=None, metrics=None, watchdog=None):
         """
         Initializes the HeaderService with a configuration dictionary.
 
         Args:
             config (dict): A dictionary containing configuration parameters.
                            Must include the 'method' key.
+            session (requests.Session, optional): A session to share with other services so
+                           pooled connections are reused. A new session is created when omitted.
+            resolver (Resolver, optional): A DNS cache to share with other services. A new
+                           one is created when omitted.
+            scheduler (HostScheduler, optional): Politeness limits applied before each request.
+            metrics (Metrics, optional): Registry counting in-flight requests and bytes received.
+            watchdog (Watchdog, optional): Enforces total_timeout on the connections of the target.
+                           Without one only the connect and read timeouts apply.
 
         Raises:
             ValueError: If 'method' is not included in the configuration.
         """
-        self.session = requests.Session()
+        self.session = session if session is not None else requests.Session()
+        self.resolver = resolver if resolver is not None else Resolver()
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.watchdog = watchdog
+        self.total_timeout = None
         self._method = ""
         self._url = ""
         self._config = {}
@@ -509,7 +610,8 @@ class HeaderService:
         and validation can be handled manually. This approach provides more control over the parsing
         process and allows for custom validation logic. However, it is important to note that using
         standard libraries like `urllib` can simplify the code and provide robust handling of edge cases
-        in real-world applications.
+        in real-world applications. The steps are shared with the rest of the scan through
+        common.targets.normalize_url(), so results are keyed by the same URL wherever they are reported.
 
         Args:
             value (str): The URL to be set.
@@ -517,64 +619,7 @@ class HeaderService:
         Raises:
             ValueError: If the URL is invalid or contains unsupported protocols.
         """
-        # Check for invalid protocols
-        invalid_protocols = ["ftp://", "mailto:", "file://"]
-        for protocol in invalid_protocols:
-            if value.startswith(protocol):
-                raise ValueError(
-                    f"Invalid URL input: {protocol.strip(':')} protocol does not return headers."
-                )
-        # Ensure the URL starts with http or https
-        if not value.startswith(("http://", "https://")):
-            value = f"https://{value}"
-        # Extract the scheme and the rest of the URL
-        if "://" in value:
-            scheme, rest = value.split("://", 1)
-        else:
-            scheme, rest = "https", value
-        # Check for presence of '/' or '?'
-        if "/" in rest:
-            netloc, path_query = rest.split("/", 1)
-            path_query = "/" + path_query
-        elif "?" in rest:
-            netloc, path_query = rest.split("?", 1)
-            path_query = "?" + path_query
-        else:
-            netloc, path_query = rest, ""
-        # Further split path and query
-        if "?" in path_query:
-            path, query = path_query.split("?", 1)
-        else:
-            path, query = path_query, ""
-        # Validate the netloc
-        if (
-            not netloc
-            or "." not in netloc
-            or ".." in netloc
-            or netloc.startswith(".")
-            or netloc.endswith(".")
-        ):
-            raise ValueError(
-                "Invalid URL input: your url is malformed please check it and try again."
-            )
-        # Validate the IP address
-        if all(char.isdigit() or char == "." for char in netloc):
-            octets = netloc.split(".")
-            if len(octets) != 4:
-                raise ValueError("Invalid URL input: dude seriously?")
-            for octet in octets:
-                if not (0 <= int(octet) <= 255):
-                    raise ValueError("Invalid URL input: dude seriously?")
-        # Final check for invalid characters
-        if " " in value:
-            raise ValueError("Invalid URL format")
-        # Rebuild the URL
-        final_url = f"{scheme}://{netloc}"
-        if path:
-            final_url += path
-        if query:
-            final_url += f"?{query}"
-        self._url = final_url
+        self._url = normalize_url(value)
 
     def _handle_response(self, response):
         """
@@ -606,7 +651,48 @@ class HeaderService:
             HeaderModel: The model containing the response headers.
         """
         headers_dict = dict(response.headers)
-        return HeaderModel(headers_dict)
+        return self._count_received(HeaderModel(headers_dict, self._finish_response(response)))
+
+    def _in_flight(self):
+        """Returns a context manager counting the request as in flight while it runs."""
+        if self.metrics is None:
+            return contextlib.nullcontext()
+        return _InFlight(self.metrics)
+
+    def _count_received(self, headers_model):
+        """Adds the bytes received for a response to the metrics and returns the model."""
+        if self.metrics is not None and headers_model.bytes_received:
+            self.metrics.inc("phrenology_bytes_received_total", headers_model.bytes_received)
+        return headers_model
+
+    def _finish_response(self, response):
+        """
+        Releases a streamed response without downloading a large body.
+
+        A body that is absent or declared no larger than drain_limit is read so the
+        connection goes back to the pool; anything else is dropped by closing the
+        connection.
+
+        Args:
+            response (requests.Response): The streamed HTTP response.
+
+        Returns:
+            int: Approximate bytes received, counting the status line, headers and any drained body.
+        """
+        received = len(f"HTTP/1.1 {response.status_code} {response.reason}\r\n\r\n")
+        received += sum(len(key) + len(value) + 4 for key, value in response.headers.items())
+        length = response.headers.get("Content-Length", "")
+        bodyless = self.method == "HEAD" or response.status_code in (204, 304)
+        if bodyless or (length.isdigit() and int(length) <= self.drain_limit):
+            try:
+                received += len(response.raw.read(decode_content=False) or b"")
+            except (RequestException, OSError, urllib3.exceptions.HTTPError):
+                response.close()
+                return received
+            response.raw.release_conn()
+        else:
+            response.close()
+        return received
 
     def run_request(self):
         """
@@ -619,25 +705,316 @@ class HeaderService:
             HeaderModel: The model containing the response headers.
 
         Raises:
+            TargetTimeout: If the server does not answer within the configured timeouts or the
+                           whole target takes longer than total_timeout.
             RuntimeError: If an error occurs during the request.
         """
         hostname = urlparse(self.url).hostname
         if not hostname:
-            raise RuntimeError(
-                f"Could not determine hostname from URL '{self.url}'. Check for typos and try again."
+            raise RequestFailed(
+                f"Could not determine hostname from URL '{self.url}'. Check for typos and try again.",
+                "invalid_url",
             )
         try:
-            socket.gethostbyname(hostname)
+            with timing.measure("dns"):
+                address = self.resolver.resolve(hostname)
         except socket.gaierror:
-            raise RuntimeError(
-                f"Could not resolve '{hostname}'. Check the URL for typos and confirm the domain exists."
+            raise RequestFailed(
+                f"Could not resolve '{hostname}'. Check the URL for typos and confirm the domain exists.",
+                "dns",
             )
 
         config = self.config
+        config["stream"] = True
+        slot = self.scheduler.slot(hostname, address) if self.scheduler else contextlib.nullcontext()
+        watch = self.watchdog.watch(self.total_timeout) if self.watchdog is not None else Watch()
         try:
-            response = self.session.request(self.method, self.url, **config)
-            self._handle_response(response)
-            response_headers = self._handle_headers(response)
-            return response_headers
+            # The address resolved above is handed to the connection, so the host is looked up once.
+            with slot, self._in_flight(), pinned(hostname, address), watch, watched(watch):
+                response = self.session.request(self.method, self.url, **config)
+                try:
+                    self._handle_response(response)
+                except RuntimeError:
+                    response.close()
+                    raise
+                response_headers = self._handle_headers(response)
+        except Timeout as e:
+            raise TargetTimeout(f"Timeout error occurred: {e}")
         except RequestException as e:
+            if not watch.expired:
+                raise RequestFailed(f"An error occurred: {e}", _request_failure_kind(e))
+        # A head cut short by the watchdog can parse as complete, so it is never trusted.
+        if watch.expired:
+            raise TargetTimeout(
+                f"Timeout error occurred: {self.url} did not answer within {watch.seconds:g} seconds"
+            )
+        return response_headers
+
+
+class AsyncHeaderService(HeaderService):
+    """
+    An asyncio counterpart to HeaderService.
+
+    The configuration and URL validation are inherited unchanged from HeaderService, but
+    run_request is a coroutine that speaks HTTP/1.1 directly over asyncio streams, so
+    thousands of targets can be scanned from a single event loop without a thread per
+    request. Only the response head is read; the connection is closed as soon as the
+    headers have arrived. Hostnames are looked up through the same Resolver as
+    HeaderService, and connections with the same verify and cert settings share one
+    SSL context. Proxies are not supported by this service.
+    """
+
+    max_redirects = 30
+    header_limit = 2**18
+
+    def _build_request(self, parsed, target):
+        """
+        Builds the raw request head for the provided target.
+
+        Args:
+            parsed (ParseResult): The parsed URL.
+            target (str): The request target (path and query).
+
+        Returns:
+            bytes: The encoded request head.
+        """
+        headers = {
+            "Host": parsed.netloc.rsplit("@", 1)[-1],
+            "User-Agent": "phrenology",
+            "Accept": "*/*",
+            "Connection": "close",
+        }
+        if self.auth:
+            user, password = self.auth
+            token = base64.b64encode(f"{user}:{password}".encode("latin-1")).decode("ascii")
+            headers["Authorization"] = f"Basic {token}"
+        headers.update(self.headers or {})
+        lines = [f"{self.method} {target} HTTP/1.1"]
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _fetch_head(self, url):
+        """
+        Sends one request and reads the response head.
+
+        Args:
+            url (str): The URL to send the request to.
+
+        Returns:
+            tuple: The status code, reason phrase, headers dictionary and size of the head in bytes.
+
+        Raises:
+            RuntimeError: If the connection or the read fails or times out.
+        """
+        # asyncio is imported here so the threads engine never pays for loading it.
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        parsed = urlparse(url)
+        hostname = parsed.hostname
+        if not hostname:
+            raise RequestFailed(
+                f"Could not determine hostname from URL '{url}'. Check for typos and try again.",
+                "invalid_url",
+            )
+        secure = parsed.scheme == "https"
+        # A certificate pair read from a JSON config is a list, which cannot key the context cache.
+        cert = tuple(self.cert) if isinstance(self.cert, list) else self.cert
+        port = parsed.port or (443 if secure else 80)
+        target = parsed.path or "/"
+        query = "&".join(part for part in (parsed.query, urlencode(self.params or {})) if part)
+        if query:
+            target += f"?{query}"
+
+        connect_timeout, read_timeout = _split_timeout(self.timeout)
+        try:
+            # Lookups go through the shared DNS cache; a miss blocks, so it runs off the loop.
+            with timing.measure("dns"):
+                address = await asyncio.get_running_loop().run_in_executor(None, self.resolver.resolve, hostname)
+        except socket.gaierror:
+            raise RequestFailed(
+                f"Could not resolve '{hostname}'. Check the URL for typos and confirm the domain exists.",
+                "dns",
+            )
+        try:
+            # The event loop connects and completes TLS in one step, so both are recorded
+            # as the connect phase.
+            with timing.measure("connect"):
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(
+                        address,
+                        port,
+                        ssl=_ssl_context(self.verify, cert) if secure else None,
+                        server_hostname=hostname if secure else None,
+                        limit=self.header_limit,
+                    ),
+                    connect_timeout,
+                )
+        except asyncio.TimeoutError:
+            raise TargetTimeout(f"Timeout error occurred: connecting to {hostname} timed out")
+        except ssl.SSLError as e:
+            raise RequestFailed(f"An error occurred: {e}", "tls")
+        except OSError as e:
+            raise RequestFailed(f"An error occurred: {e}", "connect")
+
+        try:
+            with timing.measure("ttfb"):
+                writer.write(self._build_request(parsed, target))
+                await writer.drain()
+                head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), read_timeout)
+        except asyncio.TimeoutError:
+            raise TargetTimeout(f"Timeout error occurred: reading from {hostname} timed out")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, OSError) as e:
             raise RuntimeError(f"An error occurred: {e}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (OSError, ssl.SSLError):
+                pass
+
+        return (*_parse_head(head), len(head))
+
+    async def run_request(self):
+        """
+        Executes the HTTP request and processes the response headers.
+
+        Returns:
+            HeaderModel: The model containing the response headers.
+
+        Raises:
+            RuntimeError: If an error occurs during the request.
+        """
+        url = self.url
+        for _ in range(self.max_redirects + 1):
+            with self._in_flight():
+                status, reason, headers, received = await self._fetch_head(url)
+            location = _lookup(headers, "Location")
+            if self.allow_redirects and status in (301, 302, 303, 307, 308) and location:
+                url = urljoin(url, location)
+                continue
+            if status >= 400:
+                kind = "Client" if status < 500 else "Server"
+                raise RuntimeError(
+                    f"HTTP error occurred: {status} {kind} Error: {reason} for url: {url}"
+                )
+            return self._count_received(HeaderModel(headers, received))
+        raise RuntimeError(f"An error occurred: Exceeded {self.max_redirects} redirects.")
+
+
+class _InFlight:
+    """Keeps the in-flight request gauge up while a request runs."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+
+    def __enter__(self):
+        self.metrics.inc("phrenology_requests_in_flight")
+
+    def __exit__(self, *exc):
+        self.metrics.dec("phrenology_requests_in_flight")
+
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context(verify, cert):
+    """
+    Builds the SSL context matching the verify and cert settings.
+
+    Loading the CA bundle is expensive, so one context is built per combination of
+    settings and shared by every connection that uses it.
+
+    Args:
+        verify (bool or str): Whether to verify certificates, or the path of a CA bundle.
+        cert (None, str or tuple): A client certificate, or a (certificate, key) pair.
+
+    Returns:
+        ssl.SSLContext: The context used for https targets.
+    """
+    if isinstance(verify, str):
+        context = ssl.create_default_context(cafile=verify)
+    else:
+        context = ssl.create_default_context()
+        if verify is False:
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+    if isinstance(cert, tuple):
+        context.load_cert_chain(cert[0], cert[1])
+    elif cert:
+        context.load_cert_chain(cert)
+    return context
+
+
+def _request_failure_kind(error):
+    """
+    Returns the kind of failure a requests exception reports.
+
+    Args:
+        error (RequestException): The exception raised by the session.
+
+    Returns:
+        str: One of errors.FAILURE_KINDS.
+    """
+    if isinstance(error, SSLError):
+        return "tls"
+    if isinstance(error, RequestConnectionError):
+        return "connect"
+    if isinstance(error, (InvalidURL, MissingSchema)):
+        return "invalid_url"
+    return "other"
+
+
+def _split_timeout(timeout):
+    """
+    Splits a requests style timeout into connect and read values.
+
+    Args:
+        timeout (None, int, float or tuple): The configured timeout.
+
+    Returns:
+        tuple: The connect and read timeouts in seconds (None meaning no limit).
+    """
+    if isinstance(timeout, (tuple, list)):
+        return timeout[0], timeout[1]
+    return timeout, timeout
+
+
+def _parse_head(head):
+    """
+    Parses a raw HTTP response head.
+
+    Repeated headers are joined with ", " the same way requests does when its
+    headers are converted to a plain dictionary.
+
+    Args:
+        head (bytes): The status line and headers, terminated by an empty line.
+
+    Returns:
+        tuple: The status code, reason phrase and headers dictionary.
+
+    Raises:
+        RuntimeError: If the status line is malformed.
+    """
+    status_line, _, rest = head.partition(b"\r\n")
+    parts = status_line.decode("latin-1").split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+        raise RuntimeError(f"An error occurred: Malformed status line {status_line!r}")
+    reason = parts[2] if len(parts) > 2 else ""
+
+    headers = {}
+    names = {}
+    for key, value in parse_headers(io.BytesIO(rest)).items():
+        lowered = key.lower()
+        if lowered in names:
+            headers[names[lowered]] += f", {value}"
+        else:
+            names[lowered] = key
+            headers[key] = value
+    return int(parts[1]), reason, headers
+
+
+def _lookup(headers, name):
+    """Returns the value of a header from a plain dictionary, ignoring case."""
+    lowered = name.lower()
+    for key, value in headers.items():
+        if key.lower() == lowered:
+            return value
+    return None
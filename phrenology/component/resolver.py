@@ -0,0 +1,92 @@
+import socket
+import threading
+import time
+from collections import OrderedDict
+
+
+class Resolver:
+    """
+    A thread-safe DNS resolver with a TTL bounded positive and negative cache.
+
+    The system resolver does not report record TTLs, so successful lookups are kept
+    for `ttl` seconds and failed lookups for `negative_ttl` seconds. The cache holds
+    at most `maxsize` hostnames and evicts the least recently used entry first.
+
+    Attributes:
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups sent to the system resolver.
+    """
+
+    def __init__(self, ttl=300, negative_ttl=60, maxsize=65536):
+        """
+        Initializes an empty cache.
+
+        Args:
+            ttl (int or float): Seconds to keep a successful lookup. 0 disables positive caching.
+            negative_ttl (int or float): Seconds to keep a failed lookup. 0 disables negative caching.
+            maxsize (int): Maximum number of hostnames kept in the cache.
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, hostname):
+        """
+        Resolves a hostname to an IPv4 or IPv6 address, answering from the cache when possible.
+
+        The first address returned by getaddrinfo() is used, so the system's address
+        selection order decides between IPv4 and IPv6.
+
+        Args:
+            hostname (str): The hostname to resolve.
+
+        Returns:
+            str: The resolved address.
+
+        Raises:
+            socket.gaierror: If the hostname does not resolve, now or in a cached lookup.
+        """
+        key = hostname.lower()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                address, error = entry[1], entry[2]
+                if error is not None:
+                    raise socket.gaierror(*error)
+                return address
+            self.misses += 1
+
+        try:
+            address = socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)[0][4][0]
+        except socket.gaierror as e:
+            self._store(key, self.negative_ttl, None, e.args)
+            raise
+        self._store(key, self.ttl, address, None)
+        return address
+
+    def _store(self, key, ttl, address, error):
+        """Caches one lookup result for `ttl` seconds."""
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, address, error)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+
+    def snapshot(self):
+        """
+        Returns the cache statistics as a dictionary.
+
+        Returns:
+            dict: The hits, misses and number of cached entries.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._cache)}
@@ -0,0 +1,113 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class HostScheduler:
+    """
+    Coordinates when worker threads may send a request to a given host.
+
+    Three independent limits can be combined, each disabled when set to 0:
+    a cap on concurrent requests per hostname, a cap on concurrent requests per
+    resolved IP address (several hostnames often share one origin), and a minimum
+    interval between the start of two requests to the same hostname. Threads that
+    would break a limit wait until a slot frees up.
+    """
+
+    # Drop expired per-host start times once this many hosts have been seen.
+    prune_threshold = 10000
+
+    def __init__(self, per_host=0, per_ip=0, interval=0):
+        """
+        Initializes the scheduler.
+
+        Args:
+            per_host (int): Maximum concurrent requests per hostname.
+            per_ip (int): Maximum concurrent requests per resolved IP address.
+            interval (int or float): Minimum seconds between two requests to the same hostname.
+        """
+        self.per_host = per_host
+        self.per_ip = per_ip
+        self.interval = interval
+        self._condition = threading.Condition()
+        self._host_active = {}
+        self._ip_active = {}
+        self._next_start = {}
+
+    @contextmanager
+    def slot(self, host, address=None):
+        """
+        Holds a request slot for the duration of a with block.
+
+        Args:
+            host (str): The hostname the request is sent to.
+            address (str, optional): The IP address the hostname resolved to.
+        """
+        self.acquire(host, address)
+        try:
+            yield
+        finally:
+            self.release(host, address)
+
+    def acquire(self, host, address=None):
+        """
+        Blocks until a request to the host is allowed, then claims a slot.
+
+        Args:
+            host (str): The hostname the request is sent to.
+            address (str, optional): The IP address the hostname resolved to.
+        """
+        host = host.lower()
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                delay = self._delay(host, address, now)
+                if delay == 0:
+                    break
+                self._condition.wait(delay)
+            self._host_active[host] = self._host_active.get(host, 0) + 1
+            if address:
+                self._ip_active[address] = self._ip_active.get(address, 0) + 1
+            if self.interval:
+                self._next_start[host] = now + self.interval
+                if len(self._next_start) > self.prune_threshold:
+                    self._next_start = {key: due for key, due in self._next_start.items() if due > now}
+
+    def release(self, host, address=None):
+        """
+        Frees a slot claimed by acquire().
+
+        Args:
+            host (str): The hostname the request was sent to.
+            address (str, optional): The IP address the hostname resolved to.
+        """
+        host = host.lower()
+        with self._condition:
+            _decrement(self._host_active, host)
+            if address:
+                _decrement(self._ip_active, address)
+            self._condition.notify_all()
+
+    def _delay(self, host, address, now):
+        """
+        Returns how long to wait before the host may be contacted.
+
+        Returns:
+            float or None: 0 when a slot is free now, a number of seconds when only the
+                           interval is pending, or None to wait for a release.
+        """
+        if self.per_host and self._host_active.get(host, 0) >= self.per_host:
+            return None
+        if self.per_ip and address and self._ip_active.get(address, 0) >= self.per_ip:
+            return None
+        due = self._next_start.get(host, 0)
+        return due - now if due > now else 0
+
+
+def _decrement(counts, key):
+    """Decrements a counter and removes it once it reaches zero."""
+    remaining = counts.get(key, 0) - 1
+    if remaining > 0:
+        counts[key] = remaining
+    else:
+        counts.pop(key, None)
@@ -0,0 +1,316 @@
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError
+
+from . import timing
+from .resolver import Resolver
+
+# The adapter currently sending on this thread, so connections know whom to report to.
+_active = threading.local()
+
+
+class ConnectionStats:
+    """
+    Thread-safe counters describing how well pooled connections were reused.
+
+    Attributes:
+        requests (int): Number of requests sent through the pool.
+        connections (int): Number of new connections the pool had to open.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.connections = 0
+
+    def request_sent(self):
+        """Records one request sent through the pool."""
+        with self._lock:
+            self.requests += 1
+
+    def connection_opened(self):
+        """Records one new TCP connection."""
+        with self._lock:
+            self.connections += 1
+
+    @property
+    def reused(self):
+        """
+        Returns the number of requests that were sent over an existing connection.
+
+        Returns:
+            int: The number of reused connections.
+        """
+        return max(self.requests - self.connections, 0)
+
+    def snapshot(self):
+        """
+        Returns the counters as a dictionary.
+
+        Returns:
+            dict: The requests, connections and reused counts.
+        """
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reused": max(self.requests - self.connections, 0),
+            }
+
+
+@contextmanager
+def pinned(hostname, address):
+    """
+    Makes connections opened on this thread to `hostname` use an address resolved beforehand.
+
+    The caller has already looked the hostname up, so the connection skips a second
+    lookup. Other hosts, such as the target of a cross-host redirect, are still
+    resolved through the adapter's resolver.
+
+    Args:
+        hostname (str): The hostname the address belongs to.
+        address (str): The resolved address.
+    """
+    previous = getattr(_active, "pinned", None)
+    _active.pinned = (hostname.lower(), address)
+    try:
+        yield
+    finally:
+        _active.pinned = previous
+
+
+@contextmanager
+def watched(watch):
+    """
+    Adds the socket of every response read on this thread to `watch`.
+
+    Every hop of a redirect is read over its own connection, so the socket is added
+    just before each response head is read, whether the connection is new or reused.
+
+    Args:
+        watch (Watch): The watch enforcing the total budget of the current target.
+    """
+    previous = getattr(_active, "watch", None)
+    _active.watch = watch
+    try:
+        yield
+    finally:
+        _active.watch = previous
+
+
+def _watch(connection):
+    """Hands the socket of a connection to the watch of the target read on this thread."""
+    watch = getattr(_active, "watch", None)
+    if watch is not None and connection.sock is not None:
+        watch.add(connection.sock)
+
+
+def _connection_opened():
+    """Reports a new connection to the adapter sending on the current thread."""
+    adapter = getattr(_active, "adapter", None)
+    if adapter is not None:
+        adapter.stats.connection_opened()
+
+
+def _open(connection, new_conn):
+    """
+    Opens the socket of a connection, connecting to the address picked by the active adapter.
+
+    Only the TCP connect uses the address: the connection keeps its hostname, so the
+    Host header, TLS SNI and certificate checks are unaffected, and every hop of a
+    redirect is sent with its own hostname.
+    """
+    adapter = getattr(_active, "adapter", None)
+    dns_host = connection._dns_host  # pylint: disable=protected-access
+    if adapter is not None and adapter.resolver is not None:
+        try:
+            connection._dns_host = adapter.address_for(dns_host)  # pylint: disable=protected-access
+        except socket.gaierror as e:
+            raise NameResolutionError(connection.host, connection, e) from e
+    try:
+        with timing.measure("connect"):
+            sock = new_conn()
+    finally:
+        connection._dns_host = dns_host  # pylint: disable=protected-access
+    _connection_opened()
+    return sock
+
+
+class _TrackedHTTPConnection(HTTPConnection):
+    def _new_conn(self):
+        return _open(self, super()._new_conn)
+
+    def getresponse(self):
+        _watch(self)
+        return super().getresponse()
+
+
+class _TrackedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self):
+        return _open(self, super()._new_conn)
+
+    def getresponse(self):
+        _watch(self)
+        return super().getresponse()
+
+    def connect(self):
+        target_timing = timing.current()
+        if target_timing is None:
+            return super().connect()
+        # Everything connect() spends beyond opening the socket is the TLS handshake.
+        started = time.perf_counter()
+        before = target_timing.total("connect")
+        super().connect()
+        elapsed = time.perf_counter() - started
+        target_timing.add("tls", elapsed - (target_timing.total("connect") - before))
+        return None
+
+
+class _TrackedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TrackedHTTPConnection
+
+    def __str__(self):
+        # Keep urllib3's error messages identical to those of an untracked pool.
+        return f"HTTPConnectionPool(host={self.host!r}, port={self.port!r})"
+
+
+class _TrackedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TrackedHTTPSConnection
+
+    def __str__(self):
+        return f"HTTPSConnectionPool(host={self.host!r}, port={self.port!r})"
+
+
+class _ClosingHTTPConnectionPool(_TrackedHTTPConnectionPool):
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.close()
+        super()._put_conn(conn)
+
+
+class _ClosingHTTPSConnectionPool(_TrackedHTTPSConnectionPool):
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.close()
+        super()._put_conn(conn)
+
+
+class PoolAdapter(HTTPAdapter):
+    """
+    A transport adapter that reports connection reuse to a ConnectionStats instance.
+
+    When keep_alive is False every connection is closed as soon as it is handed
+    back to its pool, so each request opens a fresh one.
+
+    When a resolver is given, new connections connect to the address pinned with
+    pinned(), or else to the address the resolver returns, while pools stay keyed by
+    hostname so the Host header, TLS SNI and certificate checks keep the original
+    hostname on every hop of a redirect.
+    """
+
+    def __init__(self, stats, keep_alive=True, resolver=None, **kwargs):
+        self.stats = stats
+        self.keep_alive = keep_alive
+        self.resolver = resolver
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if self.keep_alive:
+            pool_classes = {"http": _TrackedHTTPConnectionPool, "https": _TrackedHTTPSConnectionPool}
+        else:
+            pool_classes = {"http": _ClosingHTTPConnectionPool, "https": _ClosingHTTPSConnectionPool}
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    def address_for(self, hostname):
+        """
+        Returns the address a new connection to `hostname` should connect to.
+
+        Args:
+            hostname (str): The hostname of the connection.
+
+        Returns:
+            str: The address pinned for this hostname on the current thread, or the one
+                 returned by the resolver.
+
+        Raises:
+            socket.gaierror: If the hostname does not resolve.
+        """
+        pin = getattr(_active, "pinned", None)
+        if pin is not None and pin[0] == hostname.lower():
+            return pin[1]
+        with timing.measure("dns"):
+            return self.resolver.resolve(hostname)
+
+    def send(self, request, **kwargs):  # pylint: disable=arguments-differ
+        previous = getattr(_active, "adapter", None)
+        _active.adapter = self
+        self.stats.request_sent()
+        target_timing = timing.current()
+        try:
+            if target_timing is None:
+                return super().send(request, **kwargs)
+            # Time to first byte is the time send() waited for the response head,
+            # without the DNS lookup and the connection set up on the way.
+            started = time.perf_counter()
+            before = target_timing.total("dns", "connect", "tls")
+            try:
+                return super().send(request, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                target_timing.add("ttfb", elapsed - (target_timing.total("dns", "connect", "tls") - before))
+        finally:
+            _active.adapter = previous
+
+
+class SessionPool:
+    """
+    A long-lived requests session shared by every target of a run.
+
+    Connections are pooled per host by urllib3, so consecutive targets on the same
+    host skip the TCP and TLS handshakes. Cookies set by one target are never sent
+    to the next one; a custom cookie is always passed explicitly per request.
+
+    Attributes:
+        session (requests.Session): The shared session.
+        stats (ConnectionStats): Connection reuse counters for the session.
+        resolver (Resolver): The DNS cache used to pick the address each request connects to.
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=10, keep_alive=True, resolver=None):
+        """
+        Initializes the session and mounts the pooled adapter.
+
+        Args:
+            pool_connections (int): Number of per-host connection pools to keep.
+            pool_maxsize (int): Maximum number of connections kept per host.
+            keep_alive (bool): Keep connections open between requests when True.
+            resolver (Resolver, optional): The DNS cache to share. A new one is created when omitted.
+        """
+        self.stats = ConnectionStats()
+        self.resolver = resolver if resolver is not None else Resolver()
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        if not keep_alive:
+            self.session.headers["Connection"] = "close"
+        adapter = PoolAdapter(
+            self.stats,
+            keep_alive=keep_alive,
+            resolver=self.resolver,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self):
+        """Closes every pooled connection."""
+        self.session.close()
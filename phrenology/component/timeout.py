@@ -0,0 +1,320 @@
+import heapq
+import itertools
+import math
+import socket
+import threading
+import time
+from collections import deque
+
+from .errors import RequestFailed
+
+
+class TargetTimeout(RequestFailed):
+    """
+    Raised when a target does not answer within its time budget.
+
+    It subclasses RequestFailed, and so RuntimeError, so callers that already
+    handle request failures report timeouts the same way.
+    """
+
+    kind = "timeout"
+
+
+class Deadline:
+    """
+    A point in time after which no new work should be started.
+
+    Attributes:
+        seconds (int or float or None): The length of the deadline, or None for no deadline.
+    """
+
+    def __init__(self, seconds=None):
+        self.seconds = seconds
+        self._expires = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self):
+        """
+        Returns the number of seconds left.
+
+        Returns:
+            float or None: Seconds until the deadline (never negative), or None without a deadline.
+        """
+        if self._expires is None:
+            return None
+        return max(self._expires - time.monotonic(), 0.0)
+
+    def expired(self):
+        """
+        Checks whether the deadline has passed.
+
+        Returns:
+            bool: True once the deadline has passed.
+        """
+        return self._expires is not None and time.monotonic() >= self._expires
+
+
+class TimeoutPolicy:
+    """
+    Computes the connect and read timeouts for each request.
+
+    The connect and read timeouts are always bounded by their configured values. A
+    per-target total budget and a run deadline cap each of them further, so no
+    single wait outlasts whichever limit is closer. The total budget is also a
+    hard limit on the whole target, enforced by the event loop on the async
+    engine and by a Watchdog on the blocking engines. In adaptive mode the
+    timeouts are also lowered to a multiple of the observed latency percentile
+    once enough requests have completed, which frees workers quickly from tarpit
+    hosts while leaving room for normal slow responses.
+    """
+
+    def __init__(
+        self,
+        connect=10,
+        read=20,
+        total=None,
+        adaptive=False,
+        percentile=99,
+        multiplier=4,
+        floor=1,
+        min_samples=50,
+        sample_size=1000,
+    ):
+        """
+        Initializes the policy.
+
+        Args:
+            connect (int or float): Maximum seconds to establish a connection.
+            read (int or float): Maximum seconds to wait for the server between reads.
+            total (int or float, optional): Maximum seconds for a whole target.
+            adaptive (bool): Derive timeouts from observed latencies when True.
+            percentile (int or float): Latency percentile the adaptive timeouts are based on.
+            multiplier (int or float): Factor applied to the observed percentile.
+            floor (int or float): Adaptive timeouts never drop below this many seconds.
+            min_samples (int): Observations needed before adaptive timeouts kick in.
+            sample_size (int): Number of recent observations kept.
+        """
+        self.connect = connect
+        self.read = read
+        self.total = total
+        self.adaptive = adaptive
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.floor = floor
+        self.min_samples = min_samples
+        self._samples = deque(maxlen=sample_size)
+        self._lock = threading.Lock()
+        self._limit = None
+        self._stale = 0
+
+    def observe(self, seconds):
+        """
+        Records the latency of a completed request.
+
+        Args:
+            seconds (float): The time the request took.
+        """
+        with self._lock:
+            self._samples.append(seconds)
+            self._stale += 1
+
+    def budget(self, remaining=None):
+        """
+        Returns the timeouts for the next request.
+
+        Args:
+            remaining (float, optional): Seconds left before the run deadline.
+
+        Returns:
+            tuple: The connect and read timeouts in seconds, as accepted by requests.
+        """
+        connect, read = self.connect, self.read
+        if self.adaptive:
+            limit = self._adaptive_limit()
+            if limit is not None:
+                connect, read = min(connect, limit), min(read, limit)
+        total = _smallest(self.total, remaining)
+        if total is not None:
+            total = max(total, 0.001)
+            connect, read = min(connect, total), min(read, total)
+        return connect, read
+
+    def _adaptive_limit(self):
+        """
+        Returns the adaptive timeout, recomputed once per `min_samples` observations.
+
+        Returns:
+            float or None: The adaptive limit, or None until enough requests have completed.
+        """
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            if self._limit is None or self._stale >= self.min_samples:
+                observed = percentile(self._samples, self.percentile)
+                self._limit = max(observed * self.multiplier, self.floor)
+                self._stale = 0
+            return self._limit
+
+    def total_budget(self, remaining=None):
+        """
+        Returns the overall time allowed for the next target.
+
+        Args:
+            remaining (float, optional): Seconds left before the run deadline.
+
+        Returns:
+            float or None: The total budget in seconds, or None when unlimited.
+        """
+        return _smallest(self.total, remaining)
+
+
+class Watch:
+    """
+    The sockets of one target watched against its total budget.
+
+    Used as a context manager around the request: the budget starts when the block
+    is entered and the sockets are forgotten when it is left.
+
+    Attributes:
+        seconds (float or None): The total budget of the target, or None for no limit.
+        expired (bool): True once the budget ran out and the sockets were shut down.
+    """
+
+    def __init__(self, seconds=None, watchdog=None):
+        self.seconds = seconds
+        self.expired = False
+        self._watchdog = watchdog
+        self._lock = threading.Lock()
+        self._sockets = []
+        self._finished = False
+
+    def __enter__(self):
+        if self._watchdog is not None and self.seconds is not None:
+            self._watchdog.add(self, time.monotonic() + self.seconds)
+        return self
+
+    def __exit__(self, *exc):
+        with self._lock:
+            self._finished = True
+            self._sockets = []
+
+    def add(self, sock):
+        """
+        Adds a socket the target reads from; it is shut down at once if the budget already ran out.
+
+        Args:
+            sock (socket.socket): The socket of the connection the target uses.
+        """
+        with self._lock:
+            if self._finished:
+                return
+            if not self.expired:
+                self._sockets.append(sock)
+                return
+        _shutdown(sock)
+
+    def expire(self):
+        """Marks the budget as spent and shuts down every socket of the target."""
+        with self._lock:
+            if self._finished:
+                return
+            self.expired = True
+            sockets, self._sockets = self._sockets, []
+        for sock in sockets:
+            _shutdown(sock)
+
+
+class Watchdog:
+    """
+    Enforces the total budget of targets fetched over blocking sockets.
+
+    A socket timeout only limits each read, so a server trickling its response a
+    line at a time can hold a worker far beyond the budget of the target. A single
+    background thread keeps the expiry of every watched target in a heap and shuts
+    down the sockets of a target whose budget ran out, which ends the blocked read
+    with an error the caller reports as a TargetTimeout.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def watch(self, seconds):
+        """
+        Creates the watch of one target.
+
+        Args:
+            seconds (float or None): The total budget of the target, or None for no limit.
+
+        Returns:
+            Watch: The watch, armed when its with block is entered.
+        """
+        return Watch(seconds, self)
+
+    def add(self, watch, expires):
+        """
+        Schedules a watch to expire at a point in time.
+
+        Args:
+            watch (Watch): The watch to expire.
+            expires (float): The time.monotonic() value at which its budget runs out.
+        """
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="phrenology-watchdog", daemon=True)
+                self._thread.start()
+            heapq.heappush(self._heap, (expires, next(self._order), watch))
+            self._condition.notify()
+
+    def close(self):
+        """Stops the background thread; watches that have not expired yet never will."""
+        with self._condition:
+            self._closed = True
+            self._heap = []
+            self._condition.notify()
+
+    def _run(self):
+        """Expires every watch whose time has come, sleeping until the next one is due."""
+        with self._condition:
+            while not self._closed:
+                if not self._heap:
+                    self._condition.wait()
+                    continue
+                delay = self._heap[0][0] - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+                heapq.heappop(self._heap)[2].expire()
+
+
+def percentile(values, q):
+    """
+    Returns the q-th percentile of a list of numbers using the nearest-rank method.
+
+    Args:
+        values (list): The numbers, in any order. Must not be empty.
+        q (int or float): The percentile, between 0 and 100.
+
+    Returns:
+        The value at the requested percentile.
+    """
+    ordered = sorted(values)
+    rank = math.ceil(q / 100 * len(ordered))
+    return ordered[min(max(rank, 1), len(ordered)) - 1]
+
+
+def _shutdown(sock):
+    """Shuts a socket down, waking any thread blocked reading from it."""
+    try:
+        # Bypasses SSLSocket.shutdown(), which would drop the TLS state under a reader.
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+def _smallest(*values):
+    """Returns the smallest value that is not None, or None."""
+    present = [value for value in values if value is not None]
+    return min(present) if present else None
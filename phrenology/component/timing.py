@@ -0,0 +1,155 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+from .timeout import percentile
+
+# Phases of a scan, in the order they happen.
+PHASES = ("dns", "connect", "tls", "ttfb", "analysis", "render")
+
+# The timing of the target being scanned in the current thread or asyncio task.
+_current = contextvars.ContextVar("phrenology_timing", default=None)
+
+
+class PhaseTiming:
+    """
+    Seconds spent in each phase of scanning one target.
+
+    Phases that happen several times for one target, such as connecting again
+    after a redirect, are added up.
+
+    Attributes:
+        phases (dict): Phase names mapped to seconds.
+    """
+
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases = {}
+
+    def add(self, phase, seconds):
+        """
+        Adds time to a phase.
+
+        Args:
+            phase (str): The phase, one of PHASES.
+            seconds (float): The time spent.
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def total(self, *phases):
+        """
+        Returns the time recorded so far for some phases.
+
+        Args:
+            *phases (str): The phases to add up.
+
+        Returns:
+            float: The combined seconds.
+        """
+        return sum(self.phases.get(phase, 0.0) for phase in phases)
+
+    @contextmanager
+    def measure(self, phase):
+        """Adds the time spent in the with block to a phase."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, time.perf_counter() - started)
+
+    def snapshot(self):
+        """
+        Returns the recorded phases in milliseconds.
+
+        Returns:
+            dict: Phase names mapped to milliseconds, in PHASES order.
+        """
+        return {phase: round(self.phases[phase] * 1000, 3) for phase in PHASES if phase in self.phases}
+
+
+def current():
+    """
+    Returns the timing being recorded by the current thread or asyncio task.
+
+    Returns:
+        PhaseTiming or None: The timing, or None when timing is disabled.
+    """
+    return _current.get()
+
+
+@contextmanager
+def recording(timing):
+    """Makes `timing` the current timing for the duration of the with block."""
+    token = _current.set(timing)
+    try:
+        yield timing
+    finally:
+        _current.reset(token)
+
+
+def measure(phase):
+    """
+    Measures a with block into the current timing, if any.
+
+    Args:
+        phase (str): The phase, one of PHASES.
+
+    Returns:
+        A context manager that costs next to nothing when timing is disabled.
+    """
+    timing = _current.get()
+    return timing.measure(phase) if timing is not None else nullcontext()
+
+
+class TimingStats:
+    """
+    Thread-safe per-phase timing samples collected over a run.
+
+    Only the most recent `sample_size` samples of each phase are kept, so memory
+    stays bounded however many targets are scanned.
+    """
+
+    def __init__(self, sample_size=100000):
+        """
+        Initializes empty statistics.
+
+        Args:
+            sample_size (int): Number of recent samples kept per phase.
+        """
+        self._samples = {phase: deque(maxlen=sample_size) for phase in PHASES}
+        self._lock = threading.Lock()
+
+    def record(self, timing):
+        """
+        Adds the phases of one target.
+
+        Args:
+            timing (PhaseTiming): The timing of the target.
+        """
+        with self._lock:
+            for phase, seconds in timing.phases.items():
+                self._samples[phase].append(seconds)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        Returns the per-phase percentiles.
+
+        Args:
+            percentiles (tuple): The percentiles to compute.
+
+        Returns:
+            dict: Each phase with samples mapped to its sample count and its
+                  percentiles in milliseconds, keyed "p50", "p90" and so on.
+        """
+        with self._lock:
+            samples = {phase: list(values) for phase, values in self._samples.items() if values}
+        return {
+            phase: {
+                "count": len(values),
+                **{f"p{q:g}": round(percentile(values, q) * 1000, 3) for q in percentiles},
+            }
+            for phase, values in samples.items()
+        }
@@ -1,12 +1,20 @@
 #!/bin/env python3
-from .component.header import HeaderService
-from .registry import owasp_header_dictionary as owasp
-from .registry.headers import (
-    EXPECTED_HEADERS,
-    DEPRECATED_HEADERS,
-    INFORMATION_HEADERS,
-    CACHE_HEADERS,
-)
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from functools import partial
+
+from .common.targets import normalize_target
+from .component.csp import CspAnalyzer
+from .component.errors import failure_kind
+from .component.grading import Grader
+from .component.header import AsyncHeaderService, HeaderService
+from .component.session import SessionPool
+from .component.timeout import Deadline, TargetTimeout, Watchdog
+from .component.timing import PhaseTiming, recording
+from . import registry
+from .registry.headers import CATEGORIES
 
 
 class Main:
@@ -16,14 +24,86 @@ class Main:
     Attributes:
         output (object): An instance of an output class used for rendering the results (likely from common.output.py)
         service_config (dict): A dictionary containing configuration options for the header checking service.
+        session_pool (SessionPool): The pooled session shared by every HeaderService created by engage().
+        scheduler (HostScheduler): Optional per-host politeness limits applied to every request.
+        timeouts (TimeoutPolicy): Optional policy deciding the connect and read timeouts of each request.
+        deadline (Deadline): The run deadline; no new target is started once it has passed.
+        deadline_reached (bool): True once targets were skipped because the deadline passed.
+        watchdog (Watchdog): Enforces the total budget of each target fetched by fetch().
+        timing_stats (TimingStats): Per-phase timings of every target, or None when timing is disabled.
+        metrics (Metrics): Registry the run's counters and histograms are recorded in, or None.
+        csp_analyzer (CspAnalyzer): Memoizing analyzer of the Content-Security-Policy values seen by the run.
+        grader (Grader): Memoizing grader of the security header values seen by the run, created on first use.
     """
 
-    def __init__(self, output, config):
+    def __init__(
+        self,
+        output,
+        config,
+        session_pool=None,
+        scheduler=None,
+        timeouts=None,
+        deadline=None,
+        timing_stats=None,
+        metrics=None,
+    ):
         # output here represents the output abstract class implemented in common.output.py
         self.output = output
         self.service_config = config
+        self.session_pool = session_pool if session_pool is not None else SessionPool()
+        self.scheduler = scheduler
+        self.timeouts = timeouts
+        self.deadline = deadline if deadline is not None else Deadline()
+        self.deadline_reached = False
+        self.watchdog = Watchdog()
+        self.timing_stats = timing_stats
+        self.metrics = metrics
+        self.csp_analyzer = CspAnalyzer()
+        self._grader = None
+        if metrics is not None:
+            metrics.register(self._collect)
+
+    def stats(self):
+        """
+        Returns statistics collected over the lifetime of this instance.
+
+        Returns:
+            dict: Connection reuse counters under the "connections" key, DNS cache
+                  counters under the "dns" key, CSP analysis and value grading cache
+                  counters under the "csp" and "grading" keys and, when timing is
+                  enabled, per-phase percentiles under the "timing" key.
+        """
+        stats = {
+            "connections": self.session_pool.stats.snapshot(),
+            "dns": self.session_pool.resolver.snapshot(),
+            "csp": self.csp_analyzer.snapshot(),
+            "grading": self._grader.snapshot() if self._grader else {"hits": 0, "misses": 0, "entries": 0},
+        }
+        if self.timing_stats is not None:
+            stats["timing"] = self.timing_stats.summary()
+        return stats
+
+    def _collect(self, metrics):
+        """Copies the connection pool and DNS cache statistics into the metrics."""
+        connections = self.session_pool.stats.snapshot()
+        metrics.set("phrenology_requests_sent_total", connections["requests"])
+        metrics.set("phrenology_connections_opened_total", connections["connections"])
+        metrics.set(
+            "phrenology_connection_reuse_ratio",
+            connections["reused"] / connections["requests"] if connections["requests"] else 0.0,
+        )
+        dns = self.session_pool.resolver.snapshot()
+        lookups = dns["hits"] + dns["misses"]
+        metrics.set("phrenology_dns_cache_hits_total", dns["hits"])
+        metrics.set("phrenology_dns_cache_misses_total", dns["misses"])
+        metrics.set("phrenology_dns_cache_hit_ratio", dns["hits"] / lookups if lookups else 0.0)
+
+    def close(self):
+        """Releases the pooled connections and the watchdog held by this instance."""
+        self.session_pool.close()
+        self.watchdog.close()
 
-    def engage(self, url, cookie, cache, deprecated, information, get, json, owasp_guidance=False):
+    def engage(self, url, cookie, cache, deprecated, information, get, json, owasp_guidance=False, analyze=False):
         """
         Initiates the process of checking headers for a provided URL and generates output based on user preferences.
 
@@ -36,8 +116,112 @@ class Main:
             get (bool, optional): Flag indicating whether to use the GET request method instead of HEAD (default). Defaults to False.
             json (bool, optional): Flag indicating whether to output the results in JSON format. Defaults to False.
             owasp_guidance (bool, optional): Flag indicating whether to display OWASP guidance for each header. Defaults to False.
+            analyze (bool, optional): Flag indicating whether to grade the security header values. Defaults to False.
         """
-        session = HeaderService(self.service_config)
+        url, headers_model = self.fetch(url, cookie, get)
+        self.report(url, headers_model, cache, deprecated, information, owasp_guidance, analyze)
+
+    def fetch(self, url, cookie=None, get=False):
+        """
+        Requests the provided URL and returns its headers without rendering anything.
+
+        This is the I/O bound half of engage() and is safe to call from worker threads.
+
+        Args:
+            url (str): The URL to check headers for.
+            cookie (str, optional): A custom cookie to include in the request. Defaults to None.
+            get (bool, optional): Flag indicating whether to use the GET request method instead of HEAD. Defaults to False.
+
+        Returns:
+            tuple: The normalized URL and the HeaderModel built from the response.
+
+        Raises:
+            ValueError: If the URL is invalid.
+            RuntimeError: If the request fails.
+        """
+        with self._tracked():
+            session = self._prepare(
+                HeaderService(
+                    self.service_config,
+                    session=self.session_pool.session,
+                    resolver=self.session_pool.resolver,
+                    scheduler=self.scheduler,
+                    metrics=self.metrics,
+                    watchdog=self.watchdog,
+                ),
+                url,
+                cookie,
+                get,
+            )
+            timing = self._new_timing()
+            started = time.monotonic()
+            with recording(timing):
+                headers_model = session.run_request()
+            self._observe(started)
+        headers_model.timing = timing
+        return session.url, headers_model
+
+    async def fetch_async(self, url, cookie=None, get=False):
+        """
+        Coroutine counterpart of fetch() built on AsyncHeaderService.
+
+        Args:
+            url (str): The URL to check headers for.
+            cookie (str, optional): A custom cookie to include in the request. Defaults to None.
+            get (bool, optional): Flag indicating whether to use the GET request method instead of HEAD. Defaults to False.
+
+        Returns:
+            tuple: The normalized URL and the HeaderModel built from the response.
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        with self._tracked():
+            session = self._prepare(
+                AsyncHeaderService(self.service_config, resolver=self.session_pool.resolver, metrics=self.metrics),
+                url,
+                cookie,
+                get,
+            )
+            timing = self._new_timing()
+            started = time.monotonic()
+            total = session.total_timeout
+            try:
+                with recording(timing):
+                    headers_model = await asyncio.wait_for(session.run_request(), total)
+            except asyncio.TimeoutError:
+                raise TargetTimeout(
+                    f"Timeout error occurred: {session.url} did not answer within {total:g} seconds"
+                )
+            self._observe(started)
+        headers_model.timing = timing
+        return session.url, headers_model
+
+    def _new_timing(self):
+        """Returns a timing for the next target, or None when nothing consumes it."""
+        if self.timing_stats is None and self.metrics is None:
+            return None
+        return PhaseTiming()
+
+    @contextmanager
+    def _tracked(self):
+        """Counts a failed fetch by kind of failure, or records the duration of a successful one."""
+        if self.metrics is None:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.metrics.inc("phrenology_targets_failed_total", error=failure_kind(e))
+            raise
+        self.metrics.observe("phrenology_request_duration_seconds", time.perf_counter() - started)
+
+    def _prepare(self, session, url, cookie, get):
+        """Applies the per-target request options to a header service."""
+        if self.timeouts:
+            remaining = self.deadline.remaining()
+            session.timeout = self.timeouts.budget(remaining)
+            session.total_timeout = self.timeouts.total_budget(remaining)
 
         if get:
             session.method = "GET"
@@ -46,35 +230,222 @@ class Main:
             session.headers = {"Cookie": cookie}
 
         session.url = url
-        headers_model = session.run_request()
+        return session
+
+    def report(
+        self,
+        url,
+        headers_model,
+        cache=False,
+        deprecated=False,
+        information=False,
+        owasp_guidance=False,
+        analyze=False,
+        grades=None,
+    ):
+        """
+        Renders the header categories of an already fetched HeaderModel.
 
+        Args:
+            url (str): The normalized URL the headers were retrieved from.
+            headers_model (HeaderModel): The model returned by fetch().
+            cache (bool, optional): Flag indicating whether to display cache headers in the output. Defaults to False.
+            deprecated (bool, optional): Flag indicating whether to display deprecated headers in the output. Defaults to False.
+            information (bool, optional): Flag indicating whether to display informational headers in the output. Defaults to False.
+            owasp_guidance (bool, optional): Flag indicating whether to display OWASP guidance for each header. Defaults to False.
+            analyze (bool, optional): Flag indicating whether to grade the security header values. Defaults to False.
+            grades (dict, optional): The grades of the model when it was already graded in a batch.
+        """
         # Build combined OWASP lookup when guidance is requested
         owasp_lookup = {}
         if owasp_guidance:
+            owasp = registry.owasp_header_dictionary
             owasp_lookup.update(owasp.expected_security_responses)
             owasp_lookup.update(owasp.bad_security_headers)
             owasp_lookup.update(owasp.potentially_interesting_headers)
 
         if headers_model:
-            self.run("Expected headers", session.url, EXPECTED_HEADERS, headers_model, owasp_lookup, show_present=True)
+            self.run("Expected headers", url, "expected", headers_model, owasp_lookup, show_present=True)
             if deprecated:
-                self.run(
-                    "Deprecated headers", session.url, DEPRECATED_HEADERS, headers_model, owasp_lookup
-                )
+                self.run("Deprecated headers", url, "deprecated", headers_model, owasp_lookup)
             if information:
-                self.run(
-                    "Informational headers",
-                    session.url,
-                    INFORMATION_HEADERS,
-                    headers_model,
-                    owasp_lookup,
-                )
+                self.run("Informational headers", url, "information", headers_model, owasp_lookup)
             if cache:
-                self.run("Cacheing headers", session.url, CACHE_HEADERS, headers_model, owasp_lookup)
+                self.run("Cacheing headers", url, "cache", headers_model, owasp_lookup)
+            if analyze:
+                self.analyze(url, headers_model, grades)
+            meta = {"bytes_received": headers_model.bytes_received}
+            timing = headers_model.timing
+            if timing is not None and self.timing_stats is not None:
+                meta["timing_ms"] = timing.snapshot()
+                self.timing_stats.record(timing)
+            self.output.render_output("meta", None, url, None, meta)
+            if self.metrics is not None:
+                self.metrics.inc("phrenology_targets_completed_total")
+                for phase, seconds in (timing.phases.items() if timing is not None else ()):
+                    self.metrics.observe("phrenology_phase_duration_seconds", seconds, phase=phase)
         else:
             self._output = {"type": "error", "message": "Failed to retrieve headers."}
+        self.output.render_output("complete", None, url)
+
+    def _observe(self, started):
+        """Feeds the latency of a successful request to the timeout policy."""
+        if self.timeouts:
+            self.timeouts.observe(time.monotonic() - started)
+
+    async def engage_async(
+        self, url, cookie, cache, deprecated, information, get, json, owasp_guidance=False, analyze=False
+    ):
+        """
+        Coroutine counterpart of engage() that performs the request on the running event loop.
+
+        The arguments have the same meaning as in engage().
+        """
+        url, headers_model = await self.fetch_async(url, cookie, get)
+        self.report(url, headers_model, cache, deprecated, information, owasp_guidance, analyze)
+
+    def engage_all(
+        self,
+        urls,
+        cookie,
+        cache,
+        deprecated,
+        information,
+        get,
+        json,
+        owasp_guidance=False,
+        workers=1,
+        ordered=True,
+        on_error=None,
+        on_complete=None,
+        analyze=False,
+    ):
+        """
+        Checks headers for every URL in an iterable, optionally fetching several at the same time.
+
+        Requests are spread over a pool of worker threads while rendering always happens on the
+        calling thread, so output templates never see concurrent calls. Only a bounded window of
+        targets is in flight at once, which keeps memory flat for very long target lists.
+        Once the run deadline has passed no further targets are started; the targets
+        already in flight finish or time out within the remaining budget.
+
+        Args:
+            urls (iterable): The URLs to check headers for. Each is normalized like HeaderService.url
+                before it is fetched, so the callbacks and the output see the same URL whether the
+                target succeeds or fails.
+            workers (int, optional): Number of targets to fetch concurrently. Defaults to 1.
+            ordered (bool, optional): Render results in input order when True, or as soon as each
+                target finishes when False. Defaults to True.
+            on_error (callable, optional): Called as on_error(url, exception) when a target raises
+                ValueError or RuntimeError. When omitted the exception is re-raised.
+            on_complete (callable, optional): Called as on_complete(url) once a target has been
+                reported or passed to on_error.
+            analyze (bool, optional): Grade the security header values of each target.
+                Defaults to False.
 
-    def run(self, name, url, headers, headers_model, owasp_lookup=None, show_present=False):
+        The remaining arguments have the same meaning as in engage().
+        """
+        def _fetch(target_url):
+            return self.fetch(target_url, cookie, get)
+
+        report = partial(
+            self.report, cache=cache, deprecated=deprecated, information=information, owasp_guidance=owasp_guidance
+        )
+        urls = self._until_deadline(urls)
+        if workers <= 1:
+            for target_url in urls:
+                self.report_batch([(target_url, partial(_fetch, target_url))], report, analyze, on_error, on_complete)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for batch in _bounded_batches(executor, _fetch, urls, workers * 4, ordered):
+                batch = [(target_url, future.result) for target_url, future in batch]
+                self.report_batch(batch, report, analyze, on_error, on_complete)
+
+    def report_batch(self, batch, report, analyze=False, on_error=None, on_complete=None):
+        """
+        Reports finished targets in order, grading all of them in one pass first.
+
+        This is the rendering half of engage_all(), for callers that fetch targets
+        themselves. It must be called from the thread that owns the output template.
+
+        Args:
+            batch (list): (url, call) pairs, where call() returns the result of fetch() or raises.
+            report (callable): Main.report() with the rendering options of the scan applied.
+            analyze (bool, optional): Grade the security header values of the targets. Defaults to False.
+            on_error (callable, optional): As in engage_all(); when None the first failure is re-raised.
+            on_complete (callable, optional): As in engage_all().
+        """
+        results = []
+        for target_url, call in batch:
+            try:
+                results.append((target_url, call(), None))
+            except (ValueError, RuntimeError) as e:
+                results.append((target_url, None, e))
+        fetched = [result[1] for _, result, _ in results if result is not None]
+        grades = iter(self.grade_batch(fetched) if analyze and fetched else ())
+
+        for target_url, result, error in results:
+            if error is not None:
+                if on_error is None:
+                    raise error
+                on_error(target_url, error)
+            else:
+                report(*result, analyze=analyze, grades=next(grades, None))
+            if on_complete is not None:
+                on_complete(target_url)
+
+    @property
+    def grader(self):
+        """The Grader of this instance, compiled the first time a value is graded."""
+        if self._grader is None:
+            self._grader = Grader(csp_analyzer=self.csp_analyzer)
+        return self._grader
+
+    def analyze(self, url, headers_model, grades=None):
+        """
+        Renders the grade of every security header value of a fetched HeaderModel.
+
+        Each header with a value check is graded against its OWASP recommended value;
+        the grade of the Content-Security-Policy also carries its score and parsed
+        directives. Missing headers are not graded; they are already reported as missing.
+
+        Args:
+            url (str): The normalized URL the headers were retrieved from.
+            headers_model (HeaderModel): The model returned by fetch().
+            grades (dict, optional): The grades of the model, as returned by Grader.grade_batch().
+                                     The model is graded here when omitted.
+        """
+        timing = headers_model.timing
+        with timing.measure("analysis") if timing is not None else nullcontext():
+            if grades is None:
+                grades = self.grader.grade_model(headers_model)
+            analyses = {name: grade.as_dict() for name, grade in grades.items()}
+        with timing.measure("render") if timing is not None else nullcontext():
+            for name, analysis in analyses.items():
+                self.output.render_output("analysis", name, url, None, analysis)
+
+    def grade_batch(self, headers_models):
+        """
+        Grades many fetched HeaderModels at once, checking each distinct value only once.
+
+        The time spent is shared out over the "analysis" phase of the models.
+
+        Args:
+            headers_models (list): The models to grade.
+
+        Returns:
+            list: The grades of every model, in the same order, as returned by Grader.grade_batch().
+        """
+        started = time.perf_counter()
+        grades = self.grader.grade_batch(headers_models)
+        share = (time.perf_counter() - started) / max(len(headers_models), 1)
+        for headers_model in headers_models:
+            if headers_model.timing is not None:
+                headers_model.timing.add("analysis", share)
+        return grades
+
+    def run(self, name, url, category, headers_model, owasp_lookup=None, show_present=False):
         """
         Processes and outputs header data based on the provided name, headers configuration, and headers model.
 
@@ -82,7 +453,7 @@ class Main:
 
         Args:
             name (str): The name of the header category (e.g., "Expected Headers").
-            headers (dict): A dictionary containing configuration for the header category (e.g., result type, expected items).
+            category (str): The registry key of the header category (e.g., "expected" or "cache").
             headers_model (object): An instance of the HeaderService model containing retrieved headers data.
             owasp_lookup (dict): OWASP guidance lookup, or None/empty if not requested.
             show_present (bool): Whether to include non-queried headers in the output. Defaults to False.
@@ -90,21 +461,156 @@ class Main:
         # Logic for processing and rendering header types block remains unchanged
         """
 
-        query_result = headers_model.query(headers["items"])
-        # render header types block
-
-        self.output.render_output(
-            "counts", name, url, headers["result"], query_result["counts"]
-        )
-        self.output.render_output(
-            "list",
-            name,
-            url,
-            headers["result"],
-            {
+        timing = headers_model.timing
+        with timing.measure("analysis") if timing is not None else nullcontext():
+            headers = CATEGORIES[category]
+            query_result = headers_model.select(category)
+            listing = {
                 "expected": headers_model.expected,
                 "missing": headers_model.missing,
                 "present": headers_model.present if show_present else {},
                 "owasp": owasp_lookup or {},
-            },
+            }
+
+        # render header types block
+        with timing.measure("render") if timing is not None else nullcontext():
+            self.output.render_output(
+                "counts", name, url, headers["result"], query_result["counts"]
+            )
+            self.output.render_output("list", name, url, headers["result"], listing)
+
+    async def engage_all_async(
+        self,
+        urls,
+        cookie,
+        cache,
+        deprecated,
+        information,
+        get,
+        json,
+        owasp_guidance=False,
+        concurrency=100,
+        ordered=True,
+        on_error=None,
+        on_complete=None,
+        analyze=False,
+    ):
+        """
+        Checks headers for every URL in an iterable from a single event loop.
+
+        At most `concurrency` requests are in flight at once, guarded by a semaphore, and
+        results are rendered from the loop itself so output templates never see concurrent
+        calls. The arguments otherwise have the same meaning as in engage_all().
+        """
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _fetch(target_url):
+            async with semaphore:
+                return await self.fetch_async(target_url, cookie, get)
+
+        report = partial(
+            self.report, cache=cache, deprecated=deprecated, information=information, owasp_guidance=owasp_guidance
         )
+
+        def _handle(batch):
+            batch = [(target_url, task.result) for target_url, task in batch]
+            self.report_batch(batch, report, analyze, on_error, on_complete)
+
+        pending = deque()
+        for target_url in self._until_deadline(urls):
+            pending.append((target_url, asyncio.ensure_future(_fetch(target_url))))
+            if len(pending) >= concurrency * 2:
+                _handle(_ready(pending, await _next_done_async(pending, ordered), ordered))
+        while pending:
+            _handle(_ready(pending, await _next_done_async(pending, ordered), ordered))
+
+    def _until_deadline(self, urls):
+        """Yields targets, normalized like HeaderService.url, until the run deadline passes."""
+        for target_url in urls:
+            if self.deadline.expired():
+                self.deadline_reached = True
+                return
+            yield normalize_target(target_url)
+
+
+def bounded_map(executor, fn, items, window, ordered):
+    """
+    Submits fn(item) for each item while keeping at most `window` calls in flight.
+
+    Yields (item, future) pairs either in submission order or in completion order.
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= window:
+            yield _next_done(pending, ordered)
+    while pending:
+        yield _next_done(pending, ordered)
+
+
+def _bounded_batches(executor, fn, items, window, ordered):
+    """
+    Like bounded_map(), but yields lists of (item, future) pairs.
+
+    Each list holds the next finished pair together with every other pair that has
+    already finished, in the same order, so their results can be processed together.
+    """
+    pending = deque()
+    for item in items:
+        pending.append((item, executor.submit(fn, item)))
+        if len(pending) >= window:
+            yield _ready(pending, _next_done(pending, ordered), ordered)
+    while pending:
+        yield _ready(pending, _next_done(pending, ordered), ordered)
+
+
+def _ready(pending, first, ordered):
+    """
+    Pops the pairs that have already finished after `first` from the pending queue.
+
+    In order, only the finished pairs at the head of the queue can follow `first`;
+    otherwise every finished pair can.
+
+    Returns:
+        list: `first` followed by the popped pairs.
+    """
+    batch = [first]
+    if ordered:
+        while pending and pending[0][1].done():
+            batch.append(pending.popleft())
+        return batch
+    finished = [pair for pair in pending if pair[1].done()]
+    for pair in finished:
+        pending.remove(pair)
+    return batch + finished
+
+
+def _next_done(pending, ordered):
+    """Pops the next finished (item, future) pair from the pending queue."""
+    if ordered:
+        item, future = pending.popleft()
+        return item, future
+    done, _ = wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+    for index, (item, future) in enumerate(pending):
+        if future in done:
+            del pending[index]
+            return item, future
+    raise RuntimeError("No finished future found in pending queue.")
+
+
+async def _next_done_async(pending, ordered):
+    """Awaits and pops the next finished (item, task) pair from the pending queue."""
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    if ordered:
+        item, task = pending.popleft()
+        await asyncio.wait([task])
+        return item, task
+    done, _ = await asyncio.wait([task for _, task in pending], return_when=asyncio.FIRST_COMPLETED)
+    for index, (item, task) in enumerate(pending):
+        if task in done:
+            del pending[index]
+            return item, task
+    raise RuntimeError("No finished task found in pending queue.")
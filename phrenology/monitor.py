@@ -0,0 +1,244 @@
+#!/bin/env python3
+"""
+Continuous monitoring: targets are checked again and again, each when it is due.
+"""
+
+import heapq
+import itertools
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .common.targets import normalize_target
+
+# Longest time the monitor sleeps before checking whether it should stop.
+MAX_WAIT = 1.0
+
+
+class Schedule:
+    """
+    A priority queue of targets ordered by the time their next check is due.
+
+    Every target has its own interval. A target whose headers changed is checked
+    `backoff` times sooner next time, down to `min_interval`, and a target that
+    stayed the same backs off exponentially up to `max_interval`, so checks go to
+    the targets that actually change. Due times are jittered so targets added
+    together drift apart instead of coming due in bursts.
+
+    Attributes:
+        interval (float): Interval of a target that was not checked yet, in seconds.
+        min_interval (float): Shortest interval of a target that keeps changing.
+        max_interval (float): Longest interval of a target that never changes.
+    """
+
+    def __init__(self, interval, min_interval=None, max_interval=None, backoff=2.0, jitter=0.1, rng=None):
+        """
+        Args:
+            interval (float): Interval of a target that was not checked yet, in seconds.
+            min_interval (float, optional): Shortest interval. Defaults to interval / 8.
+            max_interval (float, optional): Longest interval. Defaults to interval * 8.
+            backoff (float): Factor the interval is divided by after a change, and multiplied
+                             by after a check without change. Defaults to 2.
+            jitter (float): Fraction of the interval by which due times are randomly moved.
+                            Defaults to 0.1.
+            rng (random.Random, optional): Source of the jitter.
+
+        Raises:
+            ValueError: If the intervals are not positive and ordered, or backoff is not above 1.
+        """
+        self.interval = interval
+        self.min_interval = min_interval if min_interval is not None else interval / 8
+        self.max_interval = max_interval if max_interval is not None else interval * 8
+        if not 0 < self.min_interval <= self.interval <= self.max_interval:
+            raise ValueError("Invalid schedule: expected 0 < minimum interval <= interval <= maximum interval")
+        if backoff <= 1:
+            raise ValueError(f"Invalid schedule: backoff must be above 1, got {backoff}")
+        if not 0 <= jitter < 1:
+            raise ValueError(f"Invalid schedule: jitter must be between 0 and 1, got {jitter}")
+        self.backoff = backoff
+        self.jitter = jitter
+        self._rng = rng or random.Random()
+        self._heap = []
+        self._intervals = {}
+        self._order = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def spread(self, urls, now):
+        """
+        Adds targets with their first checks spread evenly over one interval.
+
+        Args:
+            urls (iterable): The targets to add; repeated targets are added once.
+            now (float): The current time.
+        """
+        urls = [url for url in dict.fromkeys(urls) if url not in self._intervals]
+        for i, url in enumerate(urls):
+            self.add(url, now + self.interval * i / len(urls))
+
+    def add(self, url, due):
+        """
+        Adds a target that is not scheduled yet.
+
+        Args:
+            url (str): The target.
+            due (float): When it should first be checked.
+        """
+        self._intervals[url] = self.interval
+        heapq.heappush(self._heap, (due, next(self._order), url))
+
+    def next_due(self):
+        """
+        Returns when the next check is due.
+
+        Returns:
+            float: The due time of the first target, or None when nothing is scheduled.
+        """
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now, limit=None):
+        """
+        Takes the targets that are due, earliest first.
+
+        Taken targets are no longer scheduled until reschedule() is called for them.
+
+        Args:
+            now (float): The current time.
+            limit (int, optional): Most targets to take; the others stay due. Defaults to all.
+
+        Returns:
+            list: The due targets.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now and (limit is None or len(due) < limit):
+            due.append(heapq.heappop(self._heap)[2])
+        return due
+
+    def reschedule(self, url, changed, now):
+        """
+        Schedules the next check of a target after it was checked.
+
+        Args:
+            url (str): The checked target.
+            changed (bool): Whether its headers changed since its previous check, or None
+                            when there was nothing to compare with, which keeps the interval.
+            now (float): When the check finished.
+
+        Returns:
+            float: The new interval of the target.
+        """
+        interval = self._intervals.get(url, self.interval)
+        if changed:
+            interval = max(interval / self.backoff, self.min_interval)
+        elif changed is not None:
+            interval = min(interval * self.backoff, self.max_interval)
+        self._intervals[url] = interval
+        due = now + interval * (1 + self._rng.uniform(-self.jitter, self.jitter))
+        heapq.heappush(self._heap, (due, next(self._order), url))
+        return interval
+
+
+def monitor(
+    main,
+    output,
+    urls,
+    options,
+    schedule,
+    workers=1,
+    stop=None,
+    on_error=None,
+    clock=time.monotonic,
+):
+    """
+    Checks targets continuously, each one whenever its next check is due.
+
+    Targets come due one after the other rather than all at once: the first checks
+    are spread over one interval and later ones follow each target's own interval,
+    as adapted by the schedule. Up to `workers` checks run at the same time, and a
+    due target is started as soon as a worker is free, so a slow host only holds
+    its own worker while the other targets keep their schedule. Checks go through
+    `main`, so the pooled connections and the DNS cache stay warm for the whole
+    session, and every result is rendered, on the calling thread, to `output`, a
+    DiffTemplate following its baseline, which writes only what changed since the
+    previous check of the target. A failed check keeps the interval of its target.
+
+    Args:
+        main (Main): The Main instance used for every check.
+        output (DiffTemplate): The template `main` renders results to.
+        urls (iterable): The targets to monitor. They are normalized like HeaderService.url,
+                         so each is compared under the URL its results are reported with.
+        options (dict): The keyword arguments accepted by Main.engage_all(), such as cookie or cache.
+        schedule (Schedule): The schedule the targets are added to.
+        workers (int, optional): Number of due targets checked at the same time. Defaults to 1.
+        stop (threading.Event, optional): Ends the session once set; checks in progress finish first.
+        on_error (callable, optional): Called as on_error(url, exception) when a check fails. It
+                                       should render the error so the failure is compared too.
+        clock (callable, optional): Returns the current time in seconds. Defaults to time.monotonic.
+
+    Returns:
+        int: The number of checks made before the session ended, on `stop` or at the run deadline.
+    """
+    stop = stop or threading.Event()
+    schedule.spread([normalize_target(url) for url in urls], clock())
+    workers = max(workers, 1)
+    report = partial(
+        main.report,
+        cache=options.get("cache", False),
+        deprecated=options.get("deprecated", False),
+        information=options.get("information", False),
+        owasp_guidance=options.get("owasp_guidance", False),
+    )
+    finished = queue.Queue()
+    wake = threading.Event()
+    in_flight = 0
+    checks = 0
+
+    def _on_complete(target_url, error):
+        if error is not None:
+            # A failed check tells nothing about whether the headers changed.
+            changed = None
+        else:
+            # The report just rendered for this target recorded its change, if any.
+            change = output.last_change
+            # The first check of a target without a baseline only sets it.
+            changed = None if change is not None and change["change"] == "new" else change is not None
+        schedule.reschedule(target_url, changed, clock())
+
+    def _done(target_url, future):
+        finished.put((target_url, future))
+        wake.set()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            wake.clear()
+            while not finished.empty():
+                target_url, future = finished.get()
+                in_flight -= 1
+                checks += 1
+                main.report_batch([(target_url, future.result)], report, options.get("analyze", False), on_error)
+                _on_complete(target_url, future.exception())
+
+            if stop.is_set() or main.deadline.expired():
+                if not in_flight:
+                    break
+                wake.wait(MAX_WAIT)
+                continue
+
+            now = clock()
+            for target_url in schedule.pop_due(now, workers - in_flight):
+                future = executor.submit(main.fetch, target_url, options.get("cookie"), options.get("get", False))
+                future.add_done_callback(partial(_done, target_url))
+                in_flight += 1
+
+            next_due = schedule.next_due()
+            wait = MAX_WAIT if next_due is None else min(max(next_due - now, 0), MAX_WAIT)
+            if in_flight:
+                # A finished check frees a worker, so it ends the wait as well.
+                wake.wait(wait if in_flight < workers else MAX_WAIT)
+            else:
+                stop.wait(wait)
+    return checks
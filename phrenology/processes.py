@@ -0,0 +1,199 @@
+#!/bin/env python3
+"""
+Multi-process bulk scans: every worker process fetches, analyses and renders its own targets.
+"""
+
+import io
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .common.diff import DiffTemplate
+from .common.output_template import JsonTemplate, NdjsonTemplate, Template
+from .common.targets import normalize_target
+from .component.timeout import Deadline
+from .main import bounded_map
+
+# Per-scan options passed to Main.engage_all() in the worker processes.
+SCAN_OPTIONS = ("cookie", "cache", "deprecated", "information", "get", "json", "owasp_guidance", "analyze")
+
+# State of the current worker process, set up once by _start_worker().
+_worker = {}
+
+
+def scan(
+    main,
+    factory,
+    urls,
+    options,
+    processes=None,
+    workers=1,
+    ordered=True,
+    on_error=None,
+    on_complete=None,
+    chunk_size=None,
+):
+    """
+    Checks headers for every URL in an iterable across a pool of worker processes.
+
+    Each worker process builds its own Main through `factory`, with its own pooled
+    session, DNS cache and `workers` threads, and does all of the per-target work:
+    the request, the header analysis and the rendering into the output format of
+    `main.output`. Targets are sent to the workers in chunks, and only the rendered
+    results come back to this process, which writes them to `main.output`, so
+    analysis and encoding are no longer bound to a single core.
+
+    Args:
+        main (Main): The Main instance of this process; its output receives every result
+                     and its deadline covers the whole run, in every worker process.
+        factory (callable): Builds a worker's Main when called with the worker's output
+                            template. It must be picklable, e.g. a module-level function
+                            or a functools.partial of one.
+        urls (iterable): The URLs to check headers for.
+        options (dict): The keyword arguments in SCAN_OPTIONS passed to Main.engage_all().
+        processes (int, optional): Number of worker processes. Defaults to the number of CPUs.
+        workers (int, optional): Number of targets each process fetches concurrently. Defaults to 1.
+        ordered (bool, optional): Write results in input order when True, or chunk by chunk as
+                                  they finish when False. Defaults to True.
+        on_error (callable, optional): Called as on_error(url, exception) when a target raised
+                                       ValueError or RuntimeError in a worker. When omitted the
+                                       exception is re-raised.
+        on_complete (callable, optional): Called as on_complete(url) once a target's result has
+                                          been written or passed to on_error.
+        chunk_size (int, optional): Number of targets sent to a worker at a time. Defaults to
+                                    four per worker thread, and at least 16.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    chunk_size = chunk_size or max(16, workers * 4)
+    kind = _output_kind(main.output)
+    # Monotonic clocks are not comparable between processes, so the workers get the wall
+    # clock time the run deadline expires at and stop where this process would.
+    remaining = main.deadline.remaining()
+    expires = None if remaining is None else time.time() + remaining
+    executor = ProcessPoolExecutor(
+        max_workers=processes,
+        # Spawned rather than forked, so no worker inherits locks held by this process's threads.
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_start_worker,
+        initargs=(factory, kind, options, workers, expires),
+    )
+    with executor:
+        chunks = _chunks(_until_deadline(main, urls), chunk_size)
+        for chunk, future in bounded_map(executor, _scan_chunk, chunks, processes * 2, ordered):
+            outcomes = future.result()
+            # A worker returns no outcome for the targets it did not start once the deadline passed.
+            if len(outcomes) < len(chunk):
+                main.deadline_reached = True
+            for target_url, (captured, error) in zip(chunk, outcomes):
+                if error is not None:
+                    if on_error is None:
+                        raise error
+                    on_error(target_url, error)
+                else:
+                    _write(main.output, kind, captured)
+                if on_complete is not None:
+                    on_complete(target_url)
+            if kind == "ndjson":
+                main.output.flush()
+
+
+def _until_deadline(main, urls):
+    """Yields targets, normalized like Main.engage_all() does, until the run deadline of `main` passes."""
+    for target_url in urls:
+        if main.deadline.expired():
+            main.deadline_reached = True
+            return
+        yield normalize_target(target_url)
+
+
+def _chunks(urls, size):
+    """Groups an iterable of targets into lists of at most `size` targets."""
+    chunk = []
+    for target_url in urls:
+        chunk.append(target_url)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _output_kind(output):
+    """Returns how results rendered for `output` are carried back from a worker."""
+    if isinstance(output, DiffTemplate):
+        # Only this process holds the baseline, so results come back unrendered and are compared here.
+        return "json"
+    if isinstance(output, NdjsonTemplate):
+        return "ndjson"
+    if isinstance(output, JsonTemplate):
+        return "json"
+    return "text"
+
+
+def _write(output, kind, captured):
+    """Writes the result of one target, as captured in a worker, to the output."""
+    if kind == "json":
+        output.results.update(captured)
+        # Templates that write as they go, such as SqliteTemplate, do so on completion.
+        for target_url in captured:
+            output.render_output("complete", None, target_url)
+    elif kind == "ndjson":
+        output.stream.write(captured)
+    else:
+        sys.stdout.write(captured)
+
+
+def _start_worker(factory, kind, options, workers, expires):
+    """Builds the Main instance of a worker process, rendering into an in-memory buffer."""
+    buffer = io.StringIO()
+    if kind == "ndjson":
+        output = NdjsonTemplate(buffer)
+    elif kind == "json":
+        output = JsonTemplate()
+    else:
+        output = Template()
+        # The text template prints, so everything the worker prints is captured.
+        sys.stdout = buffer
+    main = factory(output)
+    if expires is not None:
+        main.deadline = Deadline(max(expires - time.time(), 0.0))
+    _worker.update(main=main, output=output, buffer=buffer, kind=kind, options=options, workers=workers)
+
+
+def _scan_chunk(chunk):
+    """
+    Scans a chunk of targets in a worker process.
+
+    Returns:
+        list: One (captured output, exception) pair per target, in chunk order.
+    """
+    main, output, buffer = _worker["main"], _worker["output"], _worker["buffer"]
+    outcomes = []
+    failures = []
+
+    def _capture():
+        if _worker["kind"] == "json":
+            captured = dict(output.results)
+            output.results.clear()
+            return captured
+        captured = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return captured
+
+    def _on_error(target_url, e):
+        failures.append(e)
+
+    def _on_complete(target_url):
+        # Targets complete in chunk order, each one right after its report or its error.
+        outcomes.append((None, failures.pop()) if failures else (_capture(), None))
+
+    main.engage_all(
+        chunk,
+        **_worker["options"],
+        workers=_worker["workers"],
+        on_error=_on_error,
+        on_complete=_on_complete,
+    )
+    return outcomes
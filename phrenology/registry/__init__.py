@@ -1,5 +1,10 @@
 import importlib
 
-owasp_header_dictionary = importlib.import_module(
-    ".owasp-header-dictionary", package=__name__
-)
+
+def __getattr__(name):
+    # The OWASP dictionary is only needed for -o, so it is loaded on first access.
+    if name != "owasp_header_dictionary":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    module = importlib.import_module(".owasp-header-dictionary", package=__name__)
+    globals()[name] = module
+    return module
@@ -48,3 +48,39 @@ CACHE_HEADERS = {
     "result": ["info", "info"],
     "items": ["Cache-Control", "Pragma", "Last-Modified", "Expires", "ETag"],
 }
+
+CATEGORIES = {
+    "expected": EXPECTED_HEADERS,
+    "deprecated": DEPRECATED_HEADERS,
+    "information": INFORMATION_HEADERS,
+    "cache": CACHE_HEADERS,
+}
+
+
+def compile_masks(categories):
+    """
+    Compiles header categories into bitmasks for a case-insensitive classification.
+
+    Every registry header gets one bit, keyed by its lowercase name, so a single pass
+    over the response headers classifies them into every category at once by combining
+    their bits, and each category is then matched against its mask.
+
+    Args:
+        categories (dict): Category keys mapped to header definitions with an "items" list.
+
+    Returns:
+        tuple: The lowercase header names mapped to their bit, and the category keys
+               mapped to the combined bits of their headers.
+    """
+    bits = {}
+    for headers in categories.values():
+        for name in headers["items"]:
+            bits.setdefault(name.lower(), 1 << len(bits))
+    masks = {
+        category: sum({bits[name.lower()] for name in headers["items"]})
+        for category, headers in categories.items()
+    }
+    return bits, masks
+
+
+HEADER_BITS, CATEGORY_MASKS = compile_masks(CATEGORIES)
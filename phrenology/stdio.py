@@ -0,0 +1,136 @@
+#!/bin/env python3
+"""
+Long-lived co-process mode: jobs are read from stdin and answered as JSON lines.
+"""
+
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .common.targets import normalize_target
+
+# Per-job options a JSON job may set, as accepted by Main.fetch() and Main.report().
+JOB_OPTIONS = ("cookie", "get", "cache", "deprecated", "information", "owasp", "analyze")
+
+DEFAULT_OPTIONS = {
+    "cookie": None,
+    "get": False,
+    "cache": False,
+    "deprecated": False,
+    "information": False,
+    "owasp": False,
+    "analyze": False,
+}
+
+
+def parse_job(line, defaults=None):
+    """
+    Parses one input line into a job.
+
+    A line is either a bare target URL, or a JSON object with a "url" key and
+    optionally an "id" that is echoed back in the result and any of the per-job
+    options in JOB_OPTIONS.
+
+    Args:
+        line (str): The input line, without or with its trailing newline.
+        defaults (dict, optional): Values for the options a job does not set.
+
+    Returns:
+        dict: The job, with "url", "id" and every option filled in.
+
+    Raises:
+        ValueError: If the line is a malformed JSON job.
+    """
+    job = dict(DEFAULT_OPTIONS, **(defaults or {}), id=None)
+    line = line.strip()
+    if not line.startswith("{"):
+        job["url"] = line
+        return job
+
+    try:
+        fields = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid job: {e}")
+    if not isinstance(fields, dict) or not isinstance(fields.get("url"), str) or not fields["url"].strip():
+        raise ValueError("Invalid job: a JSON job needs a non-empty 'url' string.")
+    unknown = set(fields) - set(JOB_OPTIONS) - {"url", "id"}
+    if unknown:
+        raise ValueError(f"Invalid job: unknown field(s) {', '.join(sorted(unknown))}.")
+    job.update(fields)
+    job["url"] = job["url"].strip()
+    return job
+
+
+def serve(main, lines, output, defaults=None, workers=1):
+    """
+    Answers jobs from a stream until it is exhausted, writing one result per job.
+
+    A reader thread takes jobs from `lines` as soon as they arrive and hands them
+    to a pool of `workers` threads, so callers can pipeline many jobs without
+    waiting for each answer. Results are rendered on the calling thread in the
+    order the jobs were read, and a job that fails produces an error record
+    instead of ending the session. The Main instance, and with it the pooled
+    connections and the DNS cache, is reused by every job.
+
+    Args:
+        main (Main): The Main instance used for every job.
+        lines (iterable): The input lines, e.g. sys.stdin.
+        output (NdjsonTemplate): The template the results are written to.
+        defaults (dict, optional): Values for the options a job does not set.
+        workers (int, optional): Number of jobs fetched at the same time. Defaults to 1.
+
+    Returns:
+        int: The number of jobs answered.
+    """
+    pending = queue.Queue(maxsize=max(workers, 1) * 4)
+
+    def _fetch(job):
+        return main.fetch(job["url"], job["cookie"], job["get"])
+
+    def _read(executor):
+        try:
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    job = parse_job(line, defaults)
+                except ValueError as e:
+                    pending.put(({"url": line.strip(), "id": None}, e))
+                    continue
+                # Answers are keyed by the same URL whether the job succeeds or fails.
+                job["url"] = normalize_target(job["url"])
+                pending.put((job, executor.submit(_fetch, job)))
+        finally:
+            pending.put(None)
+
+    answered = 0
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as executor:
+        reader = threading.Thread(target=_read, args=(executor,), daemon=True)
+        reader.start()
+        while True:
+            entry = pending.get()
+            if entry is None:
+                break
+            _respond(main, output, *entry)
+            answered += 1
+    return answered
+
+
+def _respond(main, output, job, outcome):
+    """Renders the result of one job, or the error that ended it."""
+    try:
+        if isinstance(outcome, Exception):
+            raise outcome
+        url, headers_model = outcome.result()
+    except (ValueError, RuntimeError) as e:
+        if job["id"] is not None:
+            output.render_output("meta", None, job["url"], None, {"id": job["id"]})
+        output.render_output("error", "Error", job["url"], None, {"message": str(e)})
+        output.render_output("complete", None, job["url"])
+        return
+    if job["id"] is not None:
+        output.render_output("meta", None, url, None, {"id": job["id"]})
+    main.report(
+        url, headers_model, job["cache"], job["deprecated"], job["information"], job["owasp"], job["analyze"]
+    )
@@ -46,7 +46,7 @@ classifiers = [
 ]
 
 # Dependencies (replace with your required packages)
-dependencies = ["requests", "pylint"]
+dependencies = ["requests", "urllib3>=2", "pylint"]
 
 setup(
     name=PROJECT_NAME,
@@ -58,6 +58,6 @@ setup(
     author_email=AUTHOR_EMAIL,
     url=URL,
     # license=license,
-    packages=find_packages(exclude=("tests*",)),  # Exclude test directories
+    packages=find_packages(exclude=("tests*", "benchmarks*")),  # Exclude test and benchmark directories
     install_requires=dependencies,
 )
@@ -0,0 +1,68 @@
+import unittest
+
+from benchmarks.server import StandInServer
+from benchmarks.suite import compare
+from phrenology.component.header import HeaderService
+
+
+def results(scans_per_sec, p99_ms):
+    return {"scenarios": {"main_engage": {"scans_per_sec": scans_per_sec, "p99_ms": p99_ms, "peak_rss_kb": 1000}}}
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_when_a_metric_gets_worse_beyond_the_tolerance_it_is_a_regression(self):
+        """
+        When throughput drops or latency grows by more than the tolerance,
+        the metric should be flagged as a regression.
+        """
+        rows = {row["metric"]: row for row in compare(results(100, 10), results(80, 12), tolerance=0.1)}
+        self.assertTrue(rows["scans_per_sec"]["regression"])
+        self.assertTrue(rows["p99_ms"]["regression"])
+        self.assertFalse(rows["peak_rss_kb"]["regression"])
+
+    def test_when_a_metric_improves_it_is_not_a_regression(self):
+        """
+        When throughput grows and latency drops,
+        no metric should be flagged.
+        """
+        rows = compare(results(100, 10), results(150, 5), tolerance=0.1)
+        self.assertFalse(any(row["regression"] for row in rows))
+
+
+class TestStandInServer(unittest.TestCase):
+
+    def test_when_i_scan_the_server_it_answers_with_the_header_set(self):
+        """
+        When I request a path that does not fail,
+        the server should answer with the configured header set.
+        """
+        with StandInServer("lowercase") as server:
+            service = HeaderService({"method": "HEAD"})
+            service.url = f"{server.url}/target/1"
+            model = service.run_request()
+        self.assertEqual(model.read("X-Frame-Options"), "deny")
+
+    def test_when_a_failure_rate_is_set_the_same_paths_always_fail(self):
+        """
+        When a failure rate is configured,
+        the share of failing paths should match it and be the same on every run.
+        """
+        server = StandInServer(failure_rate=0.2)
+        failing = [path for path in (f"/target/{i}" for i in range(2000)) if server.fails(path)]
+        self.assertAlmostEqual(len(failing) / 2000, 0.2, delta=0.03)
+        self.assertEqual(failing, [path for path in (f"/target/{i}" for i in range(2000)) if server.fails(path)])
+
+    def test_when_i_ask_for_an_unknown_header_set_it_is_rejected(self):
+        """
+        When the header set or failure mode is unknown,
+        creating the server should raise a ValueError.
+        """
+        with self.assertRaises(ValueError):
+            StandInServer("unknown")
+        with self.assertRaises(ValueError):
+            StandInServer(failure="explode")
+
+
+if __name__ == "__main__":
+    unittest.main()
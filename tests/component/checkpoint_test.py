@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+from phrenology.common.checkpoint import Checkpoint
+from phrenology.common.targets import Target
+
+SOURCE = "/data/targets.txt"
+
+
+class BaseTestCheckpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "scan.journal")
+        self.targets = [Target(f"host{i}.com", i * 10) for i in range(6)]
+
+    def open(self, source=SOURCE):
+        checkpoint = Checkpoint(self.path, source)
+        self.addCleanup(checkpoint._file.close)
+        return checkpoint
+
+    def remaining(self, checkpoint):
+        """Returns the targets a resumed run would still scan."""
+        unread = [target for target in self.targets if target.offset >= checkpoint.resume_offset]
+        return list(checkpoint.track(unread))
+
+
+class TestCheckpoint(BaseTestCheckpoint):
+
+    def test_when_i_start_a_new_journal_every_target_is_scanned(self):
+        """
+        When the journal does not exist yet,
+        the scan should start at the beginning and keep every target.
+        """
+        checkpoint = self.open()
+        self.assertEqual(checkpoint.resume_offset, 0)
+        self.assertEqual(self.remaining(checkpoint), self.targets)
+
+    def test_when_i_resume_only_unfinished_targets_are_scanned(self):
+        """
+        When a scan stops with targets completed out of order,
+        the resumed scan should start at the first unfinished target and skip the finished ones after it.
+        """
+        checkpoint = self.open()
+        for target in checkpoint.track(self.targets):
+            if target.offset in (0, 10, 30):
+                checkpoint.record(target)
+        checkpoint.close()
+
+        resumed = self.open()
+        self.assertEqual(resumed.resume_offset, 20)
+        self.assertEqual(self.remaining(resumed), [self.targets[2], self.targets[4], self.targets[5]])
+
+    def test_when_the_journal_holds_marks_they_advance_the_resume_offset(self):
+        """
+        When more targets complete than the mark interval,
+        a resume mark should be written without waiting for the journal to close.
+        """
+        checkpoint = self.open()
+        checkpoint.mark_interval = 2
+        for target in checkpoint.track(self.targets[:4]):
+            checkpoint.record(target)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertIn("@30\n", f.read())
+
+    def test_when_the_last_line_is_torn_it_is_ignored(self):
+        """
+        When the journal ends with a partially written record,
+        that record should be ignored.
+        """
+        checkpoint = self.open()
+        checkpoint.close()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("0\n@2")
+
+        resumed = self.open()
+        self.assertEqual(resumed.resume_offset, 0)
+        self.assertEqual(self.remaining(resumed), self.targets[1:])
+
+    def test_when_the_journal_belongs_to_another_input_it_is_rejected(self):
+        """
+        When the journal was written for a different target file,
+        opening it should raise a ValueError.
+        """
+        self.open().close()
+        with self.assertRaises(ValueError):
+            self.open("/data/other.txt")
+
+
+if __name__ == "__main__":
+    unittest.main()
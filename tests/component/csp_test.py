@@ -0,0 +1,134 @@
+import contextlib
+import io
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from phrenology import Main
+from phrenology.common import render
+from phrenology.component.csp import CspAnalyzer, analyze_policy, parse_policy
+
+BASELINE = (
+    "default-src 'self'; form-action 'self'; base-uri 'self'; object-src 'none'; "
+    "frame-ancestors 'none'; upgrade-insecure-requests"
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Security-Policy", "script-src 'self' 'unsafe-inline'; object-src 'none'")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def issues(analysis):
+    return [(severity, directive) for severity, directive, _ in analysis.findings]
+
+
+class TestCspAnalysis(unittest.TestCase):
+
+    def test_when_i_parse_a_policy_directives_and_sources_are_split(self):
+        """
+        When I parse a header holding two policies,
+        each policy should list its lowercased directives with their sources in order.
+        """
+        self.assertEqual(
+            parse_policy("Script-Src 'self' cdn.example.com;; img-src *, default-src 'none'"),
+            (
+                (("script-src", ("'self'", "cdn.example.com")), ("img-src", ("*",))),
+                (("default-src", ("'none'",)),),
+            ),
+        )
+
+    def test_when_the_policy_follows_the_owasp_baseline_it_scores_full_marks(self):
+        """
+        When I analyse the OWASP recommended policy,
+        there should be no findings and the policy should get an A.
+        """
+        analysis = analyze_policy(BASELINE)
+        self.assertEqual(analysis.findings, ())
+        self.assertEqual((analysis.score, analysis.grade), (100, "A"))
+
+    def test_when_scripts_are_unrestricted_the_weaknesses_are_flagged(self):
+        """
+        When script-src allows inline scripts, eval and any https: URL,
+        each weakness should be flagged, most severe first, and the score should drop.
+        """
+        analysis = analyze_policy(BASELINE.replace("default-src 'self'", "script-src 'unsafe-inline' 'unsafe-eval' https:"))
+        self.assertEqual(issues(analysis), [("high", "script-src"), ("high", "script-src"), ("medium", "script-src")])
+        self.assertEqual((analysis.score, analysis.grade), (40, "F"))
+
+    def test_when_a_nonce_is_present_unsafe_inline_is_ignored(self):
+        """
+        When 'unsafe-inline' is combined with a nonce,
+        it should not be flagged, since browsers supporting nonces ignore it.
+        """
+        analysis = analyze_policy(BASELINE.replace("default-src 'self'", "script-src 'nonce-r4nd0m' 'unsafe-inline'"))
+        self.assertEqual(analysis.findings, ())
+
+    def test_when_one_of_two_policies_covers_a_weakness_it_is_not_reported(self):
+        """
+        When a header holds two policies and only the first lacks base-uri,
+        base-uri should not be flagged because the browser enforces both.
+        """
+        analysis = analyze_policy(BASELINE.replace("base-uri 'self'; ", "") + ", base-uri 'none'; script-src 'self'")
+        self.assertNotIn(("medium", "base-uri"), issues(analysis))
+
+    def test_when_a_policy_repeats_the_cache_answers(self):
+        """
+        When the analyzer sees the same policy twice,
+        the second analysis should come from the cache, and old policies should be evicted.
+        """
+        analyzer = CspAnalyzer(maxsize=2)
+        first = analyzer.analyze(BASELINE)
+        self.assertIs(analyzer.analyze(BASELINE), first)
+        analyzer.analyze("default-src 'self'")
+        analyzer.analyze("default-src 'none'")
+        self.assertEqual(analyzer.snapshot(), {"hits": 1, "misses": 3, "entries": 2})
+        self.assertIsNot(analyzer.analyze(BASELINE), first)
+
+
+class TestMainAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def test_when_i_analyze_a_target_the_policy_is_scored_in_json(self):
+        """
+        When I scan a target with analysis enabled,
+        the JSON output should carry the CSP score and findings.
+        """
+        output = render.JsonTemplate()
+        main = Main(output, {"method": "HEAD"})
+        main.engage(self.url, None, False, False, False, False, True, analyze=True)
+        main.close()
+        analysis = output.results[self.url]["analysis"]["Content-Security-Policy"]
+        self.assertEqual(analysis["findings"][0]["issue"].split()[0], "'unsafe-inline'")
+        self.assertEqual(analysis["policies"], [{"script-src": ["'self'", "'unsafe-inline'"], "object-src": ["'none'"]}])
+
+    def test_when_i_analyze_a_target_the_text_output_lists_findings(self):
+        """
+        When I scan a target with analysis enabled and text output,
+        the score and every finding should be printed.
+        """
+        main = Main(render.Template(), {"method": "HEAD"})
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout):
+            main.engage(self.url, None, False, False, False, False, False, analyze=True)
+        main.close()
+        self.assertIn("grade", stdout.getvalue())
+        self.assertIn("High: script-src: 'unsafe-inline'", stdout.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,143 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from phrenology import Main
+from phrenology.common.diff import Baseline, DiffTemplate, diff
+from phrenology.component import Header
+
+
+def _result(**headers):
+    return {"Expected headers": {"counts": {"expected": len(headers)}, "expected": headers, "present": {"Date": "now"}}}
+
+
+class TestDiff(unittest.TestCase):
+
+    def test_when_headers_change_only_the_differences_are_reported(self):
+        """
+        When a target adds, removes and changes headers since the baseline,
+        each difference should be reported, while volatile values and unchanged targets are not.
+        """
+        before = {"x-frame-options": "DENY", "server": "nginx", "expires": "Mon", "referrer-policy": "no-referrer"}
+        now = {"x-frame-options": "SAMEORIGIN", "expires": "Tue", "referrer-policy": "no-referrer", "strict-transport-security": "max-age=1"}
+
+        self.assertEqual(
+            diff((before, None), now),
+            {
+                "change": "changed",
+                "added": {"strict-transport-security": "max-age=1"},
+                "removed": {"server": "nginx"},
+                "changed": {"x-frame-options": {"from": "DENY", "to": "SAMEORIGIN"}},
+            },
+        )
+        self.assertIsNone(diff((before, None), dict(before, expires="Wed")))
+
+    def test_when_a_target_fails_only_new_failures_are_reported(self):
+        """
+        When a target fails, it should be reported unless it already failed in the baseline,
+        and a target that works again should be reported as recovered.
+        """
+        self.assertEqual(diff(({}, None), {}, "refused"), {"change": "failed", "error": "refused"})
+        self.assertEqual(diff(None, {}, "refused"), {"change": "failed", "error": "refused"})
+        self.assertIsNone(diff(({}, "timed out"), {}, "refused"))
+        self.assertEqual(diff(({}, "refused"), {"server": "nginx"}), {"change": "recovered", "added": {"server": "nginx"}})
+        self.assertEqual(diff(None, {"server": "nginx"}), {"change": "new", "added": {"server": "nginx"}})
+
+
+class TestDiffTemplate(unittest.TestCase):
+
+    def test_when_i_scan_against_a_baseline_only_changed_targets_are_written(self):
+        """
+        When results are rendered against a baseline loaded from a JSON document,
+        only the targets that changed should be written, one JSON line each.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "previous.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"https://same.com": _result(**{"X-Frame-Options": "DENY"}), "https://down.com": {"error": "refused"}}, f)
+            baseline = Baseline.load(path)
+        self.assertEqual(len(baseline), 2)
+
+        stream = io.StringIO()
+        output = DiffTemplate(stream, baseline)
+        for url, headers in (("https://same.com", {"X-Frame-Options": "DENY"}), ("https://down.com", {"X-Frame-Options": "DENY"})):
+            output.render_output("list", "Expected headers", url, None, {"expected": headers, "present": {"Date": url}, "missing": {}})
+            output.render_output("counts", "Expected headers", url, None, {"expected": 1, "missing": 0})
+            output.render_output("complete", None, url)
+        output.dump()
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(records, [{"url": "https://down.com", "change": "recovered", "added": {"x-frame-options": "DENY"}}])
+        self.assertEqual((output.changed, output.unchanged), (1, 1))
+
+    def test_when_the_category_flags_differ_only_shared_categories_are_compared(self):
+        """
+        When the baseline was scanned with --cache and the current scan without it, or the other way round,
+        the cache headers should not be reported as removed or added, while a change in a shared category still is.
+        """
+        cached = dict(
+            _result(**{"X-Frame-Options": "DENY"}),
+            **{"Cacheing headers": {"counts": {"expected": 1}, "expected": {"Cache-Control": "no-store"}}},
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "previous.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"https://cached.com": cached, "https://plain.com": _result(**{"X-Frame-Options": "DENY"})}, f)
+            baseline = Baseline.load(path)
+
+        stream = io.StringIO()
+        output = DiffTemplate(stream, baseline)
+        scans = (
+            ("https://cached.com", {"Expected headers": {"X-Frame-Options": "SAMEORIGIN"}}),
+            ("https://plain.com", {"Expected headers": {"X-Frame-Options": "DENY"}, "Cacheing headers": {"Pragma": "no-cache"}}),
+        )
+        for url, blocks in scans:
+            for title, headers in blocks.items():
+                output.render_output("list", title, url, None, {"expected": headers, "present": {}, "missing": {}})
+                output.render_output("counts", title, url, None, {"expected": len(headers), "missing": 0})
+            output.render_output("complete", None, url)
+        output.dump()
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(records, [
+            {"url": "https://cached.com", "change": "changed", "changed": {"x-frame-options": {"from": "DENY", "to": "SAMEORIGIN"}}},
+        ])
+        self.assertEqual((output.changed, output.unchanged), (1, 1))
+
+    def test_when_a_bare_domain_recovers_it_is_reported_as_recovered(self):
+        """
+        When a target listed as a bare domain fails in one scan and answers in the next,
+        it should be reported as recovered rather than as a new target.
+        """
+        stream = io.StringIO()
+        output = DiffTemplate(stream, follow=True)
+        main = Main(output, {"method": "HEAD"})
+        self.addCleanup(main.close)
+
+        def on_error(url, e):
+            output.render_output("error", "Error", url, None, {"message": str(e)})
+            output.render_output("complete", None, url)
+
+        answers = iter([RuntimeError("Connection refused"), {"X-Frame-Options": "DENY"}])
+
+        def fetch(url, cookie=None, get=False):
+            answer = next(answers)
+            if isinstance(answer, Exception):
+                raise answer
+            return url, Header.Model(answer)
+
+        with patch.object(main, "fetch", side_effect=fetch):
+            for _ in range(2):
+                main.engage_all(["example.com"], None, False, False, False, False, True, on_error=on_error)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([(record["url"], record["change"]) for record in records], [
+            ("https://example.com", "failed"), ("https://example.com", "recovered"),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from phrenology.component.csp import CspAnalyzer
+from phrenology.component.grading import Grader
+from phrenology.component.header import HeaderModel
+
+
+def ratings(grader, header, values):
+    return [grader.grade(header, value).rating for value in values]
+
+
+class TestGrader(unittest.TestCase):
+
+    def setUp(self):
+        self.grader = Grader()
+
+    def test_when_hsts_is_graded_lifetime_and_subdomains_are_checked(self):
+        """
+        When I grade Strict-Transport-Security values,
+        the recommended value should be good, a short or missing lifetime weak or bad.
+        """
+        self.assertEqual(
+            ratings(self.grader, "strict-transport-security", [
+                "max-age=63072000; includeSubDomains; preload",
+                "max-age=300; includeSubDomains",
+                "max-age=0",
+                "includeSubDomains",
+            ]),
+            ["good", "weak", "bad", "bad"],
+        )
+
+    def test_when_keyword_headers_are_graded_weaker_keywords_are_flagged(self):
+        """
+        When I grade single keyword headers,
+        the recommended keyword should be good, a weaker one weak and an invalid one bad.
+        """
+        self.assertEqual(ratings(self.grader, "X-Frame-Options", ["DENY", "SAMEORIGIN", "yes"]), ["good", "weak", "bad"])
+        self.assertEqual(ratings(self.grader, "X-Content-Type-Options", ["nosniff", "sniff"]), ["good", "bad"])
+        self.assertEqual(
+            ratings(self.grader, "Cross-Origin-Opener-Policy", ["same-origin", "unsafe-none"]), ["good", "weak"]
+        )
+
+    def test_when_referrer_policy_lists_fallbacks_the_last_known_one_counts(self):
+        """
+        When a Referrer-Policy lists several policies,
+        the last one a browser understands should be graded.
+        """
+        self.assertEqual(
+            ratings(self.grader, "Referrer-Policy", ["no-referrer", "unsafe-url, no-referrer", "no-referrer, unsafe-url"]),
+            ["good", "good", "bad"],
+        )
+
+    def test_when_a_header_has_no_check_it_is_not_graded(self):
+        """
+        When I grade a header without a value check,
+        no grade should be returned.
+        """
+        self.assertIsNone(self.grader.grade("Server", "nginx"))
+
+    def test_when_a_batch_repeats_values_each_is_checked_once(self):
+        """
+        When I grade a batch of responses sharing the same values,
+        every response should get its grades but each distinct value should be checked once.
+        """
+        models = [
+            HeaderModel({"X-Frame-Options": "deny", "Server": "nginx"}),
+            HeaderModel({"x-frame-options": "deny", "Referrer-Policy": "origin"}),
+            HeaderModel({"X-Frame-Options": "deny"}),
+        ]
+        graded = self.grader.grade_batch(models)
+        self.assertEqual([sorted(grades) for grades in graded], [
+            ["X-Frame-Options"], ["Referrer-Policy", "X-Frame-Options"], ["X-Frame-Options"],
+        ])
+        self.assertIs(graded[0]["X-Frame-Options"], graded[2]["X-Frame-Options"])
+        self.assertEqual(self.grader.snapshot()["misses"], 2)
+        self.grader.grade_model(models[1])
+        self.assertEqual(self.grader.snapshot()["hits"], 2)
+
+    def test_when_a_policy_is_graded_the_shared_analyzer_analyses_it(self):
+        """
+        When I grade a Content-Security-Policy with a grader sharing an analyzer,
+        the policy should be analysed by that analyzer once and its score rendered with the grade.
+        """
+        analyzer = CspAnalyzer()
+        grader = Grader(csp_analyzer=analyzer)
+        grade = grader.grade("Content-Security-Policy", "script-src 'unsafe-inline'")
+        self.assertEqual(grade.rating, "bad")
+        self.assertEqual(grade.as_dict()["score"], analyzer.analyze("script-src 'unsafe-inline'").score)
+        self.assertEqual(analyzer.snapshot()["misses"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
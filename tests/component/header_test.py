@@ -1,8 +1,14 @@
+import asyncio
 import socket
+import threading
 import unittest
-from unittest.mock import patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from phrenology.component import Header
+from phrenology.component.header import _parse_head, _ssl_context
+from phrenology.component.resolver import Resolver
+from phrenology.registry.headers import CATEGORIES
 
 
 class BaseTestHeaderService(unittest.TestCase):
@@ -457,12 +463,177 @@ class TestRunRequestResolvesHostname(BaseTestHeaderService):
         naming the hostname and suggesting the user check for typos.
         """
         self.service.url = "https://this-domain-does-not-exist.invalid"
-        with patch("socket.gethostbyname", side_effect=socket.gaierror):
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror):
             with self.assertRaises(RuntimeError) as context:
                 self.service.run_request()
         self.assertIn("this-domain-does-not-exist.invalid", str(context.exception))
         self.assertIn("typos", str(context.exception))
 
 
+class TestFinishResponse(BaseTestHeaderService):
+    """Tests for releasing streamed responses without downloading their bodies."""
+
+    def make_response(self, length, body=b""):
+        response = MagicMock(status_code=200, reason="OK")
+        response.headers = {"Content-Length": str(length)}
+        response.raw.read.return_value = body
+        return response
+
+    def test_when_the_body_is_small_it_is_drained_and_the_connection_reused(self):
+        """
+        When a GET response declares a small body,
+        the body should be read and the connection handed back to the pool.
+        """
+        response = self.make_response(5, b"hello")
+        received = self.service._finish_response(response)
+        response.raw.release_conn.assert_called_once()
+        response.close.assert_not_called()
+        self.assertGreater(received, 5)
+
+    def test_when_the_body_is_large_the_connection_is_closed_unread(self):
+        """
+        When a GET response declares a body above the drain limit,
+        the body should not be read and the connection should be closed.
+        """
+        response = self.make_response(10 * 1024 * 1024)
+        self.service._finish_response(response)
+        response.raw.read.assert_not_called()
+        response.close.assert_called_once()
+
+
+class TestAsyncRunRequest(BaseTestHeaderService):
+    """Tests for the asyncio based header service."""
+
+    def setUp(self):
+        super().setUp()
+        self.service = Header.AsyncService(config=self.config)
+        self.service.url = "https://example.com"
+
+    def test_when_the_response_is_ok_a_header_model_is_returned(self):
+        """
+        When the server answers with a 200,
+        run_request should return a HeaderModel holding the response headers.
+        """
+        head = AsyncMock(return_value=(200, "OK", {"X-Frame-Options": "deny"}, 64))
+        with patch.object(self.service, "_fetch_head", head):
+            model = asyncio.run(self.service.run_request())
+        self.assertEqual(model.read("X-Frame-Options"), "deny")
+        self.assertEqual(model.bytes_received, 64)
+
+    def test_when_the_response_is_an_error_a_runtime_error_is_raised(self):
+        """
+        When the server answers with a 404,
+        run_request should raise RuntimeError the same way HeaderService does.
+        """
+        head = AsyncMock(return_value=(404, "Not Found", {}, 32))
+        with patch.object(self.service, "_fetch_head", head):
+            with self.assertRaises(RuntimeError) as context:
+                asyncio.run(self.service.run_request())
+        self.assertIn("404 Client Error", str(context.exception))
+
+    def test_when_a_header_is_repeated_the_values_are_joined(self):
+        """
+        When a response repeats a header,
+        the parsed headers should join the values with a comma like requests does.
+        """
+        status, reason, headers = _parse_head(
+            b"HTTP/1.1 200 OK\r\nSet-Cookie: a=1\r\nset-cookie: b=2\r\n\r\n"
+        )
+        self.assertEqual((status, reason), (200, "OK"))
+        self.assertEqual(headers, {"Set-Cookie": "a=1, b=2"})
+
+    def test_when_several_targets_are_scanned_they_share_the_dns_cache(self):
+        """
+        When several async services share a Resolver,
+        the hostname should be looked up once and answered from the cache afterwards.
+        """
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("X-Frame-Options", "deny")
+                self.end_headers()
+
+            do_GET = do_HEAD
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        resolver = Resolver()
+        for _ in range(2):
+            service = Header.AsyncService(config=self.config, resolver=resolver)
+            service.url = f"http://127.0.0.1:{server.server_port}/"
+            model = asyncio.run(service.run_request())
+            self.assertEqual(model.read("X-Frame-Options"), "deny")
+        self.assertEqual((resolver.misses, resolver.hits), (1, 1))
+
+    def test_when_the_ssl_settings_repeat_the_context_is_reused(self):
+        """
+        When connections use the same verify and cert settings,
+        they should share one SSL context instead of loading the CA bundle again.
+        """
+        self.assertIs(_ssl_context(True, None), _ssl_context(True, None))
+        self.assertIsNot(_ssl_context(True, None), _ssl_context(False, None))
+        self.assertFalse(_ssl_context(False, None).check_hostname)
+
+
+
+class TestHeaderModel(unittest.TestCase):
+
+    def setUp(self):
+        self.model = Header.Model(
+            {"x-frame-options": "deny", "PRAGMA": "no-cache", "Server": "nginx", "X-Custom": "1"}
+        )
+
+    def test_when_a_server_sends_lowercase_names_they_are_still_found(self):
+        """
+        When the response uses a different casing than the registry,
+        read and query should still find the header.
+        """
+        self.assertEqual(self.model.read("X-Frame-Options"), "deny")
+        self.model.query(["X-Frame-Options", "Referrer-Policy"])
+        self.assertEqual(self.model.expected, {"X-Frame-Options": "deny"})
+        self.assertEqual(self.model.missing, {"Referrer-Policy": None})
+
+    def test_when_a_header_is_listed_in_two_categories_both_selections_find_it(self):
+        """
+        When a header belongs to several registry categories,
+        selecting each of those categories should report it.
+        """
+        for category in ("deprecated", "cache"):
+            with self.subTest(category=category):
+                self.model.select(category)
+                self.assertEqual(self.model.expected.get("Pragma"), "no-cache")
+        self.model.select("information")
+        self.assertEqual(self.model.expected, {"Server": "nginx"})
+
+    def test_when_i_select_a_category_it_matches_querying_its_items(self):
+        """
+        When I select a registry category,
+        the result should be the same as querying that category's items.
+        """
+        for category, headers in CATEGORIES.items():
+            with self.subTest(category=category):
+                counts = self.model.select(category)
+                selected = (self.model.expected, self.model.missing, self.model.present)
+                self.assertEqual(self.model.query(headers["items"]), counts)
+                self.assertEqual((self.model.expected, self.model.missing, self.model.present), selected)
+
+
+    def test_when_i_build_many_models_they_share_header_names(self):
+        """
+        When several models hold the same header,
+        they should share one copy of its name and carry no per-instance dict.
+        """
+        other = Header.Model({"Server": "apache"})
+        self.assertIs(other._names[0], self.model._names[2])
+        self.assertFalse(hasattr(self.model, "__dict__"))
+
+
 if __name__ == "__main__":
     unittest.main()
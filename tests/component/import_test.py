@@ -0,0 +1,84 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# The command line script, loaded as a module so it imports everything it needs before
+# parsing its arguments without running a scan.
+CLI = os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, "phrenology.py")
+
+# Modules that must only be loaded once they are actually needed.
+DEFERRED_MODULES = [
+    "requests",
+    "urllib3",
+    "asyncio",
+    "phrenology.registry.owasp-header-dictionary",
+    # --metrics-file and --metrics-port
+    "phrenology.common.metrics",
+    "http.server",
+    # --profile
+    "phrenology.common.profiling",
+    "cProfile",
+    "pstats",
+    # --sqlite, --since and --monitor
+    "phrenology.common.store",
+    "phrenology.common.diff",
+    "phrenology.monitor",
+    "sqlite3",
+]
+
+# Seconds the startup imports may take. Measured at about 0.02 s; the budget leaves
+# room for slow CI machines while still catching an eager import of requests.
+IMPORT_BUDGET = 0.1
+
+PROBE = f"""
+import importlib.util, json, sys, time
+started = time.perf_counter()
+spec = importlib.util.spec_from_file_location("phrenology_cli", {os.path.abspath(CLI)!r})
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {DEFERRED_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+class TestStartupImports(unittest.TestCase):
+
+    def probe(self):
+        result = subprocess.run(
+            [sys.executable, "-c", PROBE], capture_output=True, text=True, check=True, cwd=os.path.dirname(CLI)
+        )
+        return json.loads(result.stdout)
+
+    def test_when_the_cli_starts_heavy_modules_are_not_imported(self):
+        """
+        When the CLI imports the modules it needs to parse its arguments,
+        requests, urllib3, asyncio, the OWASP dictionary and the modules of optional
+        features such as metrics, profiling and SQLite should not be loaded.
+        """
+        self.assertEqual(self.probe()["loaded"], [])
+
+    def test_when_the_cli_starts_imports_stay_within_budget(self):
+        """
+        When the CLI imports the modules it needs to parse its arguments,
+        the imports should finish within the import-time budget.
+        """
+        self.assertLess(min(self.probe()["elapsed"] for _ in range(3)), IMPORT_BUDGET)
+
+    def test_when_i_use_a_lazy_attribute_it_is_imported(self):
+        """
+        When I access a lazily imported attribute,
+        it should be loaded and behave as before.
+        """
+        import phrenology
+        from phrenology.component import Header
+
+        self.assertEqual(phrenology.Main.__name__, "Main")
+        self.assertEqual(Header.Model.__name__, "HeaderModel")
+        self.assertIn("X-Frame-Options", phrenology.registry.owasp_header_dictionary.expected_security_responses)
+        with self.assertRaises(AttributeError):
+            phrenology.missing
+
+
+if __name__ == "__main__":
+    unittest.main()
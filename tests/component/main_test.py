@@ -0,0 +1,178 @@
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from phrenology import Main
+from phrenology.component import Header
+from phrenology.component.timeout import TargetTimeout, TimeoutPolicy
+
+
+class RecordingOutput:
+    """Output double that records the url of every rendered list block."""
+
+    def __init__(self):
+        self.urls = []
+
+    def render_output(self, output_type, name=None, url=None, result=None, data=None):
+        if output_type == "list" and name == "Expected headers":
+            self.urls.append(url)
+
+
+def fake_fetch(url, cookie=None, get=False):
+    """Returns a canned HeaderModel, sleeping longer for earlier targets."""
+    if "bad" in url:
+        raise RuntimeError(f"Could not resolve '{url}'.")
+    time.sleep(0.05 if url.endswith("0.com") else 0)
+    return url, Header.Model({"X-Frame-Options": "deny"})
+
+
+class BaseTestMain(unittest.TestCase):
+
+    def setUp(self):
+        self.output = RecordingOutput()
+        self.main = Main(self.output, {"method": "HEAD"})
+        self.urls = [f"https://host{i}.com" for i in range(8)]
+
+
+class TestEngageAll(BaseTestMain):
+
+    def test_when_i_scan_with_workers_results_keep_input_order(self):
+        """
+        When I scan a list of URLs with several workers,
+        the results should be rendered in the same order as the input.
+        """
+        with patch.object(self.main, "fetch", side_effect=fake_fetch):
+            self.main.engage_all(self.urls, None, False, False, False, False, False, workers=4)
+        self.assertEqual(self.output.urls, self.urls)
+
+    def test_when_i_scan_unordered_every_result_is_rendered(self):
+        """
+        When I scan a list of URLs unordered,
+        every URL should still be rendered exactly once.
+        """
+        with patch.object(self.main, "fetch", side_effect=fake_fetch):
+            self.main.engage_all(
+                self.urls, None, False, False, False, False, False, workers=4, ordered=False
+            )
+        self.assertEqual(sorted(self.output.urls), sorted(self.urls))
+
+    def test_when_a_target_fails_the_error_handler_is_called(self):
+        """
+        When one target fails,
+        on_error should receive it and the remaining targets should still be rendered.
+        """
+        errors = []
+        urls = ["https://good1.com", "https://bad.com", "https://good2.com"]
+        with patch.object(self.main, "fetch", side_effect=fake_fetch):
+            self.main.engage_all(
+                urls,
+                None,
+                False,
+                False,
+                False,
+                False,
+                False,
+                workers=2,
+                on_error=lambda url, e: errors.append(url),
+            )
+        self.assertEqual(errors, ["https://bad.com"])
+        self.assertEqual(self.output.urls, ["https://good1.com", "https://good2.com"])
+
+    def test_when_targets_finish_the_completion_handler_is_called(self):
+        """
+        When targets succeed or fail,
+        on_complete should be called once for each of them after it was handled.
+        """
+        completed = []
+        urls = ["https://good1.com", "https://bad.com", "https://good2.com"]
+        with patch.object(self.main, "fetch", side_effect=fake_fetch):
+            self.main.engage_all(
+                urls,
+                None,
+                False,
+                False,
+                False,
+                False,
+                False,
+                workers=2,
+                on_error=lambda url, e: None,
+                on_complete=completed.append,
+            )
+        self.assertEqual(completed, urls)
+
+
+class TestAnalyze(BaseTestMain):
+
+    def test_when_i_scan_with_analysis_finished_targets_are_graded_together(self):
+        """
+        When I scan targets serving the same policy with analysis enabled,
+        every target should be graded, through batches, and the policy analysed only once.
+        """
+        analyses = []
+        self.output.render_output = lambda output_type, name=None, url=None, result=None, data=None: (
+            analyses.append((url, data["score"])) if output_type == "analysis" and name == "Content-Security-Policy" else None
+        )
+
+        def fetch(url, cookie=None, get=False):
+            return url, Header.Model({"Content-Security-Policy": "default-src 'self'"})
+
+        with patch.object(self.main, "fetch", side_effect=fetch), patch.object(
+            self.main.grader, "grade_batch", wraps=self.main.grader.grade_batch
+        ) as grade_batch:
+            self.main.engage_all(self.urls, None, False, False, False, False, False, workers=4, analyze=True)
+
+        self.assertEqual([url for url, _ in analyses], self.urls)
+        self.assertEqual(sum(len(call.args[0]) for call in grade_batch.call_args_list), len(self.urls))
+        self.assertEqual(self.main.stats()["csp"]["misses"], 1)
+
+
+class _TricklingHandler(BaseHTTPRequestHandler):
+    """Sends one header line every half second, so no single read ever times out."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response_only(200)
+        self.end_headers()
+        self.wfile.flush()
+        try:
+            for i in range(40):
+                self.wfile.write(f"X-Trickle-{i}: {i}\r\n".encode("ascii"))
+                self.wfile.flush()
+                time.sleep(0.5)
+        except OSError:
+            pass
+
+    def end_headers(self):
+        # Sends the status line without the blank line that ends the head.
+        self.wfile.write(b"".join(self._headers_buffer))
+        self._headers_buffer = []
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class TestTargetTimeout(unittest.TestCase):
+
+    def test_when_a_server_trickles_its_headers_the_total_budget_ends_the_target(self):
+        """
+        When a server sends its headers slowly enough that no read times out,
+        the target should still fail with TargetTimeout once its total budget has passed.
+        """
+        server = ThreadingHTTPServer(("127.0.0.1", 0), _TricklingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        main = Main(RecordingOutput(), {"method": "HEAD"}, timeouts=TimeoutPolicy(read=1, total=2))
+        self.addCleanup(main.close)
+
+        started = time.monotonic()
+        with self.assertRaises(TargetTimeout):
+            main.fetch(f"http://127.0.0.1:{server.server_port}/")
+        self.assertLess(time.monotonic() - started, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from phrenology.common.merge import iter_document, merge, read_results
+
+RESULTS = {
+    "https://one.com": {"security": {"counts": {"expected": 9, "missing": 2}}, "meta": {"status": 200}},
+    "https://two.com": {"error": "Connection refused"},
+    "https://three.com": {"meta": {"status": 301, "bytes_received": 1234.5}},
+}
+
+
+class TestMerge(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write_ndjson(self, name, results, opener=open):
+        path = os.path.join(self.directory.name, name)
+        with opener(path, "wt", encoding="utf-8") as f:
+            for url, result in results.items():
+                f.write(json.dumps(dict({"url": url}, **result)) + "\n")
+        return path
+
+    def write_json(self, name, results):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(results, indent=2) + "\n")
+        return path
+
+    def test_when_i_read_either_format_the_same_results_come_out(self):
+        """
+        When I read the same results written as JSON, JSON Lines and gzip compressed JSON Lines,
+        every reader should yield the URLs in order with the "url" key removed.
+        """
+        paths = [
+            self.write_json("results.json", RESULTS),
+            self.write_ndjson("results.ndjson", RESULTS),
+            self.write_ndjson("results.ndjson.gz", RESULTS, gzip.open),
+        ]
+        for path in paths:
+            self.assertEqual(dict(read_results(path)), RESULTS)
+            self.assertEqual([url for url, _ in read_results(path)], list(RESULTS))
+
+    def test_when_a_document_is_read_in_tiny_chunks_values_are_still_complete(self):
+        """
+        When a JSON document is read a few characters at a time,
+        values split across chunks, numbers included, should be decoded whole.
+        """
+        stream = io.StringIO(json.dumps(RESULTS))
+        self.assertEqual(dict(iter_document(stream, chunk_size=3)), RESULTS)
+
+    def test_when_i_merge_shards_the_json_output_matches_a_single_run(self):
+        """
+        When I merge shards into a JSON document,
+        it should be formatted exactly like the -j output of one run over every target.
+        """
+        first = self.write_ndjson("1.ndjson", {"https://one.com": RESULTS["https://one.com"]})
+        second = self.write_json("2.json", {url: RESULTS[url] for url in ("https://two.com", "https://three.com")})
+        empty = self.write_ndjson("3.ndjson", {})
+        output = io.StringIO()
+        self.assertEqual(merge([first, second, empty], output, json_document=True), 3)
+        self.assertEqual(output.getvalue(), json.dumps(RESULTS, indent=2) + "\n")
+
+    def test_when_a_shard_is_truncated_the_merge_fails(self):
+        """
+        When a JSON shard was cut off in the middle of a result,
+        merging it should raise a ValueError.
+        """
+        path = os.path.join(self.directory.name, "broken.json")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(RESULTS, indent=2)[:-40])
+        with self.assertRaises(ValueError):
+            merge([path], io.StringIO())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import os
+import socket
+import tempfile
+import threading
+import unittest
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+from phrenology import Main
+from phrenology.common import render
+from phrenology.common.metrics import HttpExporter, Metrics, TextfileExporter
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("X-Frame-Options", "deny")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_when_i_render_counters_they_use_the_text_format(self):
+        """
+        When I increment a counter with and without labels,
+        the rendered metrics should carry its HELP and TYPE lines and one sample per label set.
+        """
+        metrics = Metrics()
+        metrics.inc("phrenology_targets_completed_total", 3)
+        metrics.inc("phrenology_targets_failed_total", error="TimeoutError")
+        text = metrics.render()
+        self.assertIn("# TYPE phrenology_targets_completed_total counter\n", text)
+        self.assertIn("phrenology_targets_completed_total 3\n", text)
+        self.assertIn('phrenology_targets_failed_total{error="TimeoutError"} 1\n', text)
+
+    def test_when_i_observe_a_duration_the_histogram_is_cumulative(self):
+        """
+        When I observe durations,
+        every bucket should count the observations at or below its bound.
+        """
+        metrics = Metrics()
+        metrics.observe("phrenology_request_duration_seconds", 0.02)
+        metrics.observe("phrenology_request_duration_seconds", 3)
+        text = metrics.render()
+        self.assertIn('phrenology_request_duration_seconds_bucket{le="0.01"} 0\n', text)
+        self.assertIn('phrenology_request_duration_seconds_bucket{le="0.025"} 1\n', text)
+        self.assertIn('phrenology_request_duration_seconds_bucket{le="+Inf"} 2\n', text)
+        self.assertIn("phrenology_request_duration_seconds_count 2\n", text)
+
+
+class TestExporters(unittest.TestCase):
+
+    def test_when_i_export_to_a_textfile_it_holds_the_current_metrics(self):
+        """
+        When I close a textfile exporter,
+        the file should hold the final metrics and no temporary file should be left behind.
+        """
+        metrics = Metrics()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "phrenology.prom")
+            exporter = TextfileExporter(metrics, path, interval=60).start()
+            metrics.inc("phrenology_targets_completed_total")
+            exporter.close()
+            with open(path, encoding="utf-8") as f:
+                self.assertIn("phrenology_targets_completed_total 1\n", f.read())
+            self.assertEqual(os.listdir(directory), ["phrenology.prom"])
+
+    def test_when_prometheus_scrapes_the_http_exporter_it_gets_the_metrics(self):
+        """
+        When I request /metrics from the HTTP exporter,
+        the response should be the rendered metrics.
+        """
+        metrics = Metrics()
+        metrics.inc("phrenology_targets_completed_total", 2)
+        exporter = HttpExporter(metrics, 0).start()
+        self.addCleanup(exporter.close)
+        with urllib.request.urlopen(f"http://127.0.0.1:{exporter.port}/metrics", timeout=5) as response:
+            self.assertIn("text/plain", response.headers["Content-Type"])
+            self.assertIn("phrenology_targets_completed_total 2", response.read().decode())
+
+
+class TestMainMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def test_when_i_scan_targets_completions_and_failures_are_counted(self):
+        """
+        When I scan one reachable and one unreachable target with metrics enabled,
+        one completion and one failure should be counted and the pool statistics collected.
+        """
+        metrics = Metrics()
+        main = Main(render.JsonTemplate(), {"method": "HEAD"}, metrics=metrics)
+        main.engage(self.url, None, False, False, False, False, False)
+        with self.assertRaises(RuntimeError):
+            main.fetch("http://127.0.0.1:9/", None, False)
+        text = metrics.render()
+        main.close()
+        self.assertEqual(metrics.value("phrenology_targets_completed_total"), 1)
+        self.assertEqual(metrics.value("phrenology_targets_failed_total", error="connect"), 1)
+        self.assertEqual(metrics.value("phrenology_requests_in_flight"), 0)
+        self.assertIn("phrenology_requests_sent_total 2\n", text)
+
+    def test_when_targets_fail_differently_each_failure_is_counted_by_kind(self):
+        """
+        When targets fail to resolve, to connect, or have an invalid URL,
+        each failure should be counted under its own kind instead of its exception class.
+        """
+        metrics = Metrics()
+        main = Main(render.JsonTemplate(), {"method": "HEAD"}, metrics=metrics)
+        self.addCleanup(main.close)
+        with self.assertRaises(RuntimeError):
+            main.fetch("http://127.0.0.1:9/", None, False)
+        with patch.object(main.session_pool.resolver, "resolve", side_effect=socket.gaierror(-2, "Name unknown")):
+            with self.assertRaises(RuntimeError):
+                main.fetch("https://missing.example.com/", None, False)
+        with self.assertRaises(ValueError):
+            main.fetch("ftp://example.com/", None, False)
+        for kind in ("connect", "dns", "invalid_url"):
+            with self.subTest(kind=kind):
+                self.assertEqual(metrics.value("phrenology_targets_failed_total", error=kind), 1)
+        self.assertEqual(metrics.value("phrenology_targets_failed_total", error="RuntimeError"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,209 @@
+import io
+import json
+import random
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from phrenology import Main
+from phrenology.common import render
+from phrenology.component import Header
+from phrenology.monitor import Schedule, monitor
+
+
+class TestSchedule(unittest.TestCase):
+
+    def test_when_targets_are_added_their_first_checks_are_spread_over_one_interval(self):
+        """
+        When I add several targets at once,
+        they should come due one after the other over the first interval, not all together.
+        """
+        schedule = Schedule(100)
+        schedule.spread(["a", "b", "c", "d", "a"], now=0)
+        self.assertEqual(len(schedule), 4)
+        self.assertEqual(schedule.pop_due(0), ["a"])
+        self.assertEqual(schedule.pop_due(60), ["b", "c"])
+        self.assertEqual(schedule.next_due(), 75)
+
+    def test_when_a_target_changes_it_is_checked_sooner_and_backs_off_while_stable(self):
+        """
+        When a target changes its interval should shrink towards the minimum,
+        and while it stays the same its interval should grow exponentially up to the maximum.
+        """
+        schedule = Schedule(100, min_interval=30, max_interval=500, jitter=0)
+        schedule.spread(["a"], now=0)
+        schedule.pop_due(0)
+        self.assertEqual([schedule.reschedule("a", True, 0) for _ in range(3)], [50, 30, 30])
+        self.assertEqual([schedule.reschedule("a", False, 0) for _ in range(5)], [60, 120, 240, 480, 500])
+        self.assertEqual(schedule.reschedule("a", None, 0), 500)
+
+    def test_when_due_times_are_jittered_they_stay_within_the_jitter(self):
+        """
+        When due times are jittered,
+        every due time should stay within the jitter fraction of the interval.
+        """
+        schedule = Schedule(100, jitter=0.1, rng=random.Random(1))
+        for i in range(50):
+            schedule.reschedule(str(i), None, 0)
+        self.assertEqual(schedule.pop_due(89.9), [])
+        self.assertEqual(len(schedule.pop_due(110)), 50)
+
+    def test_when_intervals_are_inconsistent_the_schedule_is_rejected(self):
+        """
+        When the minimum interval is above the interval or the backoff does not grow it,
+        a ValueError should be raised.
+        """
+        for arguments in ({"interval": 10, "min_interval": 20}, {"interval": 0}, {"interval": 10, "backoff": 1}):
+            with self.subTest(arguments=arguments):
+                with self.assertRaises(ValueError):
+                    Schedule(**arguments)
+
+
+class TestMonitor(unittest.TestCase):
+
+    def test_when_i_monitor_targets_only_changes_are_written_and_change_drives_the_interval(self):
+        """
+        When I monitor a target that keeps changing and one that never does,
+        only the changes should be written, and the changing target should be checked more often.
+        """
+        stream = io.StringIO()
+        output = render.DiffTemplate(stream, follow=True)
+        main = Main(output, {"method": "HEAD"})
+        self.addCleanup(main.close)
+        schedule = Schedule(8, min_interval=1, max_interval=64, jitter=0)
+        now = [0.0]
+        checks = {"https://busy.com": 0, "https://calm.com": 0}
+
+        class FakeStop(threading.Event):
+            def wait(self, timeout=None):
+                # Sleeping just moves the fake clock forward.
+                now[0] += timeout
+                return self.is_set()
+
+        stop = FakeStop()
+
+        def fake_fetch(url, cookie=None, get=False):
+            checks[url] += 1
+            value = str(checks[url]) if "busy" in url else "deny"
+            return url, Header.Model({"X-Frame-Options": value})
+
+        def clock():
+            if now[0] >= 100:
+                stop.set()
+            return now[0]
+
+        options = {"cookie": None, "cache": False, "deprecated": False, "information": False, "get": False, "json": True}
+        with patch.object(main, "fetch", side_effect=fake_fetch):
+            total = monitor(main, output, list(checks), options, schedule, stop=stop, clock=clock)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(total, sum(checks.values()))
+        self.assertGreater(checks["https://busy.com"], 3 * checks["https://calm.com"])
+        self.assertEqual({record["url"] for record in records if record["change"] == "changed"}, {"https://busy.com"})
+        self.assertEqual([record["change"] for record in records if record["url"] == "https://calm.com"], ["new"])
+
+    def test_when_a_check_fails_its_interval_is_kept_whatever_was_rendered_before(self):
+        """
+        When a target keeps failing and its errors are not rendered,
+        its interval should stay the same instead of following the change of another target.
+        """
+        output = render.DiffTemplate(io.StringIO(), follow=True)
+        main = Main(output, {"method": "HEAD"})
+        self.addCleanup(main.close)
+        schedule = Schedule(8, min_interval=1, max_interval=64, jitter=0)
+        now = [0.0]
+        checks = {"https://busy.com": 0, "https://down.com": 0}
+
+        class FakeStop(threading.Event):
+            def wait(self, timeout=None):
+                now[0] += timeout
+                return self.is_set()
+
+        stop = FakeStop()
+
+        def fake_fetch(url, cookie=None, get=False):
+            checks[url] += 1
+            if "down" in url:
+                raise RuntimeError("An error occurred: connection refused")
+            return url, Header.Model({"X-Frame-Options": str(checks[url])})
+
+        def clock():
+            if now[0] >= 100:
+                stop.set()
+            return now[0]
+
+        with patch.object(main, "fetch", side_effect=fake_fetch):
+            monitor(main, output, list(checks), {}, schedule, stop=stop, on_error=lambda url, e: None, clock=clock)
+
+        self.assertGreater(checks["https://busy.com"], 3 * checks["https://down.com"])
+        self.assertLessEqual(checks["https://down.com"], 100 // 8 + 1)
+
+    def test_when_i_monitor_a_bare_domain_it_is_scheduled_under_its_normalized_url(self):
+        """
+        When I monitor a bare domain next to its https URL,
+        they should be one target, checked and rescheduled under the normalized URL.
+        """
+        output = render.DiffTemplate(io.StringIO(), follow=True)
+        main = Main(output, {"method": "HEAD"})
+        self.addCleanup(main.close)
+        schedule = Schedule(8, jitter=0)
+        now = [0.0]
+        fetched = []
+
+        class FakeStop(threading.Event):
+            def wait(self, timeout=None):
+                now[0] += timeout
+                return self.is_set()
+
+        stop = FakeStop()
+
+        def fake_fetch(url, cookie=None, get=False):
+            fetched.append(url)
+            return url, Header.Model({"X-Frame-Options": "deny"})
+
+        def clock():
+            if now[0] >= 30:
+                stop.set()
+            return now[0]
+
+        with patch.object(main, "fetch", side_effect=fake_fetch):
+            monitor(main, output, ["calm.com", "https://calm.com"], {}, schedule, stop=stop, clock=clock)
+
+        self.assertGreater(len(fetched), 1)
+        self.assertEqual(set(fetched), {"https://calm.com"})
+        self.assertEqual(len(schedule), 1)
+
+    def test_when_one_target_is_slow_the_others_keep_their_schedule(self):
+        """
+        When one monitored target takes long to answer,
+        the other targets should keep being checked while it is in progress.
+        """
+        output = render.DiffTemplate(io.StringIO(), follow=True)
+        main = Main(output, {"method": "HEAD"})
+        self.addCleanup(main.close)
+        schedule = Schedule(0.1, min_interval=0.05, max_interval=0.1, jitter=0)
+        stop = threading.Event()
+        release = threading.Event()
+        checks = {"https://slow.com": 0, "https://fast.com": 0}
+
+        def fake_fetch(url, cookie=None, get=False):
+            checks[url] += 1
+            if "slow" in url:
+                release.wait(5)
+                stop.set()
+            elif checks[url] >= 3:
+                release.set()
+            return url, Header.Model({"X-Frame-Options": "deny"})
+
+        started = time.monotonic()
+        with patch.object(main, "fetch", side_effect=fake_fetch):
+            monitor(main, output, list(checks), {}, schedule, workers=2, stop=stop)
+
+        self.assertLess(time.monotonic() - started, 4)
+        self.assertEqual(checks["https://slow.com"], 1)
+        self.assertGreaterEqual(checks["https://fast.com"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from phrenology.common import render
+
+
+class TestNdjsonTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.output = render.NdjsonTemplate(self.stream)
+
+    def render_url(self, url):
+        self.output.render_output("counts", "Expected headers", url, ["success", "error"], {"expected": 1, "missing": 0})
+        self.output.render_output(
+            "list",
+            "Expected headers",
+            url,
+            ["success", "error"],
+            {"expected": {"X-Frame-Options": "deny"}, "missing": {}, "present": {}},
+        )
+
+    def test_when_a_url_completes_its_record_is_written_and_released(self):
+        """
+        When Main finishes with a URL,
+        one JSON line should be written for it and nothing kept in memory.
+        """
+        self.render_url("https://one.com")
+        self.assertEqual(self.stream.getvalue(), "")
+        self.output.render_output("complete", None, "https://one.com")
+        record = json.loads(self.stream.getvalue())
+        self.assertEqual(record["url"], "https://one.com")
+        self.assertEqual(record["Expected headers"]["expected"], {"X-Frame-Options": "deny"})
+        self.assertEqual(self.output.results, {})
+
+    def test_when_a_url_fails_an_error_record_is_written(self):
+        """
+        When a URL fails,
+        its record should carry the error message.
+        """
+        self.output.render_output("error", "Error", "https://bad.com", None, {"message": "boom"})
+        self.output.render_output("complete", None, "https://bad.com")
+        self.assertEqual(json.loads(self.stream.getvalue()), {"url": "https://bad.com", "error": "boom"})
+
+    def test_when_the_output_path_ends_in_gz_it_is_compressed(self):
+        """
+        When the output path ends in .gz,
+        the records should be written gzip compressed.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.ndjson.gz")
+            self.output = render.NdjsonTemplate.open(path)
+            self.render_url("https://one.com")
+            self.output.render_output("complete", None, "https://one.com")
+            self.output.dump()
+            with gzip.open(path, "rt") as f:
+                lines = f.read().splitlines()
+        self.assertEqual(len(lines), 1)
+        self.assertEqual(json.loads(lines[0])["url"], "https://one.com")
+
+    def test_when_records_are_compressed_they_are_not_flushed_one_by_one(self):
+        """
+        When many records are written to a .gz output,
+        the stream should be flushed at intervals rather than after every record,
+        while an uncompressed stream is still flushed after every record.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            for name, flushes in (("results.ndjson.gz", range(1, 3)), ("results.ndjson", range(100, 101))):
+                with self.subTest(name=name):
+                    path = os.path.join(directory, name)
+                    self.output = render.NdjsonTemplate.open(path)
+                    with patch.object(self.output.stream, "flush", wraps=self.output.stream.flush) as flush:
+                        for n in range(100):
+                            self.output.render_output("complete", None, f"https://{n}.com")
+                    self.assertIn(flush.call_count, flushes)
+                    self.output.dump()
+                    opener = gzip.open if name.endswith(".gz") else open
+                    with opener(path, "rt") as f:
+                        self.assertEqual(len(f.read().splitlines()), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import io
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from phrenology import Main, processes
+from phrenology.common import render
+from phrenology.component.timeout import Deadline
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        if self.path.startswith("/slow/"):
+            time.sleep(0.25)
+        self.send_response(200)
+        self.send_header("X-Frame-Options", "deny")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def build_main(output):
+    """Builds the Main instance of a worker process."""
+    return Main(output, {"method": "HEAD"})
+
+
+OPTIONS = {
+    "cookie": None,
+    "cache": False,
+    "deprecated": False,
+    "information": False,
+    "get": False,
+    "json": True,
+    "owasp_guidance": False,
+}
+
+
+class TestProcesses(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def test_when_i_scan_with_processes_results_keep_their_order(self):
+        """
+        When I scan targets across worker processes with streaming output,
+        every result should be written in input order and failures passed to on_error.
+        """
+        urls = [f"{self.base}/{n}" for n in range(40)]
+        urls.insert(7, "http://127.0.0.1:9/")
+        output = render.NdjsonTemplate(io.StringIO())
+        main = Main(output, {"method": "HEAD"})
+        errors, completed = [], []
+        processes.scan(
+            main,
+            build_main,
+            urls,
+            OPTIONS,
+            processes=2,
+            workers=2,
+            chunk_size=8,
+            on_error=lambda url, e: errors.append((url, e)),
+            on_complete=completed.append,
+        )
+        main.close()
+        records = [json.loads(line) for line in output.stream.getvalue().splitlines()]
+        self.assertEqual([record["url"] for record in records], urls[:7] + urls[8:])
+        self.assertEqual(records[0]["Expected headers"]["expected"], {"X-Frame-Options": "deny"})
+        self.assertEqual([url for url, _ in errors], ["http://127.0.0.1:9/"])
+        self.assertIsInstance(errors[0][1], RuntimeError)
+        # The kind of failure survives the trip back from the worker process.
+        self.assertEqual(errors[0][1].kind, "connect")
+        self.assertEqual(completed, urls)
+
+    def test_when_i_collect_json_the_results_are_merged_into_one_document(self):
+        """
+        When I scan targets across worker processes with JSON output,
+        the results of every worker should end up in the output of this process.
+        """
+        urls = [f"{self.base}/{n}" for n in range(10)]
+        output = render.JsonTemplate()
+        main = Main(output, {"method": "HEAD"})
+        processes.scan(main, build_main, urls, OPTIONS, processes=2, chunk_size=3)
+        main.close()
+        self.assertEqual(list(output.results), urls)
+
+    def test_when_the_deadline_passes_in_a_worker_it_stops_the_whole_run(self):
+        """
+        When the run deadline passes while a worker process is scanning a chunk,
+        the worker should stop starting targets at the deadline of this process, not its own.
+        """
+        urls = [f"{self.base}/slow/{n}" for n in range(40)]
+        output = render.JsonTemplate()
+        main = Main(output, {"method": "HEAD"}, deadline=Deadline(1.5))
+        completed = []
+        started = time.monotonic()
+        processes.scan(
+            main, build_main, urls, OPTIONS, processes=1, chunk_size=40, on_complete=completed.append
+        )
+        main.close()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertLess(len(completed), len(urls))
+        self.assertTrue(main.deadline_reached)
+
+
+if __name__ == "__main__":
+    unittest.main()
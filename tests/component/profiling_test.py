@@ -0,0 +1,48 @@
+import io
+import os
+import pstats
+import tempfile
+import threading
+import unittest
+
+from phrenology.common.profiling import Profiler
+
+
+def _busy_worker():
+    return sum(range(1000))
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "run.prof")
+
+    def test_when_i_profile_a_run_worker_threads_are_included(self):
+        """
+        When the profiled code does its work on another thread,
+        the written statistics should include the functions that thread ran.
+        """
+        with Profiler(self.path, top=0):
+            worker = threading.Thread(target=_busy_worker)
+            worker.start()
+            worker.join()
+        functions = {name for _, _, name in pstats.Stats(self.path).stats}
+        self.assertIn("_busy_worker", functions)
+
+    def test_when_i_profile_a_run_the_hottest_functions_are_summarized(self):
+        """
+        When profiling stops,
+        a summary limited to the requested number of functions should be printed.
+        """
+        stream = io.StringIO()
+        with Profiler(self.path, top=3, stream=stream):
+            _busy_worker()
+        summary = stream.getvalue()
+        self.assertIn(f"Profile written to {self.path}", summary)
+        self.assertIn("due to restriction <3>", summary)
+
+
+if __name__ == "__main__":
+    unittest.main()
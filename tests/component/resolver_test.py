@@ -0,0 +1,64 @@
+import socket
+import unittest
+from unittest.mock import patch
+
+from phrenology.component.resolver import Resolver
+
+
+def addrinfo(*addresses):
+    """Returns what socket.getaddrinfo() answers for a host with these addresses."""
+    return [
+        (socket.AF_INET6 if ":" in address else socket.AF_INET, socket.SOCK_STREAM, 6, "", (address, 0))
+        for address in addresses
+    ]
+
+
+class TestResolver(unittest.TestCase):
+
+    def test_when_i_resolve_a_hostname_twice_the_second_lookup_is_cached(self):
+        """
+        When I resolve the same hostname twice,
+        the system resolver should only be asked once.
+        """
+        resolver = Resolver()
+        with patch("socket.getaddrinfo", return_value=addrinfo("192.0.2.1")) as lookup:
+            self.assertEqual(resolver.resolve("Example.com"), "192.0.2.1")
+            self.assertEqual(resolver.resolve("example.com"), "192.0.2.1")
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual(resolver.snapshot(), {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_when_a_hostname_does_not_resolve_the_failure_is_cached(self):
+        """
+        When a hostname fails to resolve,
+        the next lookup should fail from the negative cache.
+        """
+        resolver = Resolver()
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror(-2, "Name or service not known")) as lookup:
+            for _ in range(2):
+                with self.assertRaises(socket.gaierror):
+                    resolver.resolve("missing.invalid")
+        self.assertEqual(lookup.call_count, 1)
+
+    def test_when_the_ttl_is_zero_nothing_is_cached(self):
+        """
+        When the TTL is zero,
+        every lookup should go to the system resolver.
+        """
+        resolver = Resolver(ttl=0)
+        with patch("socket.getaddrinfo", return_value=addrinfo("192.0.2.1")) as lookup:
+            resolver.resolve("example.com")
+            resolver.resolve("example.com")
+        self.assertEqual(lookup.call_count, 2)
+
+    def test_when_a_host_only_has_an_ipv6_address_it_is_resolved(self):
+        """
+        When a hostname only has an IPv6 address,
+        the resolver should return it instead of failing like an IPv4-only lookup would.
+        """
+        resolver = Resolver()
+        with patch("socket.getaddrinfo", return_value=addrinfo("2001:db8::1", "192.0.2.1")):
+            self.assertEqual(resolver.resolve("v6.example.com"), "2001:db8::1")
+
+
+if __name__ == "__main__":
+    unittest.main()
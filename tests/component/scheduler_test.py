@@ -0,0 +1,61 @@
+import threading
+import time
+import unittest
+
+from phrenology.component.scheduler import HostScheduler
+
+
+class TestHostScheduler(unittest.TestCase):
+
+    def run_concurrently(self, scheduler, hosts, hold=0.02):
+        """Runs one request per host on its own thread and returns the peak concurrency."""
+        lock = threading.Lock()
+        active = {"now": 0, "peak": 0}
+
+        def request(host):
+            with scheduler.slot(host, "192.0.2.1"):
+                with lock:
+                    active["now"] += 1
+                    active["peak"] = max(active["peak"], active["now"])
+                time.sleep(hold)
+                with lock:
+                    active["now"] -= 1
+
+        threads = [threading.Thread(target=request, args=(host,)) for host in hosts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return active["peak"]
+
+    def test_when_a_host_is_capped_requests_to_it_are_serialized(self):
+        """
+        When per_host is 1,
+        no two requests to the same host should overlap.
+        """
+        scheduler = HostScheduler(per_host=1)
+        self.assertEqual(self.run_concurrently(scheduler, ["a.com"] * 4), 1)
+
+    def test_when_an_ip_is_capped_hosts_sharing_it_are_limited(self):
+        """
+        When per_ip is 2,
+        at most two requests to hosts sharing an address should overlap.
+        """
+        scheduler = HostScheduler(per_ip=2)
+        self.assertLessEqual(self.run_concurrently(scheduler, ["a.com", "b.com", "c.com", "d.com"]), 2)
+
+    def test_when_an_interval_is_set_requests_to_a_host_are_spaced(self):
+        """
+        When an interval is set,
+        consecutive requests to the same host should start at least that far apart.
+        """
+        scheduler = HostScheduler(interval=0.05)
+        started = time.monotonic()
+        for _ in range(3):
+            with scheduler.slot("a.com"):
+                pass
+        self.assertGreaterEqual(time.monotonic() - started, 0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
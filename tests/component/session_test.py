@@ -0,0 +1,109 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from phrenology.component.header import HeaderService
+from phrenology.component.resolver import Resolver
+from phrenology.component.session import ConnectionStats, SessionPool
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Where HEAD requests are redirected to, and the Host headers received.
+    location = None
+    hosts = []
+
+    def do_HEAD(self):
+        self.hosts.append(self.headers["Host"])
+        self.send_response(302 if self.location else 200)
+        if self.location:
+            self.send_header("Location", self.location)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def _serve(address, handler):
+    """Starts a server on a free port of `address` and returns it."""
+    server = ThreadingHTTPServer((address, 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class TestConnectionStats(unittest.TestCase):
+
+    def test_when_requests_share_connections_reuse_is_counted(self):
+        """
+        When three requests are sent over one new connection,
+        the snapshot should report two reused connections.
+        """
+        stats = ConnectionStats()
+        stats.connection_opened()
+        for _ in range(3):
+            stats.request_sent()
+        self.assertEqual(stats.snapshot(), {"requests": 3, "connections": 1, "reused": 2})
+
+
+class TestSessionPool(unittest.TestCase):
+
+    def test_when_keep_alive_is_disabled_connections_are_closed(self):
+        """
+        When keep-alive is disabled,
+        the shared session should ask servers to close every connection.
+        """
+        pool = SessionPool(keep_alive=False)
+        self.assertEqual(pool.session.headers["Connection"], "close")
+        pool.close()
+
+    def test_when_a_server_sets_a_cookie_it_is_not_shared(self):
+        """
+        When a cookie is offered to the shared session,
+        it should be rejected so it never leaks into the next target.
+        """
+        pool = SessionPool()
+        policy = pool.session.cookies.get_policy()
+        self.assertTrue(policy.is_not_allowed("example.com"))
+        pool.close()
+
+    def test_when_a_redirect_changes_host_the_next_hop_sends_its_own_host(self):
+        """
+        When a target redirects to another host,
+        the second request should carry the Host of the redirect target, not of the first hop.
+        """
+        second_handler = type("Second", (_Handler,), {"hosts": []})
+        second = _serve("127.0.0.2", second_handler)
+        first = _serve("127.0.0.1", type("First", (_Handler,), {"location": f"http://127.0.0.2:{second.server_port}/"}))
+        self.addCleanup(first.shutdown)
+        self.addCleanup(second.shutdown)
+        pool = SessionPool()
+        self.addCleanup(pool.close)
+
+        response = pool.session.head(f"http://127.0.0.1:{first.server_port}/", allow_redirects=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(second_handler.hosts, [f"127.0.0.2:{second.server_port}"])
+
+    def test_when_a_target_is_fetched_its_host_is_resolved_once(self):
+        """
+        When HeaderService fetches targets through the pool with DNS caching disabled,
+        every request should cost exactly one lookup.
+        """
+        server = _serve("127.0.0.1", type("Plain", (_Handler,), {"hosts": []}))
+        self.addCleanup(server.shutdown)
+        resolver = Resolver(ttl=0)
+        pool = SessionPool(keep_alive=False, resolver=resolver)
+        self.addCleanup(pool.close)
+
+        for _ in range(3):
+            service = HeaderService({"method": "HEAD"}, session=pool.session, resolver=resolver)
+            service.url = f"http://127.0.0.1:{server.server_port}/"
+            service.run_request()
+
+        self.assertEqual(resolver.snapshot()["misses"], 3)
+        self.assertEqual(pool.stats.snapshot()["connections"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import io
+import json
+import unittest
+from unittest.mock import patch
+
+from phrenology import Main
+from phrenology.common import render
+from phrenology.component import Header
+from phrenology.stdio import parse_job, serve
+
+
+def fake_fetch(url, cookie=None, get=False):
+    """Returns a canned HeaderModel, failing for unresolvable hosts."""
+    if "bad" in url:
+        raise RuntimeError(f"Could not resolve '{url}'.")
+    return url, Header.Model({"X-Frame-Options": "deny", "Server": "nginx", "Cookie-Seen": str(cookie)})
+
+
+class TestParseJob(unittest.TestCase):
+
+    def test_when_a_line_is_a_bare_url_the_defaults_apply(self):
+        """
+        When a line holds only a URL,
+        the job should use the default options.
+        """
+        job = parse_job("https://one.com\n", {"get": True})
+        self.assertEqual(job["url"], "https://one.com")
+        self.assertTrue(job["get"])
+        self.assertIsNone(job["id"])
+
+    def test_when_a_line_is_a_json_job_its_options_override_the_defaults(self):
+        """
+        When a line holds a JSON job,
+        its options should override the defaults.
+        """
+        job = parse_job('{"url": "one.com", "id": 3, "cookie": "a=b", "get": false}', {"get": True})
+        self.assertEqual((job["url"], job["id"], job["cookie"], job["get"]), ("one.com", 3, "a=b", False))
+
+    def test_when_a_json_job_is_malformed_it_is_rejected(self):
+        """
+        When a JSON job is invalid, lacks a url or sets unknown fields,
+        parsing it should raise a ValueError.
+        """
+        for line in ('{"url": ', '{"id": 1}', '{"url": "one.com", "verbose": true}'):
+            with self.subTest(line=line):
+                with self.assertRaises(ValueError):
+                    parse_job(line)
+
+
+class TestServe(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.output = render.NdjsonTemplate(self.stream)
+        self.main = Main(self.output, {"method": "HEAD"})
+        self.addCleanup(self.main.close)
+
+    def serve(self, lines, workers=1):
+        with patch.object(self.main, "fetch", side_effect=fake_fetch):
+            answered = serve(self.main, lines, self.output, workers=workers)
+        return answered, [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+    def test_when_i_send_jobs_each_gets_one_result_in_order(self):
+        """
+        When I send several jobs, including failing and malformed ones,
+        each should get exactly one result line in the order it was sent.
+        """
+        lines = [f"https://host{i}.com\n" for i in range(6)]
+        lines[2] = "https://bad.com\n"
+        lines.insert(4, '{"url": \n')
+        lines.insert(5, "\n")
+        answered, records = self.serve(lines, workers=3)
+        self.assertEqual(answered, 7)
+        self.assertEqual([record["url"] for record in records][:3], ["https://host0.com", "https://host1.com", "https://bad.com"])
+        self.assertIn("error", records[2])
+        self.assertTrue(records[4]["error"].startswith("Invalid job"))
+        self.assertEqual(records[-1]["url"], "https://host5.com")
+
+    def test_when_a_job_has_an_id_and_options_they_are_applied(self):
+        """
+        When a JSON job carries an id and a cookie,
+        the id should be echoed in the result and the cookie used for the request.
+        """
+        _, records = self.serve(['{"url": "https://one.com", "id": "job-1", "cookie": "a=b"}\n'])
+        self.assertEqual(records[0]["meta"]["id"], "job-1")
+        self.assertEqual(records[0]["Expected headers"]["present"]["Cookie-Seen"], "a=b")
+
+
+if __name__ == "__main__":
+    unittest.main()
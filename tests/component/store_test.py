@@ -0,0 +1,139 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from phrenology.common.store import LOST_HEADER_QUERY, ResultStore, SqliteTemplate
+
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "results.db")
+
+    def query(self, sql, *parameters):
+        connection = sqlite3.connect(self.path)
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def test_when_many_targets_share_values_each_value_is_stored_once(self):
+        """
+        When I record many targets serving the same header values,
+        every header name and value should be stored once and the results should reference them.
+        """
+        store = ResultStore(self.path, batch_size=7)
+        for i in range(50):
+            store.add(
+                f"https://host{i % 5}.example.com/{i}",
+                {"Strict-Transport-Security": "max-age=63072000", "X-Frame-Options": "DENY"},
+            )
+        store.close()
+
+        self.assertEqual(self.query("SELECT COUNT(*) FROM results"), [(50,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM hosts"), [(5,)])
+        self.assertEqual(self.query("SELECT name FROM header_names ORDER BY name"), [("strict-transport-security",), ("x-frame-options",)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM header_values"), [(2,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM result_headers"), [(100,)])
+
+    def test_when_a_header_disappears_the_host_is_reported_as_having_lost_it(self):
+        """
+        When a host served HSTS in an earlier scan but not in its latest one,
+        it should be reported, while hosts that kept it, never had it or failed should not.
+        """
+        store = ResultStore(self.path)
+        store.add("https://lost.com", {"Strict-Transport-Security": "max-age=1"}, scanned_at=100)
+        store.add("https://kept.com", {"Strict-Transport-Security": "max-age=1"}, scanned_at=100)
+        store.add("https://never.com", {"Server": "nginx"}, scanned_at=100)
+        store.add("https://down.com", {"Strict-Transport-Security": "max-age=1"}, scanned_at=100)
+        store.add("https://stale.com", {"Strict-Transport-Security": "max-age=1"}, scanned_at=10)
+        store.close()
+
+        store = ResultStore(self.path)
+        store.add("https://lost.com", {"Server": "nginx"}, scanned_at=200)
+        store.add("https://kept.com", {"strict-transport-security": "max-age=2"}, scanned_at=200)
+        store.add("https://never.com", {"Server": "nginx"}, scanned_at=200)
+        store.add("https://down.com", {}, error="Connection refused", scanned_at=200)
+        store.add("https://stale.com", {}, scanned_at=200)
+        store.commit()
+
+        self.assertEqual(store.hosts_that_lost("Strict-Transport-Security", since=50), ["lost.com"])
+        self.assertEqual(store.hosts_that_lost("X-Unknown", since=50), [])
+        store.close()
+        self.assertEqual(self.query("SELECT COUNT(*) FROM scans WHERE finished_at IS NOT NULL"), [(2,)])
+
+    def test_when_lost_headers_are_queried_only_indexes_are_searched(self):
+        """
+        When I look for hosts that lost a header,
+        the query plan should search the indexes instead of scanning the result history.
+        """
+        store = ResultStore(self.path)
+        self.addCleanup(store.close)
+        plan = [row[3] for row in store.connection.execute(f"EXPLAIN QUERY PLAN {LOST_HEADER_QUERY}", {"name_id": 1, "since": 0})]
+        scans = [step for step in plan if step.startswith("SCAN") and step != "SCAN served"]
+        self.assertEqual(scans, [])
+        self.assertTrue(any("results_target" in step for step in plan))
+        self.assertTrue(any("result_headers_name" in step for step in plan))
+
+    def test_when_a_bare_domain_fails_and_then_succeeds_it_is_one_target(self):
+        """
+        When a target listed without a scheme fails under its raw name and later succeeds under its URL,
+        both results should belong to the same target.
+        """
+        store = ResultStore(self.path)
+        store.add("example.com", {}, error="Connection refused", scanned_at=100)
+        store.add("https://example.com", {"Server": "nginx"}, scanned_at=200)
+        store.add("not a url", {}, error="Invalid URL format", scanned_at=200)
+        store.close()
+        self.assertEqual(self.query("SELECT url FROM targets ORDER BY id"), [("https://example.com",), ("not a url",)])
+
+    def test_when_the_schema_version_is_unknown_the_store_is_rejected(self):
+        """
+        When I open a database written with a newer schema version,
+        a ValueError should be raised instead of mixing incompatible rows.
+        """
+        connection = sqlite3.connect(self.path)
+        connection.execute("PRAGMA user_version = 99")
+        connection.close()
+        with self.assertRaises(ValueError):
+            ResultStore(self.path)
+
+
+class TestSqliteTemplate(unittest.TestCase):
+
+    def test_when_a_target_completes_its_headers_ratings_and_errors_are_stored(self):
+        """
+        When results are rendered to the SQLite template,
+        each target should be written on completion with its headers, ratings and errors.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.db")
+            output = SqliteTemplate(path)
+            url = "https://example.com"
+            output.render_output("list", "Expected headers", url, None, {"expected": {"X-Frame-Options": "DENY"}, "present": {"Server": "nginx"}, "missing": {}})
+            output.render_output("counts", "Expected headers", url, None, {"expected": 1, "missing": 0})
+            output.render_output("analysis", "X-Frame-Options", url, None, {"rating": "good"})
+            output.render_output("meta", None, url, None, {"bytes_received": 120})
+            output.render_output("complete", None, url)
+            self.assertEqual(output.results, {})
+            output.render_output("error", "Error", "https://down.com", None, {"message": "Connection refused"})
+            output.dump()
+
+            connection = sqlite3.connect(path)
+            rows = connection.execute(
+                "SELECT header_names.name, header_values.value, rating FROM result_headers "
+                "JOIN header_names ON header_names.id = name_id JOIN header_values ON header_values.id = value_id "
+                "ORDER BY header_names.name"
+            ).fetchall()
+            results = connection.execute("SELECT error, bytes_received FROM results ORDER BY id").fetchall()
+            connection.close()
+
+        self.assertEqual(rows, [("server", "nginx", None), ("x-frame-options", "DENY", "good")])
+        self.assertEqual(results, [(None, 120), ("Connection refused", None)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from phrenology.common import targets
+from phrenology.common.targets import host_of, interleave, iter_lines, read_targets, shard, shard_of
+
+LISTING = b"# exported targets\nhttps://one.com\n\n  two.com  \r\n#three.com\nfour.com"
+
+
+class BaseTestTargets(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def write(self, name, data):
+        path = os.path.join(self.directory.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+
+class TestReadTargets(BaseTestTargets):
+
+    def test_when_i_read_a_plain_file_blank_and_comment_lines_are_skipped(self):
+        """
+        When I read a plain target file,
+        blank lines and comments should be skipped and whitespace stripped.
+        """
+        path = self.write("targets.txt", LISTING)
+        self.assertEqual(list(read_targets(path)), ["https://one.com", "two.com", "four.com"])
+
+    def test_when_i_read_a_gzip_file_it_is_decompressed(self):
+        """
+        When I read a gzip compressed target file,
+        the same targets should be returned as for the plain file.
+        """
+        path = self.write("targets.txt.gz", gzip.compress(LISTING))
+        self.assertEqual(list(read_targets(path)), ["https://one.com", "two.com", "four.com"])
+
+    def test_when_i_pipe_a_gzip_list_to_stdin_it_is_decompressed(self):
+        """
+        When I read targets from stdin,
+        a gzip compressed list should be detected and decompressed like a plain one is read.
+        """
+        for data in (LISTING, gzip.compress(LISTING)):
+            with self.subTest(compressed=data != LISTING):
+                stdin = io.TextIOWrapper(io.BufferedReader(io.BytesIO(data)))
+                with patch("sys.stdin", stdin):
+                    self.assertEqual(list(read_targets("-")), ["https://one.com", "two.com", "four.com"])
+
+    def test_when_i_read_a_large_file_it_is_memory_mapped(self):
+        """
+        When a file is above the mmap threshold,
+        the lines and their offsets should match a buffered read.
+        """
+        path = self.write("targets.txt", LISTING)
+        buffered = list(iter_lines(path))
+        with patch.object(targets, "MMAP_THRESHOLD", 1):
+            mapped = list(iter_lines(path))
+        self.assertEqual(mapped, buffered)
+        self.assertEqual(mapped[1], (len(b"# exported targets\n"), b"https://one.com\n"))
+
+
+    def test_when_i_read_from_an_offset_earlier_lines_are_skipped(self):
+        """
+        When I start reading at the offset of a target,
+        every source should yield that target first with its original offset.
+        """
+        offset = len(b"# exported targets\nhttps://one.com\n\n")
+        plain = self.write("targets.txt", LISTING)
+        compressed = self.write("targets.txt.gz", gzip.compress(LISTING))
+        for path in (plain, compressed):
+            with self.subTest(path=path):
+                resumed = list(read_targets(path, offset))
+                self.assertEqual(resumed, ["two.com", "four.com"])
+                self.assertEqual(resumed[0].offset, offset)
+
+
+class TestInterleave(unittest.TestCase):
+
+    def test_when_targets_are_sorted_by_host_they_are_spread_round_robin(self):
+        """
+        When a target list is sorted by host,
+        interleaving should alternate hosts while keeping each host's order.
+        """
+        urls = ["a.com/1", "a.com/2", "a.com/3", "https://b.com/1", "b.com/2", "c.com"]
+        self.assertEqual(
+            list(interleave(urls)),
+            ["a.com/1", "https://b.com/1", "c.com", "a.com/2", "b.com/2", "a.com/3"],
+        )
+
+    def test_when_a_target_has_no_scheme_its_host_is_still_found(self):
+        """
+        When a target has no scheme or a port,
+        host_of should still return the lowercase hostname.
+        """
+        self.assertEqual(host_of("Example.com:8443/path"), "example.com")
+        self.assertEqual(host_of("http://sub.example.com/?q=1"), "sub.example.com")
+
+
+class TestShard(unittest.TestCase):
+
+    def test_when_i_split_targets_every_target_lands_in_exactly_one_shard(self):
+        """
+        When I split a target list into shards,
+        the shards should be disjoint, cover every target and keep each host on one shard.
+        """
+        urls = [f"https://host{n % 50}.example.com/{n}" for n in range(500)]
+        shards = [list(shard(urls, index, 4)) for index in range(4)]
+        self.assertEqual(sorted(sum(shards, [])), sorted(urls))
+        self.assertTrue(all(shards))
+        for index, targets in enumerate(shards):
+            self.assertEqual({shard_of(url, 4) for url in targets}, {index})
+
+    def test_when_the_scheme_or_path_differs_the_shard_does_not(self):
+        """
+        When two targets share a host,
+        they should belong to the same shard, and the shard should be stable across runs.
+        """
+        self.assertEqual(shard_of("Example.com/a", 8), shard_of("https://example.com:443/b", 8))
+        self.assertEqual(shard_of("example.com", 8), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import socket
+import unittest
+
+from phrenology.component.timeout import Deadline, TimeoutPolicy, Watchdog, percentile
+
+
+class TestTimeoutPolicy(unittest.TestCase):
+
+    def test_when_no_limits_apply_the_configured_timeouts_are_used(self):
+        """
+        When there is no total budget or deadline,
+        the budget should be the configured connect and read timeouts.
+        """
+        self.assertEqual(TimeoutPolicy(connect=3, read=7).budget(), (3, 7))
+
+    def test_when_the_deadline_is_close_the_timeouts_shrink(self):
+        """
+        When the run deadline is closer than the configured timeouts,
+        neither timeout should outlast it.
+        """
+        self.assertEqual(TimeoutPolicy(connect=3, read=7, total=5).budget(remaining=2), (2, 2))
+
+    def test_when_adaptive_the_timeouts_follow_observed_latency(self):
+        """
+        When adaptive mode has enough observations,
+        the timeouts should drop to a multiple of the observed percentile.
+        """
+        policy = TimeoutPolicy(connect=10, read=20, adaptive=True, multiplier=4, floor=0.1, min_samples=10)
+        self.assertEqual(policy.budget(), (10, 20))
+        for _ in range(10):
+            policy.observe(0.5)
+        self.assertEqual(policy.budget(), (2.0, 2.0))
+
+
+class TestDeadline(unittest.TestCase):
+
+    def test_when_there_is_no_deadline_it_never_expires(self):
+        """
+        When no deadline is set,
+        it should never expire and report no remaining time.
+        """
+        deadline = Deadline()
+        self.assertFalse(deadline.expired())
+        self.assertIsNone(deadline.remaining())
+
+    def test_when_the_deadline_is_zero_it_has_expired(self):
+        """
+        When the deadline is zero seconds,
+        it should already have expired.
+        """
+        self.assertTrue(Deadline(0).expired())
+
+
+class TestWatchdog(unittest.TestCase):
+
+    def test_when_a_budget_runs_out_a_blocked_read_is_woken(self):
+        """
+        When a target is still reading once its budget has run out,
+        its socket should be shut down so the blocked read returns, while finished targets are left alone.
+        """
+        watchdog = Watchdog()
+        self.addCleanup(watchdog.close)
+        reader, writer = socket.socketpair()
+        done_reader, done_writer = socket.socketpair()
+        for sock in (reader, writer, done_reader, done_writer):
+            self.addCleanup(sock.close)
+        reader.settimeout(5)
+
+        with watchdog.watch(0.01) as done:
+            done.add(done_reader)
+        with watchdog.watch(0.1) as watch:
+            watch.add(reader)
+            self.assertEqual(reader.recv(1), b"")
+
+        self.assertTrue(watch.expired)
+        self.assertFalse(done.expired)
+        done_writer.sendall(b"x")
+        self.assertEqual(done_reader.recv(1), b"x")
+
+
+class TestPercentile(unittest.TestCase):
+
+    def test_when_i_ask_for_percentiles_the_nearest_rank_is_returned(self):
+        """
+        When I ask for the median and p99 of 1..100,
+        the nearest-rank values should be returned.
+        """
+        values = list(range(100, 0, -1))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile(values, 100), 100)
+
+
+if __name__ == "__main__":
+    unittest.main()
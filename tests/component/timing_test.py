@@ -0,0 +1,101 @@
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from phrenology import Main
+from phrenology.common import render
+from phrenology.component import timing
+from phrenology.component.timing import PhaseTiming, TimingStats
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("X-Frame-Options", "deny")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+class TestPhaseTiming(unittest.TestCase):
+
+    def test_when_a_phase_repeats_its_time_is_added_up(self):
+        """
+        When the same phase is recorded twice,
+        the snapshot should report the sum in milliseconds, in phase order.
+        """
+        phases = PhaseTiming()
+        phases.add("ttfb", 0.002)
+        phases.add("connect", 0.001)
+        phases.add("connect", 0.0005)
+        self.assertEqual(phases.snapshot(), {"connect": 1.5, "ttfb": 2.0})
+
+    def test_when_timing_is_disabled_measuring_records_nothing(self):
+        """
+        When no timing is being recorded,
+        measure() should be a no-op, and inside recording() it should record.
+        """
+        with timing.measure("dns"):
+            pass
+        self.assertIsNone(timing.current())
+        phases = PhaseTiming()
+        with timing.recording(phases):
+            with timing.measure("dns"):
+                pass
+        self.assertIn("dns", phases.phases)
+        self.assertIsNone(timing.current())
+
+    def test_when_i_summarize_a_run_percentiles_are_reported_per_phase(self):
+        """
+        When several targets were timed,
+        the summary should report the sample count and percentiles of each phase.
+        """
+        stats = TimingStats()
+        for milliseconds in range(1, 101):
+            phases = PhaseTiming()
+            phases.add("ttfb", milliseconds / 1000)
+            stats.record(phases)
+        self.assertEqual(stats.summary()["ttfb"], {"count": 100, "p50": 50.0, "p90": 90.0, "p99": 99.0})
+
+
+class TestMainTiming(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def test_when_timing_is_enabled_each_phase_is_reported(self):
+        """
+        When I scan a target with timing enabled,
+        the output should carry every phase and the run summary should count it.
+        """
+        output = render.JsonTemplate()
+        main = Main(output, {"method": "HEAD"}, timing_stats=TimingStats())
+        main.engage(self.url, None, False, False, False, False, True)
+        main.close()
+        phases = output.results[self.url]["meta"]["timing_ms"]
+        self.assertEqual(list(phases), ["dns", "connect", "ttfb", "analysis", "render"])
+        self.assertEqual(main.stats()["timing"]["ttfb"]["count"], 1)
+
+    def test_when_timing_is_disabled_nothing_is_recorded(self):
+        """
+        When I scan a target without timing,
+        the output should carry no timing and the stats no summary.
+        """
+        output = render.JsonTemplate()
+        main = Main(output, {"method": "HEAD"})
+        main.engage(self.url, None, False, False, False, False, True)
+        main.close()
+        self.assertNotIn("timing_ms", output.results[self.url]["meta"])
+        self.assertNotIn("timing", main.stats())
+
+
+if __name__ == "__main__":
+    unittest.main()